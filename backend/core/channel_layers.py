@@ -0,0 +1,238 @@
+"""
+Channel layer for several ASGI worker processes on one host, without Redis.
+
+Every process keeps its channels and group memberships in memory (it is an
+InMemoryChannelLayer underneath). Each event loop that creates channels
+listens on its own Unix domain socket in a shared directory, and channel names
+carry the socket of the loop that owns them ('specific.<process>-<n>!…'), so
+send() goes straight to that socket, and group_send() delivers locally and
+forwards the message once to every socket of the other processes; each socket
+hands it to the group members of its own loop. There is no broker and no
+shared state: a process that exits takes its sockets with it, and sockets
+left behind by a crashed process are removed on the first refused connection.
+
+Loops that only send (sync code going through async_to_sync, which runs each
+call on a fresh loop) don't keep connections open: they connect for the
+duration of the call and close again. Loops that created channels reuse their
+connections.
+
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'backend.core.channel_layers.UnixSocketChannelLayer',
+            'CONFIG': {'path': '/run/surveillance/channels'},
+        },
+    }
+
+Limits: messages must be JSON-serializable, channels without a process part
+(plain names like 'thumbnails') only get sends and group sends made inside
+their own process,
+and a message for a full channel in another process is dropped rather than
+raising ChannelFull. Keep 'path' short (a socket path is limited to ~100 bytes).
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import random
+import string
+import struct
+import tempfile
+import weakref
+from functools import partial
+from itertools import count
+from pathlib import Path
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer
+
+
+logger = logging.getLogger(__name__)
+
+SOCKET_SUFFIX = '.sock'
+_FRAME_HEADER = struct.Struct('!I')
+
+
+def _random_name(length):
+    return ''.join(random.choice(string.ascii_letters + string.digits) for _ in range(length))
+
+
+class UnixSocketChannelLayer(InMemoryChannelLayer):
+    """InMemoryChannelLayer whose sends and group sends also reach the other processes sharing 'path'."""
+
+    def __init__(self, path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(path or Path(tempfile.gettempdir()) / 'surveillance-channels')
+        self.peer = f'p{os.getpid()}{_random_name(6)}'
+        self._server_ids = count(1)
+        self._servers = weakref.WeakKeyDictionary()  # event loop -> (Server, socket name)
+        self._socket_names = set()  # Every socket this process created, removed on close / exit
+        self._connections = weakref.WeakKeyDictionary()  # serving event loop -> {socket name: StreamWriter}
+        atexit.register(self._remove_sockets)
+
+    # --- Channel layer API ---
+
+    async def new_channel(self, prefix='specific.'):
+        name = await self._ensure_server()
+        return f'{prefix}.{name}!{_random_name(12)}'
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), 'message is not a dict'
+        self.require_valid_channel_name(channel)
+        owner = self._owner(channel)
+        if owner is None or self._process(owner) == self.peer:
+            await super().send(channel, message)
+        else:
+            connections, transient = self._loop_connections()
+            try:
+                await self._forward(connections, owner, {'op': 'send', 'channel': channel, 'message': message})
+            finally:
+                if transient:
+                    await self._close_connections(connections)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), 'Message is not a dict'
+        self.require_valid_group_name(group)
+        frame = self._encode({'op': 'group_send', 'group': group, 'message': message})
+        connections, transient = self._loop_connections()
+        try:
+            for name in self._remote_sockets():
+                await self._forward(connections, name, frame=frame)
+        finally:
+            if transient:
+                await self._close_connections(connections)
+        await super().group_send(group, message)
+
+    async def close(self):
+        for server, _ in list(self._servers.values()):
+            server.close()
+        self._servers.clear()
+        for connections in list(self._connections.values()):
+            await self._close_connections(connections)
+        self._connections.clear()
+        self._remove_sockets()
+
+    # --- Receiving side ---
+
+    async def _ensure_server(self):
+        """Name of the running loop's socket, listening on it on first use."""
+        loop = asyncio.get_running_loop()
+        if loop in self._servers:
+            return self._servers[loop][1]
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+        name = f'{self.peer}-{next(self._server_ids)}'
+        self._socket_names.add(name)
+        server = await asyncio.start_unix_server(partial(self._serve, name), path=str(self._socket_path(name)))
+        self._servers[loop] = (server, name)
+        return name
+
+    async def _serve(self, name, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(_FRAME_HEADER.size)
+                envelope = json.loads(await reader.readexactly(_FRAME_HEADER.unpack(header)[0]))
+                if envelope['op'] == 'send':
+                    await self._deliver(envelope['channel'], envelope['message'])
+                elif envelope['op'] == 'group_send':
+                    # Every socket of this process gets the message: each serves its own loop's members
+                    self._clean_expired()
+                    for channel in list(self.groups.get(envelope['group'], {})):
+                        if self._owner(channel) == name:
+                            await self._deliver(channel, envelope['message'])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            pass  # Event loop shutting down; asyncio would log a cancelled connection handler
+        finally:
+            writer.close()
+
+    async def _deliver(self, channel, message):
+        try:
+            await super().send(channel, message)
+        except ChannelFull:
+            logger.warning("Dropped a message for full channel %s", channel)
+
+    # --- Sending side ---
+
+    @staticmethod
+    def _owner(channel):
+        """Process part of a 'prefix.<peer>!<local>' channel name, or None for plain channel names."""
+        if '!' not in channel:
+            return None
+        return channel.split('!', 1)[0].rsplit('.', 1)[-1]
+
+    @staticmethod
+    def _process(name):
+        """Process part of a '<process>-<n>' socket name."""
+        return name.split('-', 1)[0]
+
+    def _socket_path(self, name):
+        return self.directory / f'{name}{SOCKET_SUFFIX}'
+
+    def _remote_sockets(self):
+        """Socket names of the other processes sharing the directory."""
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return []
+        names = [entry.name[:-len(SOCKET_SUFFIX)] for entry in entries if entry.name.endswith(SOCKET_SUFFIX)]
+        return [name for name in names if self._process(name) != self.peer]
+
+    def _loop_connections(self):
+        """
+        (connections, transient) for the running loop. Loops serving channels keep
+        theirs; any other loop (e.g. one async_to_sync call) gets a fresh dict
+        that the caller closes when done.
+        """
+        loop = asyncio.get_running_loop()
+        if loop in self._servers:
+            return self._connections.setdefault(loop, {}), False
+        return {}, True
+
+    @staticmethod
+    async def _close_connections(connections):
+        writers = list(connections.values())
+        connections.clear()
+        for writer in writers:
+            writer.close()
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    @staticmethod
+    def _encode(envelope):
+        body = json.dumps(envelope, separators=(',', ':')).encode()
+        return _FRAME_HEADER.pack(len(body)) + body
+
+    async def _forward(self, connections, name, envelope=None, frame=None):
+        frame = frame if frame is not None else self._encode(envelope)
+        for _ in range(2):
+            writer = connections.get(name)
+            try:
+                if writer is None or writer.is_closing():
+                    _, writer = await asyncio.open_unix_connection(str(self._socket_path(name)))
+                    connections[name] = writer
+                writer.write(frame)
+                await writer.drain()
+                return
+            except FileNotFoundError:
+                break  # The peer exited
+            except ConnectionRefusedError:
+                # Nobody listens any more: left behind by a crashed process or a closed loop
+                self._socket_path(name).unlink(missing_ok=True)
+                break
+            except ConnectionError:
+                connections.pop(name, None)  # Stale connection; reconnect once
+        writer = connections.pop(name, None)
+        if writer is not None:
+            writer.close()
+
+    def _remove_sockets(self):
+        for name in self._socket_names:
+            try:
+                self._socket_path(name).unlink(missing_ok=True)
+            except OSError:
+                pass
@@ -87,6 +87,10 @@ WSGI_APPLICATION = 'backend.core.wsgi.application'
 ASGI_APPLICATION = 'backend.core.asgi.application'
 
 # Channels configuration
+# InMemoryChannelLayer only reaches consumers in the same process. When running several
+# ASGI workers on one host, switch to the Unix-socket layer (no Redis needed):
+#     'BACKEND': 'backend.core.channel_layers.UnixSocketChannelLayer',
+#     'CONFIG': {'path': '/run/surveillance/channels'},
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
@@ -171,3 +175,96 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+
+# --- Surveillance ingestion settings ---
+# Maximum number of observations accepted by /api/surveillance/area-observations/batch/
+SURVEILLANCE_BULK_MAX_ITEMS = 1000
+
+# 'sync' writes each event before responding; 'async' validates, queues and answers 202
+SURVEILLANCE_INGEST_MODE = 'sync'
+
+# Write-behind queue used when SURVEILLANCE_INGEST_MODE = 'async'
+SURVEILLANCE_WRITE_BEHIND = {
+    'MAX_SIZE': 10000,       # Pending events before ingestion answers 429
+    'FLUSH_SIZE': 500,       # Events written per batch
+    'FLUSH_INTERVAL': 0.5,   # Seconds a partial batch waits before being flushed
+    'SHUTDOWN_TIMEOUT': 30,  # Seconds allowed to drain the queue on exit
+}
+
+# Dedup cache for client-supplied idempotency keys (the unique DB column stays authoritative)
+SURVEILLANCE_IDEMPOTENCY_CACHE = {
+    'MAX_SIZE': 50000,  # Keys remembered per process (LRU eviction beyond this)
+    'TTL': 3600,        # Seconds a key is answered from memory before re-checking the DB
+}
+
+# Process-local cache of Camera / SurveillanceArea / EventType rows (invalidated by signals;
+# the TTL bounds staleness for edits made in other worker processes)
+SURVEILLANCE_LOOKUP_CACHE_SIZE = 4096
+SURVEILLANCE_LOOKUP_CACHE_TTL = 300
+
+# Seconds the dashboard status stays at ALERT after the latest incident
+SURVEILLANCE_ALERT_WINDOW_SECONDS = 30
+
+# ETag / Last-Modified (304) on the status, log and recent incident endpoints. The version is tracked
+# in memory per process, so set this to False when running several worker processes.
+SURVEILLANCE_CONDITIONAL_GET = True
+
+# Seconds between keepalive comments on idle /api/events/ (Server-Sent Events) streams
+SURVEILLANCE_SSE_KEEPALIVE_SECONDS = 15
+
+# Messages queued per live dashboard connection (WebSocket or SSE). A client that falls further
+# behind has its queued log rows dropped and is resynced; status updates are coalesced.
+SURVEILLANCE_LIVE_QUEUE_SIZE = 100
+
+# Live MJPEG streams (/video_feed/<camera_id>/?quality=<tier>&fps=<n>): camera_id -> cv2.VideoCapture
+# source (device index, file or RTSP URL). Each camera is captured once and encoded once per tier
+# (height None = as captured) for all viewers; capture stops IDLE_SECONDS after the last viewer leaves.
+SURVEILLANCE_VIDEO = {
+    'SOURCES': {'CAM001': 0},
+    'TIERS': {
+        'full': {'height': None, 'quality': 80},
+        '720p': {'height': 720, 'quality': 75},
+        '360p': {'height': 360, 'quality': 60},  # Thumbnail grids
+    },
+    'JPEG_QUALITY': 80,  # For tiers without their own 'quality'
+    'MAX_FPS': 15,
+    'IDLE_SECONDS': 10,
+    'RECONNECT_SECONDS': 2,
+}
+
+# In-memory window of the newest incidents served by the status, logs and recent incident feeds.
+# The sync interval bounds how stale it can be w.r.t. incidents written by other worker processes
+# (None disables the catch-up query for single-process deployments).
+SURVEILLANCE_RECENT_BUFFER_SIZE = 1000
+SURVEILLANCE_RECENT_BUFFER_SYNC_INTERVAL = 1.0
+
+# Cache of /api/analytics/timeseries/ counts. Closed (historical) buckets never expire;
+# the current bucket expires after TTL seconds or when a new event lands in it.
+SURVEILLANCE_ANALYTICS_CACHE = {
+    'MAX_SIZE': 256,  # Cached query ranges per process (LRU eviction beyond this)
+    'TTL': 60,        # Seconds the open, still-filling part of a range is reused
+    'CLOSED_TTL': 3600,  # Seconds closed buckets are reused (bounds staleness after other processes' writes)
+}
+
+# Hot/cold split of the event tables: whole months older than SURVEILLANCE_HOT_MONTHS are
+# moved by 'manage.py archive_events' to compressed columnar files under the archive root
+SURVEILLANCE_HOT_MONTHS = 3
+SURVEILLANCE_ARCHIVE_ROOT = BASE_DIR / 'archive'
+# Rows per archive file: a month is written, purged and scanned one file of at most this many rows at a time
+SURVEILLANCE_ARCHIVE_PART_ROWS = 100000
+
+# Days each event type is kept by 'manage.py purge_events' (types not listed are kept forever)
+SURVEILLANCE_RETENTION_DAYS = {
+    'WEAPON': 365,
+    'CROWD': 90,
+    'UOD': 30,
+    'INTRUSION': 90,
+}
+
+# Per-camera detection heatmaps: GRID is (cols, rows); box pixel coordinates are scaled by the
+# camera's frame size (FRAME_SIZE unless overridden in CAMERA_FRAME_SIZES, keyed by camera_id)
+SURVEILLANCE_HEATMAP = {
+    'GRID': (64, 36),
+    'FRAME_SIZE': (1280, 720),
+    'CAMERA_FRAME_SIZES': {},
+}
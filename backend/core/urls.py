@@ -4,6 +4,11 @@ from django.conf import settings
 from django.views.static import serve as static_serve
 from django.shortcuts import render
 
+from backend.surveillance_app.views import (
+    LatestStatusAPIView, EventLogAPIView, incident_event_stream_view, AnalyticsAPIView, AnalyticsTimeseriesAPIView,
+    video_feed_view
+)
+
 def dashboard_view(request):
     return render(request, 'index.html')
 
@@ -25,8 +30,19 @@ urlpatterns = [
     # All security-related API calls will start with 'api/security/'.
     path('api/security/', include('backend.security_app.urls')),
 
-    # WebSocket routing
-    path('ws/', include('backend.surveillance_app.routing')),
+    # 3. Dashboard polling endpoints (support ETag / If-None-Match)
+    path('api/latest_status/', LatestStatusAPIView.as_view(), name='latest-status'),
+    path('api/logs/', EventLogAPIView.as_view(), name='event-logs'),
+    # Push alternative to both for clients without WebSockets (Server-Sent Events)
+    path('api/events/', incident_event_stream_view, name='event-stream'),
+
+    # 4. Analytics dashboard data (served from the daily rollup table)
+    path('api/analytics/', AnalyticsAPIView.as_view(), name='analytics'),
+    path('api/analytics/timeseries/', AnalyticsTimeseriesAPIView.as_view(), name='analytics-timeseries'),
+
+    # 5. Live MJPEG camera streams (/video_feed/ serves the first configured camera)
+    path('video_feed/', video_feed_view, name='video-feed'),
+    path('video_feed/<str:camera_id>/', video_feed_view, name='camera-video-feed'),
 ]
 
 # --- Development-Only Configuration ---
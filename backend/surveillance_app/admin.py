@@ -1,8 +1,11 @@
 from django.contrib import admin
+from django.db.models import Q
+from .lookups import lookup_cache
 from .models import (
     SurveillanceArea, Camera, EventType, 
     AreaObservation, ObjectDetail
 )
+from .search import filter_observations
 
 # --- Configuration Models Admin ---
 
@@ -47,10 +50,22 @@ class AreaObservationAdmin(admin.ModelAdmin):
         'id', 'timestamp', 'camera_link', 'event_type', 'status', 'resolution_time'
     )
     list_filter = ('status', 'event_type', 'camera__area')
+    # Searched through the full-text index (see search.py) instead of icontains
     search_fields = ('camera__camera_id', 'analyst_notes', 'evidence_path')
+    search_help_text = "Words from the analyst notes or evidence path, or an exact camera ID."
     readonly_fields = ('timestamp',)
     inlines = [ObjectDetailInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = Q(pk__in=filter_observations(AreaObservation.objects.all(), search_term).values('pk'))
+        camera = lookup_cache.get_camera(search_term)
+        if camera is not None:
+            matches |= Q(camera_id=camera.pk)
+        return queryset.filter(matches), False
+
     # Custom display for camera foreign key
     def camera_link(self, obj):
         return f"{obj.camera.camera_id} ({obj.camera.area.name if obj.camera.area else 'N/A'})"
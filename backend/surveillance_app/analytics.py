@@ -0,0 +1,296 @@
+"""
+Time-bucketed event counts computed in the database.
+
+Events from SecurityIncident and AreaObservation are truncated to the requested
+bucket (minute/hour/day/week, in the local TIME_ZONE) and counted with GROUP BY,
+so only one row per (bucket, event type) leaves the database. Ranges reaching
+into archived months also scan the archive files (archive.py). Results use a
+compact columnar shape of parallel arrays; empty buckets are omitted.
+
+Counts are cached per normalized query. The range is widened to whole
+buckets (so the default "last 7 days up to now" maps onto the same entries
+all bucket long) and split at the start of the current bucket: the closed part
+before it is cached for CLOSED_TTL, the open part for a short TTL. New events
+(signals.py, ingest.py) drop only the entries whose range and filters cover
+them, so the current bucket is recomputed while historical buckets keep being
+served from memory. Entries are indexed by the local days they cover, so an
+ingest commit only looks at the entries of the days its events fall on (plus
+the few open-ended or very long ones). Purges clear the cache; CLOSED_TTL
+bounds how long closed counts can miss changes made by other worker processes.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute, TruncWeek
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .archive import ARCHIVE_TABLES
+from .caching import TTLCache
+from .filters import archive_filters, filter_events, parse_event_filters, parse_time_range
+from .lookups import lookup_cache
+
+
+BUCKETS = {
+    'minute': (TruncMinute, timedelta(minutes=1)),
+    'hour': (TruncHour, timedelta(hours=1)),
+    'day': (TruncDay, timedelta(days=1)),
+    'week': (TruncWeek, timedelta(weeks=1)),
+}
+
+# Upper bound on (end - start) / bucket, so one request can't ask for a year of minutes
+MAX_BUCKETS = 10000
+
+# Cached ranges longer than this are not indexed per day but checked against every new event
+MAX_INDEXED_DAYS = 366
+
+
+# --- Parameter Parsing ---
+
+def parse_timeseries_query(params):
+    """
+    Validates and normalizes query parameters into a dict with keys
+    start, end, bucket, event_type, camera, area (the last three may be None)
+    and until_now (no end was given: the range runs up to the time of the request).
+    """
+    bucket = params.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        raise ValidationError({'bucket': f"Expected one of: {', '.join(BUCKETS)}."})
+
+    start, end = parse_time_range(params, default_span=timedelta(days=7))
+    if (end - start) / BUCKETS[bucket][1] > MAX_BUCKETS:
+        raise ValidationError({'bucket': f"Range too large for '{bucket}' buckets (max {MAX_BUCKETS})."})
+
+    return {
+        'start': start, 'end': end, 'bucket': bucket, 'until_now': not params.get('end'),
+        **parse_event_filters(params),
+    }
+
+
+# --- Aggregation ---
+
+def _database_counts(model, query, counts):
+    trunc, _ = BUCKETS[query['bucket']]
+    tz = timezone.get_current_timezone()
+    rows = (
+        filter_events(model, query)
+        .annotate(bucket_start=trunc('timestamp', tzinfo=tz))
+        .values('bucket_start', 'event_type_id')
+        .annotate(total=Count('id'))
+    )
+    for row in rows:
+        counts[(row['bucket_start'], row['event_type_id'])] += row['total']
+
+
+def _archive_counts(table, query, counts):
+    event_type_id, camera_ids = archive_filters(query)
+    for chunk in table.scan(query['start'], query['end'], [], event_type_id, camera_ids):
+        # Time zone offsets are whole minutes, so minutes can be grouped before bucketing
+        minutes = chunk['timestamp'].astype('datetime64[m]').astype(np.int64)
+        pairs, totals = np.unique(np.stack([minutes, chunk['event_type_id']]), axis=1, return_counts=True)
+        for (minute, event_type), total in zip(pairs.T, totals):
+            moment = datetime.fromtimestamp(int(minute) * 60, tz=dt_timezone.utc)
+            counts[(bucket_start(moment, query['bucket']), int(event_type))] += int(total)
+
+
+def bucket_counts(query):
+    """
+    Counter of (bucket_start, event_type_id) -> events. Hot rows are counted with
+    one GROUP BY query per event table; archived months are scanned from disk.
+    """
+    counts = Counter()
+    for table in ARCHIVE_TABLES.values():
+        cold, hot = table.split_range(query['start'], query['end'])
+        if hot:
+            _database_counts(table.model, {**query, 'start': hot[0], 'end': hot[1]}, counts)
+        if cold:
+            _archive_counts(table, {**query, 'start': cold[0], 'end': cold[1]}, counts)
+    return counts
+
+
+def bucket_start(moment, bucket):
+    """Python equivalent of the Trunc functions above, in the current time zone."""
+    local = timezone.localtime(moment)
+    if bucket == 'minute':
+        return local.replace(second=0, microsecond=0)
+    if bucket == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = timezone.make_aware(datetime.combine(local.date(), time.min))
+    if bucket == 'week':
+        return day - timedelta(days=local.weekday())
+    return day
+
+
+# --- Response Cache ---
+
+class AnalyticsCache:
+    """
+    Bucket counts keyed on the normalized query. Each entry remembers the range
+    and filters it covers so new events can invalidate exactly the entries
+    that include them; keys are indexed by the local days they cover so only
+    those entries are checked.
+    """
+
+    def __init__(self, max_size=256, ttl=60.0, closed_ttl=3600.0):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+        self.closed_ttl = closed_ttl
+        self._lock = threading.Lock()
+        self._days = {}           # local date -> keys whose range includes part of it
+        self._unindexed = set()   # open-ended or longer than MAX_INDEXED_DAYS: checked for every event
+        self._indexed = {}        # key -> its dates (None if unindexed)
+
+    @staticmethod
+    def make_key(query, start, end):
+        """'end' is None for a range that is open up to now."""
+        return (start, end, query['bucket'], query['event_type'], query['camera'], query['area'])
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, counts, closed):
+        self._cache.set(key, counts, ttl=self.closed_ttl if closed else self._cache.ttl)
+        start, end = key[0], key[1]
+        with self._lock:
+            if key in self._indexed:
+                return
+            if end is None or end - start > timedelta(days=MAX_INDEXED_DAYS):
+                self._indexed[key] = None
+                self._unindexed.add(key)
+            else:
+                first, last = timezone.localdate(start), timezone.localdate(end - timedelta(microseconds=1))
+                days = self._indexed[key] = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+                for day in days:
+                    self._days.setdefault(day, set()).add(key)
+            if len(self._indexed) > 2 * self._cache.max_size:
+                # Forget keys the LRU evicted or that expired
+                live = set(self._cache.keys())
+                for stale in [indexed for indexed in self._indexed if indexed not in live]:
+                    self._unindex(stale)
+
+    def _unindex(self, key):
+        days = self._indexed.pop(key, None)
+        self._unindexed.discard(key)
+        for day in days or ():
+            keys = self._days.get(day)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._days[day]
+
+    @staticmethod
+    def _covers(key, timestamp, event_type_id, camera_id):
+        start, end, _, event_type, camera, area = key
+        if timestamp < start or (end is not None and timestamp >= end):
+            return False
+        if event_type:
+            cached_type = lookup_cache.get_event_type(event_type)
+            if cached_type is None or cached_type.pk != event_type_id:
+                return False
+        if camera or area:
+            event_camera = lookup_cache.get_camera_by_pk(camera_id) if camera_id else None
+            if event_camera is None:
+                return False
+            if camera and event_camera.camera_id != camera:
+                return False
+            if area and event_camera.area_id != area:
+                return False
+        return True
+
+    def invalidate_events(self, events):
+        """Drops every entry covering one of the (timestamp, event_type_id, camera_id) events."""
+        # Range ends are minute-aligned bucket starts (or the query's end, where rounding
+        # down only errs towards dropping an entry), so a batch shrinks to a few distinct events
+        by_day = defaultdict(set)
+        for timestamp, event_type_id, camera_id in events:
+            by_day[timezone.localdate(timestamp)].add(
+                (timestamp.replace(second=0, microsecond=0), event_type_id, camera_id)
+            )
+        for day, day_events in by_day.items():
+            with self._lock:
+                candidates = self._days.get(day, set()) | self._unindexed
+            for key in candidates:
+                if any(self._covers(key, *event) for event in day_events):
+                    self._cache.delete(key)
+                    with self._lock:
+                        self._unindex(key)
+
+    def clear(self):
+        self._cache.clear()
+        with self._lock:
+            self._days.clear()
+            self._unindexed.clear()
+            self._indexed.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+_cache_settings = getattr(settings, 'SURVEILLANCE_ANALYTICS_CACHE', {})
+analytics_cache = AnalyticsCache(
+    max_size=_cache_settings.get('MAX_SIZE', 256),
+    ttl=_cache_settings.get('TTL', 60),
+    closed_ttl=_cache_settings.get('CLOSED_TTL', 3600),
+)
+
+
+def invalidate_on_commit(events):
+    """Invalidates once the events' transaction commits, so readers can't re-cache pre-commit counts."""
+    events = list(events)
+    transaction.on_commit(lambda: analytics_cache.invalidate_events(events))
+
+
+def cached_bucket_counts(query, now=None):
+    """
+    bucket_counts() for 'query', served from analytics_cache where possible. The
+    first bucket is counted whole, from its start.
+    """
+    now = now or timezone.now()
+    start = bucket_start(query['start'], query['bucket'])
+    boundary = max(start, min(bucket_start(now, query['bucket']), query['end']))
+
+    counts = Counter()
+    for start, end, closed in ((start, boundary, True), (boundary, query['end'], False)):
+        if start >= end:
+            continue
+        # Nothing is newer than now, so every range reaching now shares one open-ended entry
+        open_ended = end >= now or (end == query['end'] and query.get('until_now'))
+        key = analytics_cache.make_key(query, start, None if open_ended else end)
+        part = analytics_cache.get(key)
+        if part is None:
+            part = bucket_counts({**query, 'start': start, 'end': end})
+            analytics_cache.set(key, part, closed)
+        counts.update(part)
+    return counts
+
+
+def to_columnar(query, counts):
+    """
+    Parallel-array response: time[i], event_type[i] and count[i] describe one bucket.
+    'start' is that of the first bucket, from which it is counted whole.
+    """
+    times, event_types, totals = [], [], []
+    for (moment, event_type_id), total in sorted(counts.items(), key=lambda item: (item[0][0], item[0][1])):
+        event_type = lookup_cache.get_event_type_by_pk(event_type_id)
+        times.append(moment.isoformat())
+        event_types.append(event_type.code if event_type else None)
+        totals.append(total)
+
+    return {
+        'bucket': query['bucket'],
+        'start': bucket_start(query['start'], query['bucket']).isoformat(),
+        'end': query['end'].isoformat(),
+        'filters': {key: query[key] for key in ('event_type', 'camera', 'area')},
+        'time': times,
+        'event_type': event_types,
+        'count': totals,
+    }
+
+
+def event_timeseries(query):
+    return to_columnar(query, cached_bucket_counts(query))
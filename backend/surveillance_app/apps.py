@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SurveillanceAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.surveillance_app'
+
+    def ready(self):
+        # Register signal receivers (lookup cache invalidation)
+        from . import signals  # noqa: F401
@@ -0,0 +1,311 @@
+"""
+Hot/cold storage split for the event tables.
+
+Whole months older than SURVEILLANCE_HOT_MONTHS are moved out of the database
+by the 'archive_events' management command. Each month becomes one or more
+compressed columnar NumPy files (one array per column) under
+SURVEILLANCE_ARCHIVE_ROOT, each holding at most SURVEILLANCE_ARCHIVE_PART_ROWS
+rows, so archiving, purging and scanning a month never hold more than one part
+in memory:
+
+    <root>/observations/2025-06.0001.npz   AreaObservation + ObjectDetail columns
+    <root>/incidents/2025-06.0001.npz      SecurityIncident + weapon/crowd metrics columns
+
+Months are archived oldest first, so archived data is always everything before
+ArchiveTable.archived_until(). Readers split a time range at that point: the
+hot part is queried from the database and the cold part is scanned from the
+files (see analytics.bucket_counts and archived_rows below).
+"""
+
+import json
+import math
+import os
+import tempfile
+from datetime import datetime, time, timezone as dt_timezone
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from backend.security_app.models import SecurityIncident
+from .models import AreaObservation, Camera
+
+
+ARCHIVE_SUFFIX = '.npz'
+
+
+def get_archive_root():
+    return Path(getattr(settings, 'SURVEILLANCE_ARCHIVE_ROOT', Path(settings.BASE_DIR) / 'archive'))
+
+
+def get_part_rows():
+    """Rows per archive file; bounds the memory used to archive, purge or scan a month."""
+    return getattr(settings, 'SURVEILLANCE_ARCHIVE_PART_ROWS', 100000)
+
+
+# --- Months ---
+
+def month_start(moment):
+    """Start of the local calendar month containing 'moment' (an aware datetime)."""
+    local = timezone.localtime(moment)
+    return timezone.make_aware(datetime.combine(local.date().replace(day=1), time.min))
+
+
+def next_month(start):
+    year, month = (start.year + 1, 1) if start.month == 12 else (start.year, start.month + 1)
+    return timezone.make_aware(datetime(year, month, 1))
+
+
+def month_label(start):
+    return f"{start.year:04d}-{start.month:02d}"
+
+
+def parse_month_label(label):
+    return timezone.make_aware(datetime.strptime(label, '%Y-%m'))
+
+
+# --- Column Encoding ---
+# Nulls: -1 for integer columns, NaN for floats, NaT for datetimes, '' for text.
+
+def _column_kind(field):
+    if isinstance(field, (models.ForeignKey, models.AutoField, models.IntegerField)):
+        return 'int'
+    if isinstance(field, (models.FloatField, models.DecimalField)):
+        return 'float'
+    if isinstance(field, models.BooleanField):
+        return 'bool'
+    if isinstance(field, models.DateTimeField):
+        return 'datetime'
+    if isinstance(field, models.JSONField):
+        return 'json'
+    return 'str'
+
+
+def _to_utc_naive(value):
+    return value.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+
+def to_datetime64(value):
+    return np.datetime64(_to_utc_naive(value), 'us')
+
+
+def encode_column(kind, values):
+    if kind == 'int':
+        return np.array([-1 if v is None else int(v) for v in values], dtype=np.int64)
+    if kind == 'float':
+        return np.array([math.nan if v is None else float(v) for v in values], dtype=np.float64)
+    if kind == 'bool':
+        return np.array([bool(v) for v in values], dtype=bool)
+    if kind == 'datetime':
+        return np.array(
+            [np.datetime64('NaT') if v is None else to_datetime64(v) for v in values],
+            dtype='datetime64[us]',
+        )
+    if kind == 'json':
+        return np.array(['' if v is None else json.dumps(v) for v in values], dtype=str)
+    return np.array(['' if v is None else str(v) for v in values], dtype=str)
+
+
+def decode_value(kind, value):
+    if kind == 'int':
+        return None if value == -1 else int(value)
+    if kind == 'float':
+        return None if math.isnan(value) else float(value)
+    if kind == 'bool':
+        return bool(value)
+    if kind == 'datetime':
+        if np.isnat(value):
+            return None
+        return value.astype('datetime64[us]').item().replace(tzinfo=dt_timezone.utc)
+    if kind == 'json':
+        return json.loads(value) if value else None
+    return str(value) or None
+
+
+# --- Archive Tables ---
+
+class ArchiveTable:
+    """
+    One archived event table: the model's concrete columns plus those of its
+    one-to-one detail relations, stored as '<relation>__<column>'.
+    """
+
+    def __init__(self, name, model, relations=(), snapshot_field=None):
+        self.name = name
+        self.model = model
+        self.relations = relations
+        self.snapshot_field = snapshot_field
+
+    @property
+    def directory(self):
+        return get_archive_root() / self.name
+
+    def columns(self):
+        """[(values() lookup, kind)] for every archived column."""
+        columns = [(field.attname, _column_kind(field)) for field in self.model._meta.concrete_fields]
+        for relation_name in self.relations:
+            relation = self.model._meta.get_field(relation_name)
+            for field in relation.related_model._meta.concrete_fields:
+                if field is relation.field:
+                    continue
+                columns.append((f"{relation_name}__{field.attname}", _column_kind(field)))
+        return columns
+
+    def _files(self):
+        """{month label: [part paths, oldest part first]}; parts are named '<YYYY-MM>.<part>.npz'."""
+        months = {}
+        if self.directory.is_dir():
+            for entry in sorted(self.directory.iterdir()):
+                if entry.name.endswith(ARCHIVE_SUFFIX):
+                    months.setdefault(entry.name.split('.', 1)[0], []).append(entry)
+        return months
+
+    def parts(self, start):
+        """The archive files of the month starting at 'start'."""
+        return self._files().get(month_label(start), [])
+
+    def archived_months(self):
+        return sorted(parse_month_label(label) for label in self._files())
+
+    def archived_until(self):
+        """End of the newest archived month; rows before it are read from the files. None if nothing is archived."""
+        months = self.archived_months()
+        return next_month(months[-1]) if months else None
+
+    def split_range(self, start, end):
+        """
+        Splits [start, end) at archived_until() into (cold, hot) sub-ranges, each a
+        (start, end) tuple or None when the range doesn't reach that side.
+        """
+        until = self.archived_until()
+        if until is None or until <= start:
+            return None, (start, end)
+        if until >= end:
+            return (start, end), None
+        return (start, until), (until, end)
+
+    @staticmethod
+    def load(path, names=None):
+        """Column arrays of one archive file, optionally limited to 'names'."""
+        with np.load(path, allow_pickle=False) as archive:
+            return {name: archive[name] for name in (names or archive.files)}
+
+    # --- Writing ---
+
+    def hot_rows(self, start, end):
+        lookups = [lookup for lookup, _ in self.columns()]
+        return (
+            self.model.objects
+            .filter(timestamp__gte=start, timestamp__lt=end)
+            .order_by('id')
+            .values(*lookups)
+        )
+
+    def write_part(self, start, rows):
+        """
+        Writes 'rows' (values() dicts) as a new file of the month, skipping ids
+        that an earlier, interrupted run already archived. Returns rows added.
+        """
+        parts = self.parts(start)
+        ids = np.array([row['id'] for row in rows], dtype=np.int64)
+        archived = np.zeros(len(ids), dtype=bool)
+        for path in parts:
+            archived |= np.isin(ids, self.load(path, ['id'])['id'])
+        rows = [row for row, done in zip(rows, archived) if not done]
+        if not rows:
+            return 0
+
+        number = max((int(path.name.split('.')[1]) for path in parts), default=0) + 1
+        path = self.directory / f"{month_label(start)}.{number:04d}{ARCHIVE_SUFFIX}"
+        self._save(path, {
+            lookup: encode_column(kind, [row[lookup] for row in rows]) for lookup, kind in self.columns()
+        })
+        return len(rows)
+
+    def _save(self, path, arrays):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.savez_compressed(handle, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def rewrite_part(self, path, keep):
+        """Keeps only the rows selected by the boolean array 'keep'; removes the file if none remain."""
+        if not keep.any():
+            path.unlink()
+            return
+        arrays = self.load(path)
+        self._save(path, {name: array[keep] for name, array in arrays.items()})
+
+    def archive_month(self, start, batch_size=1000):
+        """
+        Exports one month of hot rows, one file of at most get_part_rows() rows at
+        a time, deleting each part's rows from the database (in transactions of
+        'batch_size' rows) once its file is written. Returns (rows archived, rows deleted).
+        """
+        rows_query = self.hot_rows(start, next_month(start))
+        part_rows = get_part_rows()
+        written = deleted = 0
+        last_id = 0
+        while True:
+            rows = list(rows_query.filter(id__gt=last_id)[:part_rows])
+            if not rows:
+                break
+            written += self.write_part(start, rows)
+            ids = [row['id'] for row in rows]
+            for offset in range(0, len(ids), batch_size):
+                with transaction.atomic():
+                    self.model.objects.filter(pk__in=ids[offset:offset + batch_size]).delete()
+                deleted += len(ids[offset:offset + batch_size])
+            last_id = ids[-1]
+        return written, deleted
+
+    # --- Reading ---
+
+    def scan(self, start, end, names, event_type_id=None, camera_ids=None):
+        """
+        Yields, per archived month overlapping [start, end), the requested column
+        arrays filtered to that range and the optional event type / camera filters.
+        """
+        names = list(dict.fromkeys(['timestamp', 'event_type_id', 'camera_id', *names]))
+        low, high = to_datetime64(start), to_datetime64(end)
+        for month in self.archived_months():
+            if next_month(month) <= start or month >= end:
+                continue
+            for path in self.parts(month):
+                columns = self.load(path, names)
+                mask = (columns['timestamp'] >= low) & (columns['timestamp'] < high)
+                if event_type_id is not None:
+                    mask &= columns['event_type_id'] == event_type_id
+                if camera_ids is not None:
+                    mask &= np.isin(columns['camera_id'], list(camera_ids))
+                if mask.any():
+                    yield {name: array[mask] for name, array in columns.items()}
+
+
+ARCHIVE_TABLES = {
+    'observations': ArchiveTable('observations', AreaObservation, ('detail',), snapshot_field='evidence_path'),
+    'incidents': ArchiveTable(
+        'incidents', SecurityIncident, ('weapon_metrics', 'crowd_metrics'), snapshot_field='snapshot_url',
+    ),
+}
+
+
+def camera_ids_for_area(area_id):
+    return set(Camera.objects.filter(area_id=area_id).values_list('pk', flat=True))
+
+
+def archived_rows(table, start, end, event_type_id=None, camera_ids=None):
+    """Yields archived rows in [start, end) as dicts keyed like hot_rows(), oldest first."""
+    columns = table.columns()
+    names = [lookup for lookup, _ in columns]
+    for chunk in table.scan(start, end, names, event_type_id, camera_ids):
+        order = np.lexsort((chunk['id'], chunk['timestamp']))
+        for index in order:
+            yield {lookup: decode_value(kind, chunk[lookup][index]) for lookup, kind in columns}
@@ -0,0 +1,115 @@
+"""
+Conditional GET (ETag / Last-Modified) support for the incident read endpoints.
+
+The version token of the incident feed is the newest incident id held by the
+recent-incident ring buffer (no query; the buffer catches up with other
+processes' inserts on its sync interval) plus an in-memory change counter that
+is bumped by the SecurityIncident post_save/post_delete receivers in
+signals.py. A matching If-None-Match / If-Modified-Since is answered with 304
+before the view builds its full response.
+
+The change counter only sees resolves, updates and deletes handled by this
+process, so with several worker processes another worker's change would keep
+being answered with a stale 304. Such deployments must set
+SURVEILLANCE_CONDITIONAL_GET = False, which drops the validators (no ETag or
+Last-Modified, every request gets a full 200).
+"""
+
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .recent_buffer import recent_incidents
+
+
+class ChangeCounter:
+    """Monotonic in-memory counter recording when a resource last changed in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+        self.changed_at = timezone.now()
+
+    def bump(self):
+        with self._lock:
+            self.value += 1
+            self.changed_at = timezone.now()
+
+
+incident_changes = ChangeCounter()
+
+
+def conditional_get_enabled():
+    """Only valid while a single worker process serves (and changes) incidents."""
+    return getattr(settings, 'SURVEILLANCE_CONDITIONAL_GET', True)
+
+
+def get_alert_window():
+    """How long after an incident the system status stays at ALERT."""
+    return timedelta(seconds=getattr(settings, 'SURVEILLANCE_ALERT_WINDOW_SECONDS', 30))
+
+
+def incident_state(request):
+    """
+    (max_id, latest_timestamp, change_count, changed_at), computed once per request
+    so the ETag and Last-Modified callbacks see the same snapshot.
+    """
+    state = getattr(request, '_incident_state', None)
+    if state is None:
+        max_id, latest = recent_incidents.state()
+        state = (max_id, latest, incident_changes.value, incident_changes.changed_at)
+        request._incident_state = state
+    return state
+
+
+# --- Incident Feeds (logs, recent incidents) ---
+
+def incident_etag(request, *args, **kwargs):
+    if not conditional_get_enabled():
+        return None
+    max_id, _, change_count, _ = incident_state(request)
+    return f"incidents-{max_id}-{change_count}"
+
+
+def incident_last_modified(request, *args, **kwargs):
+    if not conditional_get_enabled():
+        return None
+    _, latest, _, changed_at = incident_state(request)
+    return max(latest, changed_at) if latest else changed_at
+
+
+incident_conditional = condition(etag_func=incident_etag, last_modified_func=incident_last_modified)
+
+
+# --- System Status ---
+# The status also changes when the ALERT window of the latest incident runs out,
+# with no new data, so the token includes whether that window is still open.
+
+def _alert_expires_at(latest):
+    return latest + get_alert_window() if latest else None
+
+
+def status_etag(request, *args, **kwargs):
+    if not conditional_get_enabled():
+        return None
+    _, latest, _, _ = incident_state(request)
+    expires_at = _alert_expires_at(latest)
+    alert = 'alert' if expires_at and timezone.now() < expires_at else 'calm'
+    return f"{incident_etag(request)}-{alert}"
+
+
+def status_last_modified(request, *args, **kwargs):
+    if not conditional_get_enabled():
+        return None
+    last_modified = incident_last_modified(request)
+    _, latest, _, _ = incident_state(request)
+    expires_at = _alert_expires_at(latest)
+    if expires_at and expires_at <= timezone.now():
+        last_modified = max(last_modified, expires_at)
+    return last_modified
+
+
+status_conditional = condition(etag_func=status_etag, last_modified_func=status_last_modified)
@@ -0,0 +1,213 @@
+"""
+WebSocket push channel for the live dashboard.
+
+A client connecting to ws/dashboard/ first receives one 'snapshot' message
+holding the current status banner and the newest log rows, then only deltas:
+
+    {"type": "status", "status": {...}}   the banner changed (build_status() shape)
+    {"type": "log", "row": {...}}         one new log row (serialize_log_row() shape)
+    {"type": "snapshot", ...}             sent again when the client fell too far behind
+
+Clients can narrow the feed to cameras, areas, event types or a minimum
+incident_level, either in the URL (ws/dashboard/?camera=CAM003&min_level=HIGH)
+or later with a message:
+
+    {"action": "subscribe", "cameras": ["CAM003"], "areas": ["Parking Lot"],
+     "event_types": ["WEAPON"], "min_level": "HIGH"}
+
+which is answered with a new snapshot for the subscription (or an 'error'
+message). The banner and log rows then only cover the subscribed incidents.
+
+New incidents are broadcast by broadcast_incident_alert() once their
+transaction has committed (signals.py) to their topic groups (topics.py) and
+reach each subscribed connection through its bounded queue in fanout.py. The ALERT -> OK transition needs no incident, so
+every connection re-checks the banner when its alert window ends. An idle
+dashboard therefore costs no requests and no messages.
+"""
+
+import asyncio
+from datetime import datetime
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+from django.http import QueryDict
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .conditional import get_alert_window
+from .fanout import dashboard_hub
+from .incident_feed import build_status, incident_feed_queryset, serialize_log_row
+from .recent_buffer import recent_incidents
+from .topics import EVERYTHING, incident_topics, parse_topic_filter, topic_filter_from_query
+
+
+# Log rows sent in the snapshot (and returned by /api/logs/)
+DASHBOARD_LOG_ROWS = 50
+
+
+# --- Payloads ---
+
+def latest_incident(topic_filter=EVERYTHING):
+    """Newest incident feed row under 'topic_filter', or None."""
+    rows, complete = recent_incidents.window()
+    for row in rows:
+        if topic_filter.matches(row):
+            return row
+    if complete:
+        return None
+    return topic_filter.filter_queryset(incident_feed_queryset()).first()
+
+
+def current_status(topic_filter=EVERYTHING):
+    """The dashboard status banner as of now."""
+    return build_status(latest_incident(topic_filter), timezone.now(), get_alert_window())
+
+
+def recent_log_rows(limit=DASHBOARD_LOG_ROWS, topic_filter=EVERYTHING):
+    """The newest 'limit' incidents in the dashboard's log table format."""
+    rows, complete = recent_incidents.window()
+    rows = [row for row in rows if topic_filter.matches(row)]
+    if len(rows) < limit and not complete:
+        rows = topic_filter.filter_queryset(incident_feed_queryset())
+    return [serialize_log_row(row) for row in rows[:limit]]
+
+
+def dashboard_snapshot(topic_filter=EVERYTHING):
+    return {
+        'status': current_status(topic_filter),
+        'logs': recent_log_rows(topic_filter=topic_filter),
+        'subscription': topic_filter.description,
+    }
+
+
+def supersedes(status, shown):
+    """Whether an incident's banner replaces the one a client shows (a late, older incident doesn't)."""
+    if shown is None or 'incident' not in shown:
+        return True
+    return (
+        datetime.fromisoformat(status['incident']['timestamp'])
+        >= datetime.fromisoformat(shown['incident']['timestamp'])
+    )
+
+
+def alert_expires_in(status):
+    """Seconds until an ALERT banner falls back to OK, or None for any other banner."""
+    if status.get('status_level') != 'ALERT':
+        return None
+    raised_at = datetime.fromisoformat(status['incident']['timestamp'])
+    remaining = raised_at + get_alert_window() - timezone.now()
+    return max(remaining.total_seconds(), 0)
+
+
+# --- Broadcasting ---
+
+def broadcast_incident_alert(incident_id):
+    """
+    Pushes a committed incident to the dashboards subscribed to it: its log row
+    and the status banner it raises, serialized once and sent to each of its
+    topic groups. Call after the transaction has committed.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    row = incident_feed_queryset().filter(pk=incident_id).first()
+    if row is None:
+        return
+    message = {
+        'type': 'dashboard.incident',
+        'row': serialize_log_row(row),
+        'status': build_status(row, timezone.now(), get_alert_window()),
+    }
+    send = async_to_sync(channel_layer.group_send)
+    for topic in incident_topics(row):
+        send(topic, {**message, 'topic': topic})
+
+
+# --- Consumer ---
+
+class DashboardConsumer(AsyncJsonWebsocketConsumer):
+    """Sends a snapshot on connect, then status and log deltas as they happen."""
+
+    async def connect(self):
+        self.status = None
+        self.expiry = None
+        self.subscription = None
+        await self.accept()
+        try:
+            query = QueryDict(self.scope.get('query_string', b'').decode())
+            self.topic_filter = await database_sync_to_async(topic_filter_from_query)(query)
+        except ValidationError as exc:
+            await self.send_json({'type': 'error', 'errors': exc.detail})
+            await self.close(code=4400)
+            return
+
+        client = self.scope.get('client')
+        self.subscription = await dashboard_hub.subscribe(
+            'websocket', ':'.join(map(str, client)) if client else None, self.topic_filter.topics(),
+        )
+        await self._send_snapshot()
+        self.sender = asyncio.ensure_future(self._deliver())
+
+    async def disconnect(self, code):
+        for task in (getattr(self, 'sender', None), getattr(self, 'expiry', None)):
+            if task is not None:
+                task.cancel()
+        if getattr(self, 'subscription', None) is not None:
+            await dashboard_hub.unsubscribe(self.subscription)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict) or content.get('action') != 'subscribe':
+            await self.send_json({'type': 'error', 'errors': {'action': "Expected 'subscribe'."}})
+            return
+        try:
+            topic_filter = await database_sync_to_async(parse_topic_filter)(
+                content.get('cameras'), content.get('areas'), content.get('event_types'), content.get('min_level'),
+            )
+        except ValidationError as exc:
+            await self.send_json({'type': 'error', 'errors': exc.detail})
+            return
+
+        self.topic_filter = topic_filter
+        await dashboard_hub.resubscribe(self.subscription, topic_filter.topics())
+        self.status = None
+        await self._send_snapshot()
+
+    async def _deliver(self):
+        """Drains this connection's queue; a slow socket only delays itself."""
+        while True:
+            message = await self.subscription.get()
+            if message['type'] == 'dashboard.log':
+                await self.send_json({'type': 'log', 'row': message['row']})
+            elif message['type'] == 'dashboard.status' and supersedes(message['status'], self.status):
+                await self._send_status(message['status'])
+            elif message['type'] == 'dashboard.resync':
+                await self._send_snapshot()
+
+    async def _send_snapshot(self):
+        snapshot = await database_sync_to_async(dashboard_snapshot)(self.topic_filter)
+        await self.send_json({'type': 'snapshot', **snapshot})
+        self._track_status(snapshot['status'])
+
+    # --- Status banner ---
+
+    async def _send_status(self, status):
+        if status == self.status:
+            return
+        await self.send_json({'type': 'status', 'status': status})
+        self._track_status(status)
+
+    def _track_status(self, status):
+        self.status = status
+        if self.expiry is not None:
+            self.expiry.cancel()
+            self.expiry = None
+        delay = alert_expires_in(status)
+        if delay is not None:
+            self.expiry = asyncio.ensure_future(self._expire_alert(delay))
+
+    async def _expire_alert(self, delay):
+        await asyncio.sleep(delay)
+        self.expiry = None
+        await self._send_status(await database_sync_to_async(current_status)(self.topic_filter))
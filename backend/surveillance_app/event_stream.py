@@ -0,0 +1,136 @@
+"""
+Server-Sent Events stream of status transitions and new incidents, for
+clients that can't speak WebSockets (kiosks, curl scripts):
+
+    id: 1234
+    event: incident
+    data: {...serialize_log_row() shape...}
+
+    event: status
+    data: {...build_status() shape...}
+
+    : keepalive
+
+Incident events carry the incident id as their event id. A client that
+reconnects with Last-Event-ID (or ?last_event_id=) first receives the
+incidents it missed, oldest first, then the current status. The same
+camera / area / event_type / min_level query parameters as the dashboard
+WebSocket narrow the stream (topics.py). The stream is
+fed through the same fan-out as the dashboard WebSocket (fanout.py), so it
+needs no polling either; a client that falls too far behind is caught up
+from its last sent id like a reconnect, and a comment line is written
+every SURVEILLANCE_SSE_KEEPALIVE_SECONDS to keep idle proxies from closing it.
+"""
+
+import asyncio
+import json
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+
+from .consumers import alert_expires_in, current_status, supersedes
+from .fanout import dashboard_hub
+from .incident_feed import incident_feed_queryset, serialize_log_row
+from .topics import EVERYTHING
+
+
+# Incidents replayed at most on resume; older gaps are only covered by the log API
+SSE_RESUME_ROWS = 500
+
+# Client reconnect delay announced with 'retry:' (milliseconds)
+SSE_RETRY_MS = 3000
+
+
+def get_keepalive_interval():
+    return getattr(settings, 'SURVEILLANCE_SSE_KEEPALIVE_SECONDS', 15)
+
+
+def parse_last_event_id(value):
+    """Incident id to resume after, or None for a fresh stream."""
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def missed_incidents(last_event_id, topic_filter=EVERYTHING):
+    """Log rows of subscribed incidents with an id above 'last_event_id', oldest first."""
+    rows = topic_filter.filter_queryset(incident_feed_queryset()).filter(id__gt=last_event_id)
+    return [serialize_log_row(row) for row in rows.order_by('id')[:SSE_RESUME_ROWS]]
+
+
+def _resume(last_event_id, topic_filter):
+    backlog = missed_incidents(last_event_id, topic_filter) if last_event_id is not None else []
+    return backlog, current_status(topic_filter)
+
+
+async def sse_events(last_event_id=None, peer=None, topic_filter=EVERYTHING):
+    """Async generator of encoded SSE chunks; runs until the client disconnects."""
+    # Subscribe before reading the backlog, so nothing committed in between is lost
+    subscription = await dashboard_hub.subscribe('sse', peer, topic_filter.topics())
+    try:
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+
+        backlog, status = await database_sync_to_async(_resume)(last_event_id, topic_filter)
+        sent_id = last_event_id or 0
+        # Backlog incidents may also arrive live; live rows come in commit order, not id order
+        replayed = set()
+        for row in backlog:
+            yield format_event('incident', row, row['id'])
+            sent_id = row['id']
+            replayed.add(row['id'])
+        yield format_event('status', status)
+
+        loop = asyncio.get_running_loop()
+        keepalive = get_keepalive_interval()
+
+        def alert_deadline(status):
+            expires_in = alert_expires_in(status)
+            return None if expires_in is None else loop.time() + expires_in
+
+        expires_at = alert_deadline(status)
+        while True:
+            timeout = keepalive if expires_at is None else min(keepalive, max(expires_at - loop.time(), 0))
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout)
+            except asyncio.TimeoutError:
+                if expires_at is None or loop.time() < expires_at:
+                    yield ': keepalive\n\n'
+                    continue
+                # The alert window has passed: report the banner going back to OK
+                expires_at = None
+                latest = await database_sync_to_async(current_status)(topic_filter)
+                message = {'type': 'dashboard.status', 'status': latest}
+
+            if message['type'] == 'dashboard.log':
+                row = message['row']
+                if row['id'] in replayed:
+                    replayed.discard(row['id'])
+                else:
+                    yield format_event('incident', row, row['id'])
+                    sent_id = max(sent_id, row['id'])
+            elif message['type'] == 'dashboard.resync':
+                backlog, latest = await database_sync_to_async(_resume)(sent_id, topic_filter)
+                for row in backlog:
+                    yield format_event('incident', row, row['id'])
+                    sent_id = row['id']
+                    replayed.add(row['id'])
+                message = {'type': 'dashboard.status', 'status': latest}
+
+            if message['type'] != 'dashboard.status' or message['status'] == status:
+                continue
+            if supersedes(message['status'], status):
+                status = message['status']
+                yield format_event('status', status)
+                expires_at = alert_deadline(status)
+    finally:
+        await dashboard_hub.unsubscribe(subscription)
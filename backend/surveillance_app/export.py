@@ -0,0 +1,136 @@
+"""
+Streaming CSV / NDJSON export of incidents and observations.
+
+Rows are produced oldest first: archived months are read one file at a time,
+then hot rows come from the database through QuerySet.iterator(), which uses
+a server-side cursor on PostgreSQL. Output is yielded in chunks of
+EXPORT_CHUNK_ROWS rows, so memory stays flat for any range and the header
+goes out before the query has finished.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .archive import archived_rows
+from .filters import archive_filters, filter_events
+from .lookups import lookup_cache
+
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Rows fetched per database round trip and written per yielded chunk
+EXPORT_CHUNK_ROWS = 500
+
+# Raw columns replaced by the readable event_type / camera / area columns
+_REPLACED_COLUMNS = {'id', 'timestamp', 'event_type_id', 'camera_id'}
+
+
+def export_columns(table):
+    """[(values() lookup, kind)] exported as-is: everything except the keys and detail row ids."""
+    return [
+        (lookup, kind) for lookup, kind in table.columns()
+        if lookup not in _REPLACED_COLUMNS and not lookup.endswith('__id')
+    ]
+
+
+def export_header(table):
+    return ['id', 'timestamp', 'event_type', 'camera', 'area'] + [lookup for lookup, _ in export_columns(table)]
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    return value
+
+
+def export_record(row, columns):
+    """Readable dict for one hot or archived row."""
+    event_type = lookup_cache.get_event_type_by_pk(row['event_type_id'])
+    camera = lookup_cache.get_camera_by_pk(row['camera_id'])
+    record = {
+        'id': row['id'],
+        'timestamp': _plain(row['timestamp']),
+        'event_type': event_type.code if event_type else None,
+        'camera': camera.camera_id if camera else None,
+        'area': camera.area.name if camera and camera.area else None,
+    }
+    for lookup, _ in columns:
+        record[lookup] = _plain(row[lookup])
+    return record
+
+
+def iter_export_rows(table, query):
+    """Rows of 'table' in [start, end) matching the filters, oldest first, cold months before hot rows."""
+    lookups = [lookup for lookup, _ in table.columns()]
+    cold, hot = table.split_range(query['start'], query['end'])
+    if cold:
+        yield from archived_rows(table, cold[0], cold[1], *archive_filters({**query, 'start': cold[0], 'end': cold[1]}))
+    if hot:
+        queryset = (
+            filter_events(table.model, {**query, 'start': hot[0], 'end': hot[1]})
+            .order_by('timestamp', 'id')
+            .values(*lookups)
+        )
+        yield from queryset.iterator(chunk_size=EXPORT_CHUNK_ROWS)
+
+
+def _csv_cell(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return '' if value is None else value
+
+
+def export_chunks(table, query, output):
+    """Yields the encoded export in chunks of EXPORT_CHUNK_ROWS rows, header first."""
+    columns = export_columns(table)
+    header = export_header(table)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if output == 'csv':
+        writer.writerow(header)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    pending = 0
+    for row in iter_export_rows(table, query):
+        record = export_record(row, columns)
+        if output == 'csv':
+            writer.writerow([_csv_cell(record[name]) for name in header])
+        else:
+            buffer.write(json.dumps(record))
+            buffer.write('\n')
+        pending += 1
+        if pending == EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+async def iterate_async(chunks):
+    """
+    Async wrapper for a sync chunk iterator. Under ASGI Django would otherwise
+    read a sync StreamingHttpResponse to the end before sending anything.
+    Each step runs on the thread that owns the database connection, so the
+    server-side cursor stays usable.
+    """
+    done = object()
+    chunks = iter(chunks)
+    step = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await step(chunks, done)
+        if chunk is done:
+            break
+        yield chunk
@@ -0,0 +1,226 @@
+"""
+Per-process fan-out of live dashboard messages with bounded client queues.
+
+Each process has one channel (one pump task) that joins every topic group
+(topics.py) at least one of its clients subscribed to, and copies each
+incident into the queues of that topic's subscribers only. A client's queue
+never grows past SURVEILLANCE_LIVE_QUEUE_SIZE:
+
+  * status messages are coalesced: a newer status replaces the queued one,
+  * when the queue is full, the queued log rows are dropped and replaced by
+    one 'dashboard.resync' marker; the client is then sent a fresh snapshot
+    (or, for SSE, the missed incidents) read from the recent incident buffer.
+
+So a stalled browser tab costs a bounded amount of memory, and the pump never
+waits for a slow client. Every subscription keeps counters and queue lag,
+served by the live metrics API.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .topics import ALL_TOPIC
+
+# Message types of which only the newest one is worth delivering
+COALESCED_TYPES = {'dashboard.status', 'dashboard.resync'}
+RESYNC = {'type': 'dashboard.resync'}
+
+
+def get_queue_size():
+    return getattr(settings, 'SURVEILLANCE_LIVE_QUEUE_SIZE', 100)
+
+
+class Subscription:
+    """One client's bounded message queue plus its delivery counters."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, peer, maxsize):
+        self.id = next(self._ids)
+        self.kind = kind
+        self.peer = peer
+        self.maxsize = maxsize
+        self.loop = asyncio.get_running_loop()
+        self.connected_at = time.monotonic()
+        self.topics = []
+        self._queue = deque()  # (enqueued_at, message), oldest first
+        self._ready = asyncio.Event()
+        self._resync_pending = False
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.resyncs = 0
+        self.max_queued = 0
+        self.max_lag = 0.0
+
+    def offer(self, message):
+        """Queues one message without ever blocking the publisher."""
+        coalesced = message['type'] in COALESCED_TYPES
+        if not coalesced and self._resync_pending:
+            self.dropped += 1  # The pending resync will include this row
+            return
+        if coalesced:
+            for position, (_, queued) in enumerate(self._queue):
+                if queued['type'] == message['type']:
+                    del self._queue[position]
+                    self.coalesced += 1
+                    break
+
+        if len(self._queue) >= self.maxsize:
+            # Too far behind: drop the queued rows and have the client catch up in one go
+            kept = deque(entry for entry in self._queue if entry[1]['type'] in COALESCED_TYPES)
+            self.dropped += len(self._queue) - len(kept)
+            self._queue = kept
+            if not self._resync_pending:
+                self._queue.appendleft((time.monotonic(), RESYNC))
+                self._resync_pending = True
+                self.resyncs += 1
+            if not coalesced:
+                self.dropped += 1
+                self._ready.set()
+                return
+
+        self._queue.append((time.monotonic(), message))
+        self.max_queued = max(self.max_queued, len(self._queue))
+        self._ready.set()
+
+    def clear(self):
+        """Forgets the queued messages (after a subscription change the client gets a new snapshot)."""
+        self._queue.clear()
+        self._resync_pending = False
+
+    async def get(self):
+        """Next message, oldest first; waits while the queue is empty."""
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        enqueued_at, message = self._queue.popleft()
+        if message is RESYNC:
+            self._resync_pending = False
+        self.max_lag = max(self.max_lag, time.monotonic() - enqueued_at)
+        self.delivered += 1
+        return message
+
+    def metrics(self):
+        now = time.monotonic()
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'peer': self.peer,
+            'topics': len(self.topics),
+            'connected_seconds': round(now - self.connected_at, 3),
+            'queued': len(self._queue),
+            'max_queued': self.max_queued,
+            'lag_seconds': round(now - self._queue[0][0], 3) if self._queue else 0.0,
+            'max_lag_seconds': round(self.max_lag, 3),
+            'delivered': self.delivered,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'resyncs': self.resyncs,
+        }
+
+
+class FanoutHub:
+    """Relays the topic groups this process's subscriptions need to their queues."""
+
+    def __init__(self):
+        self.subscriptions = set()
+        self.members = {}  # topic -> subscriptions
+        self.received = 0
+        self._groups = {}  # topic -> group_add task of this process's channel
+        self._pump = None
+        self._channel = None
+
+    async def subscribe(self, kind, peer=None, topics=(ALL_TOPIC,)):
+        """
+        Registers a client for 'topics'. Returns once this process is a member
+        of every topic group, so anything committed after the call is delivered.
+        """
+        subscription = Subscription(kind, peer, get_queue_size())
+        await self._join(subscription, topics)
+        return subscription
+
+    async def resubscribe(self, subscription, topics):
+        """Moves a subscription to other topics, dropping what was queued for the old ones."""
+        await self._leave(subscription)
+        subscription.clear()
+        await self._join(subscription, topics)
+
+    async def unsubscribe(self, subscription):
+        await self._leave(subscription)
+        if not self.subscriptions and self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+
+    def publish(self, message):
+        """Queues one broadcast incident ('dashboard.incident') for the subscribers of its topic."""
+        self.received += 1
+        log = {'type': 'dashboard.log', 'row': message['row']}
+        status = {'type': 'dashboard.status', 'status': message['status']}
+        for subscription in list(self.members.get(message['topic'], ())):
+            subscription.offer(log)
+            subscription.offer(status)
+
+    # --- Group membership ---
+
+    async def _channel_name(self):
+        loop = asyncio.get_running_loop()
+        if self._pump is None or self._pump.done() or self._pump.get_loop() is not loop:
+            # Subscriptions left behind by a closed event loop can't be served any more
+            survivors = [s for s in self.subscriptions if s.loop is loop]
+            self.subscriptions, self.members, self._groups = set(), {}, {}
+            self._channel = loop.create_future()
+            self._pump = loop.create_task(self._run(self._channel))
+            for subscription in survivors:
+                await self._join(subscription, subscription.topics)
+        return await asyncio.shield(self._channel)
+
+    async def _join(self, subscription, topics):
+        channel = await self._channel_name()
+        subscription.topics = list(topics)
+        self.subscriptions.add(subscription)
+        for topic in subscription.topics:
+            self.members.setdefault(topic, set()).add(subscription)
+            if topic not in self._groups:
+                self._groups[topic] = asyncio.ensure_future(get_channel_layer().group_add(topic, channel))
+            await asyncio.shield(self._groups[topic])
+
+    async def _leave(self, subscription):
+        self.subscriptions.discard(subscription)
+        for topic in subscription.topics:
+            members = self.members.get(topic, set())
+            members.discard(subscription)
+            if not members and topic in self._groups:
+                del self.members[topic]
+                del self._groups[topic]
+                await get_channel_layer().group_discard(topic, await self._channel_name())
+        subscription.topics = []
+
+    async def _run(self, channel_future):
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        channel_future.set_result(channel)
+        try:
+            while True:
+                self.publish(await channel_layer.receive(channel))
+        finally:
+            for topic in list(self._groups):
+                await channel_layer.group_discard(topic, channel)
+
+    def metrics(self):
+        subscriptions = sorted(self.subscriptions, key=lambda s: s.id)
+        return {
+            'queue_size': get_queue_size(),
+            'received': self.received,
+            'connections': len(subscriptions),
+            'topics': {topic: len(members) for topic, members in sorted(self.members.items())},
+            'subscriptions': [s.metrics() for s in subscriptions],
+        }
+
+
+dashboard_hub = FanoutHub()
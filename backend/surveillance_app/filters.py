@@ -0,0 +1,87 @@
+"""
+Query-parameter parsing and filtering shared by the analytics and export endpoints.
+
+Both accept a time range (start/end, ISO 8601 dates or datetimes) and optional
+event_type (code), camera (camera_id) and area (id or name) filters, and apply
+them to hot querysets and to archived months alike.
+"""
+
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .archive import camera_ids_for_area
+from .lookups import lookup_cache
+from .models import SurveillanceArea
+
+
+def parse_moment(name, value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_time_range(params, default_span):
+    """(start, end); end defaults to now and start to end - default_span."""
+    end = parse_moment('end', params['end']) if params.get('end') else timezone.now()
+    start = parse_moment('start', params['start']) if params.get('start') else end - default_span
+    if start >= end:
+        raise ValidationError({'start': 'start must be before end.'})
+    return start, end
+
+
+def parse_event_filters(params):
+    """{'event_type': code, 'camera': camera_id, 'area': area pk}; absent filters are None."""
+    event_type = params.get('event_type') or None
+    if event_type:
+        event_type = event_type.upper()
+        if lookup_cache.get_event_type(event_type) is None:
+            raise ValidationError({'event_type': f"Unknown event type '{event_type}'."})
+
+    camera = params.get('camera') or None
+    if camera and lookup_cache.get_camera(camera) is None:
+        raise ValidationError({'camera': f"Unknown camera '{camera}'."})
+
+    area = params.get('area') or None
+    if area:
+        area_obj = (
+            lookup_cache.get_area(int(area)) if area.isdigit()
+            else SurveillanceArea.objects.filter(name=area).first()
+        )
+        if area_obj is None:
+            raise ValidationError({'area': f"Unknown area '{area}'."})
+        area = area_obj.pk
+
+    return {'event_type': event_type, 'camera': camera, 'area': area}
+
+
+def filter_events(model, query):
+    """Rows of an event model in [query['start'], query['end']) matching the event filters."""
+    queryset = model.objects.filter(timestamp__gte=query['start'], timestamp__lt=query['end'])
+    if query['event_type']:
+        queryset = queryset.filter(event_type_id=lookup_cache.get_event_type(query['event_type']).pk)
+    if query['camera']:
+        queryset = queryset.filter(camera_id=lookup_cache.get_camera(query['camera']).pk)
+    if query['area']:
+        queryset = queryset.filter(camera__area_id=query['area'])
+    return queryset
+
+
+def archive_filters(query):
+    """The event filters as (event_type_id, camera_ids) arguments for ArchiveTable.scan()."""
+    event_type_id = lookup_cache.get_event_type(query['event_type']).pk if query['event_type'] else None
+    camera_ids = None
+    if query['camera']:
+        camera_ids = {lookup_cache.get_camera(query['camera']).pk}
+    if query['area']:
+        area_cameras = camera_ids_for_area(query['area'])
+        camera_ids = camera_ids & area_cameras if camera_ids is not None else area_cameras
+    return event_type_id, camera_ids
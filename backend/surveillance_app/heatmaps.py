@@ -0,0 +1,153 @@
+"""
+Per-camera detection heatmaps, one DailyHeatmap row per camera x event type x day.
+
+Every DetectionBox written at ingest (spatial.py) is also added to its day's
+grid: its center cell is incremented in channel 0 and every cell the box
+covers in channel 1. Replacing a box subtracts the old one first. The heatmap
+API then sums a handful of small stored grids instead of rescanning events.
+
+Boxes are in frame pixels, mapped onto the grid with the camera's frame size
+from SURVEILLANCE_HEATMAP. Boxes whose coordinates are all <= 1 are taken as
+already normalized. Rows stored with a different grid size (after a settings
+change) are ignored until 'rebuild_heatmaps' recomputes them.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .lookups import lookup_cache
+from .models import DailyHeatmap, DetectionBox
+
+
+CENTERS, COVERAGE = 0, 1
+CHANNELS = {'centers': CENTERS, 'coverage': COVERAGE}
+
+
+def get_heatmap_settings():
+    return getattr(settings, 'SURVEILLANCE_HEATMAP', {})
+
+
+def get_grid_size():
+    """(cols, rows) of every heatmap grid."""
+    return tuple(get_heatmap_settings().get('GRID', (64, 36)))
+
+
+def get_frame_size(camera_pk):
+    """(width, height) in pixels of a camera's frames."""
+    heatmap_settings = get_heatmap_settings()
+    camera = lookup_cache.get_camera_by_pk(camera_pk)
+    per_camera = heatmap_settings.get('CAMERA_FRAME_SIZES', {})
+    if camera is not None and camera.camera_id in per_camera:
+        return tuple(per_camera[camera.camera_id])
+    return tuple(heatmap_settings.get('FRAME_SIZE', (1280, 720)))
+
+
+def empty_grid():
+    cols, rows = get_grid_size()
+    return np.zeros((len(CHANNELS), rows, cols), dtype=np.float32)
+
+
+def load_grid(heatmap):
+    return np.frombuffer(bytes(heatmap.grid), dtype=np.float32).reshape(len(CHANNELS), heatmap.rows, heatmap.cols).copy()
+
+
+# --- Accumulation ---
+
+def paint_box(grid, box, frame_size):
+    """Adds one (x1, y1, x2, y2, weight) box to 'grid' in place; a negative weight removes it."""
+    _, rows, cols = grid.shape
+    x1, y1, x2, y2, weight = box
+    if max(x1, y1, x2, y2) > 1:
+        width, height = frame_size
+        x1, x2 = x1 / width, x2 / width
+        y1, y2 = y1 / height, y2 / height
+
+    def cell(value, cells):
+        return min(max(int(value * cells), 0), cells - 1)
+
+    grid[CENTERS, cell((y1 + y2) / 2, rows), cell((x1 + x2) / 2, cols)] += weight
+    grid[COVERAGE, cell(y1, rows):cell(y2, rows) + 1, cell(x1, cols):cell(x2, cols) + 1] += weight
+
+
+def _grouped(boxes, weight):
+    groups = defaultdict(list)
+    for box in boxes:
+        if box.camera_id is None:
+            continue
+        key = (timezone.localdate(box.timestamp), box.camera_id, box.event_type_id)
+        groups[key].append((box.x1, box.y1, box.x2, box.y2, weight))
+    return groups
+
+
+def add_boxes(boxes, weight=1):
+    """
+    Adds DetectionBox instances (saved or not) to their daily heatmaps, one
+    locked read-modify-write per (day, camera, event type). Pass weight=-1 to
+    remove boxes that are being replaced.
+    """
+    cols, rows = get_grid_size()
+    for (day, camera_id, event_type_id), painted in _grouped(boxes, weight).items():
+        with transaction.atomic():
+            heatmap, created = DailyHeatmap.objects.select_for_update().get_or_create(
+                day=day, camera_id=camera_id, event_type_id=event_type_id,
+                defaults={'rows': rows, 'cols': cols, 'grid': empty_grid().tobytes()},
+            )
+            if (heatmap.rows, heatmap.cols) != (rows, cols):
+                continue  # Stale grid size; fixed by rebuild_heatmaps
+            grid = load_grid(heatmap)
+            frame_size = get_frame_size(camera_id)
+            for box in painted:
+                paint_box(grid, box, frame_size)
+            heatmap.grid = np.maximum(grid, 0).tobytes()
+            heatmap.detections = max(heatmap.detections + weight * len(painted), 0)
+            heatmap.save(update_fields=['grid', 'detections'])
+
+
+def rebuild_heatmaps(start_day, end_day):
+    """Recomputes the heatmaps for [start_day, end_day] from DetectionBox. Returns rows written."""
+    start = timezone.make_aware(datetime.combine(start_day, time.min))
+    end = timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min))
+    boxes = DetectionBox.objects.filter(timestamp__gte=start, timestamp__lt=end).only(
+        'camera_id', 'event_type_id', 'timestamp', 'x1', 'y1', 'x2', 'y2',
+    )
+
+    cols, rows = get_grid_size()
+    heatmaps = []
+    for (day, camera_id, event_type_id), painted in _grouped(boxes.iterator(chunk_size=2000), 1).items():
+        grid = empty_grid()
+        frame_size = get_frame_size(camera_id)
+        for box in painted:
+            paint_box(grid, box, frame_size)
+        heatmaps.append(DailyHeatmap(
+            day=day, camera_id=camera_id, event_type_id=event_type_id,
+            rows=rows, cols=cols, detections=len(painted), grid=grid.tobytes(),
+        ))
+
+    with transaction.atomic():
+        DailyHeatmap.objects.filter(day__gte=start_day, day__lte=end_day).delete()
+        DailyHeatmap.objects.bulk_create(heatmaps, batch_size=500)
+    return len(heatmaps)
+
+
+# --- Reads ---
+
+def merged_heatmap(camera_pk, start_day, end_day, event_type_id=None):
+    """(grid of shape (2, rows, cols), detections) summed over the days and event types requested."""
+    cols, rows = get_grid_size()
+    heatmaps = DailyHeatmap.objects.filter(
+        camera_id=camera_pk, day__gte=start_day, day__lte=end_day, rows=rows, cols=cols,
+    )
+    if event_type_id is not None:
+        heatmaps = heatmaps.filter(event_type_id=event_type_id)
+
+    grid = empty_grid()
+    detections = 0
+    for heatmap in heatmaps.only('rows', 'cols', 'grid', 'detections'):
+        grid += load_grid(heatmap)
+        detections += heatmap.detections
+    return grid, detections
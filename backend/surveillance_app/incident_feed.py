@@ -0,0 +1,117 @@
+"""
+Shared read path for the frontend incident feed.
+
+Incidents are fetched as a narrow values() projection with the metrics and
+observation relations LEFT JOINed into the same query, so a page of incidents
+costs exactly one query regardless of its size. Event type codes and camera
+identifiers are resolved through the process-local lookup cache.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+
+from backend.security_app.models import SecurityIncident
+from .lookups import lookup_cache
+
+
+# Default confidence reported for crowd detections (they carry no detector score)
+CROWD_CONFIDENCE = 0.8
+
+
+def _has_relation(model, name):
+    try:
+        model._meta.get_field(name)
+        return True
+    except FieldDoesNotExist:
+        return False
+
+
+def _feed_fields():
+    fields = [
+        'id', 'event_type_id', 'camera_id', 'timestamp', 'incident_level', 'snapshot_url',
+        'weapon_metrics__pk', 'weapon_metrics__confidence', 'crowd_metrics__pk',
+    ]
+    # UOD/INTRUSION incidents may be linked to an AreaObservation; only join it when the relation exists
+    if _has_relation(SecurityIncident, 'areaobservation'):
+        fields += [
+            'areaobservation__pk', 'areaobservation__evidence_path',
+            'areaobservation__detail__object_confidence',
+        ]
+    return fields
+
+
+INCIDENT_FEED_FIELDS = _feed_fields()
+
+
+def incident_feed_queryset():
+    """Newest-first incident rows as dicts holding only the columns the feed renders."""
+    return SecurityIncident.objects.order_by('-timestamp', '-id').values(*INCIDENT_FEED_FIELDS)
+
+
+def serialize_incident_row(row):
+    """Turns one incident_feed_queryset() row into the frontend incident dict."""
+    confidence_score = None
+    snapshot_url = row['snapshot_url']
+
+    # For WEAPON and CROWD incidents, get confidence from metrics
+    if row['weapon_metrics__pk'] is not None:
+        confidence_score = row['weapon_metrics__confidence']
+    elif row['crowd_metrics__pk'] is not None:
+        confidence_score = CROWD_CONFIDENCE
+    # For UOD and INTRUSION, get from AreaObservation
+    elif row.get('areaobservation__pk') is not None:
+        confidence_score = row['areaobservation__detail__object_confidence']
+        if not snapshot_url:
+            snapshot_url = row['areaobservation__evidence_path']
+
+    event_type = lookup_cache.get_event_type_by_pk(row['event_type_id'])
+    camera = lookup_cache.get_camera_by_pk(row['camera_id'])
+
+    return {
+        'id': row['id'],
+        'event_type': event_type.code,
+        'camera_id': camera.camera_id if camera else 'Unknown',
+        'timestamp': row['timestamp'].isoformat(),
+        'incident_level': row['incident_level'],
+        'confidence_score': confidence_score,
+        'snapshot_url': snapshot_url,
+    }
+
+
+def serialize_log_row(row):
+    """
+    Row shape consumed by the Streamlit dashboard's event log table
+    (dashboard/dashboard.py builds the snapshot link from 'snapshot_path').
+    """
+    event_type = lookup_cache.get_event_type_by_pk(row['event_type_id'])
+    incident = serialize_incident_row(row)
+    snapshot_url = incident['snapshot_url']
+    return {
+        'id': incident['id'],
+        'timestamp': incident['timestamp'],
+        'label': event_type.name,
+        'confidence': incident['confidence_score'],
+        'snapshot_path': snapshot_url.rsplit('/', 1)[-1] if snapshot_url else None,
+    }
+
+
+def build_status(row, now, alert_window):
+    """
+    System status banner for the dashboard: ALERT while the latest incident is
+    inside the alert window, OK once it has passed, IDLE when nothing was logged yet.
+    """
+    if row is None:
+        return {'status_level': 'IDLE', 'message': 'System idle. No incidents logged yet.'}
+
+    incident = serialize_incident_row(row)
+    event_type = lookup_cache.get_event_type_by_pk(row['event_type_id'])
+    if now - row['timestamp'] < alert_window:
+        return {
+            'status_level': 'ALERT',
+            'message': f"{event_type.name.upper()} DETECTED ON {incident['camera_id']}",
+            'incident': incident,
+        }
+    return {
+        'status_level': 'OK',
+        'message': f"All clear. Last incident: {event_type.name} at {row['timestamp']:%Y-%m-%d %H:%M:%S}.",
+        'incident': incident,
+    }
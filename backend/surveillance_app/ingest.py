@@ -0,0 +1,285 @@
+"""
+Batch ingestion for AreaObservation events (UOD and INTRUSION).
+
+The single-event endpoint runs one validate/save cycle and two INSERTs per
+detection. At fleet scale the AI workers send batches instead, which are
+validated together (cameras and event types resolved through the lookup cache)
+and written with one bulk INSERT per table inside a single transaction.
+
+Events may carry a client-supplied 'idempotency_key'. Retries are answered from
+an in-memory LRU/TTL cache when possible and otherwise from the unique
+AreaObservation.idempotency_key column, which stays the authoritative check.
+"""
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from .analytics import invalidate_on_commit
+from .caching import TTLCache
+from .lookups import lookup_cache
+from .models import AreaObservation, ObjectDetail
+from .rollups import record_events
+from .spatial import boxes_for_details, store_boxes
+
+
+# --- 1. Payload Serializers ---
+
+class ObjectDetailPayloadSerializer(serializers.Serializer):
+    """
+    Nested 'details' block sent by the AI worker. 'confidence' maps onto
+    ObjectDetail.object_confidence; 'object_class' is accepted but not stored.
+    """
+    object_class = serializers.CharField(required=False, allow_blank=True)
+    confidence = serializers.FloatField(required=False, allow_null=True, min_value=0.0, max_value=1.0)
+    bounding_box = serializers.ListField(
+        child=serializers.FloatField(), min_length=4, max_length=4, required=False, allow_null=True
+    )
+    movement_path = serializers.JSONField(required=False, allow_null=True)
+    is_human = serializers.BooleanField(required=False, default=False)
+    duration_seconds = serializers.IntegerField(required=False, default=0, min_value=0)
+
+
+class AreaObservationPayloadSerializer(serializers.Serializer):
+    """
+    Shape of one observation inside a batch. Camera and event type existence is
+    checked for the whole batch at once in validate_observation_batch().
+    """
+    event_type_code = serializers.ChoiceField(choices=['UOD', 'INTRUSION'])
+    camera_id = serializers.CharField(max_length=50)
+    evidence_path = serializers.CharField(max_length=255)
+    idempotency_key = serializers.CharField(max_length=64, required=False, allow_blank=False)
+    analyst_notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    details = ObjectDetailPayloadSerializer(required=False)
+
+
+# --- 2. Idempotency ---
+
+_idempotency_settings = getattr(settings, 'SURVEILLANCE_IDEMPOTENCY_CACHE', {})
+idempotency_cache = TTLCache(
+    max_size=_idempotency_settings.get('MAX_SIZE', 50000),
+    ttl=_idempotency_settings.get('TTL', 3600),
+)
+
+
+def observation_result(observation):
+    """Compact description of a stored observation, returned to retries and kept in the cache."""
+    return {
+        'id': observation.id,
+        'camera_id': observation.camera.camera_id,
+        'event_type_code': observation.event_type.code,
+        'timestamp': observation.timestamp.isoformat(),
+        'idempotency_key': observation.idempotency_key,
+    }
+
+
+def remember_idempotent(key, result):
+    if key:
+        idempotency_cache.set(key, result)
+
+
+def forget_pending_idempotent(key):
+    """Drops a key's 'pending' marker (its queued write was lost), keeping stored results."""
+    if key and (idempotency_cache.get(key) or {}).get('pending'):
+        idempotency_cache.delete(key)
+
+
+def find_idempotent_observation(key):
+    """
+    Returns the stored result for an idempotency key, or None if the key is new.
+    A cache hit answers without touching the database, except for a 'pending'
+    marker of a queued write: the row may have been stored since, so the
+    database is checked and the marker is only returned while it has not.
+    """
+    result = idempotency_cache.get(key)
+    if result is not None and not result.get('pending'):
+        return result
+    pending = result
+
+    observation = (
+        AreaObservation.objects.select_related('camera', 'event_type')
+        .filter(idempotency_key=key)
+        .first()
+    )
+    if observation is None:
+        return pending
+    result = observation_result(observation)
+    remember_idempotent(key, result)
+    return result
+
+
+# --- 3. Batch Validation & Write ---
+
+def get_bulk_max_items():
+    """Upper bound on the number of observations accepted in one batch request."""
+    return getattr(settings, 'SURVEILLANCE_BULK_MAX_ITEMS', 1000)
+
+
+def validate_observation_batch(items):
+    """
+    Validates a list of raw observation payloads.
+
+    Returns (valid, errors, duplicates):
+      * valid      - list of (index, validated_data, camera, event_type) tuples
+      * errors     - item index -> error dict
+      * duplicates - item index -> stored result for an already ingested idempotency key
+    """
+    valid = []
+    errors = {}
+    duplicates = {}
+
+    shaped = []
+    seen_keys = {}
+    for index, item in enumerate(items):
+        serializer = AreaObservationPayloadSerializer(data=item)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            continue
+
+        key = serializer.validated_data.get('idempotency_key')
+        if key:
+            if key in seen_keys:
+                errors[index] = {'idempotency_key': [f"Duplicate of item {seen_keys[key]} in this batch."]}
+                continue
+            seen_keys[key] = index
+            cached = idempotency_cache.get(key)
+            if cached is not None and not cached.get('pending'):
+                duplicates[index] = cached
+                continue
+        shaped.append((index, serializer.validated_data))
+
+    # Keys missing from the cache are checked against the unique column in one query
+    pending_keys = [data['idempotency_key'] for _, data in shaped if data.get('idempotency_key')]
+    if pending_keys:
+        stored = {
+            obs.idempotency_key: observation_result(obs)
+            for obs in AreaObservation.objects.select_related('camera', 'event_type')
+            .filter(idempotency_key__in=pending_keys)
+        }
+        remaining = []
+        for index, data in shaped:
+            key = data.get('idempotency_key')
+            result = stored.get(key)
+            if result is not None:
+                remember_idempotent(key, result)
+                duplicates[index] = result
+            elif key and idempotency_cache.get(key) is not None:
+                duplicates[index] = idempotency_cache.get(key)  # Still queued for the writer
+            else:
+                remaining.append((index, data))
+        shaped = remaining
+
+    # Resolve cameras and event types through the lookup cache (misses cost one query each)
+    cameras = lookup_cache.get_cameras(data['camera_id'] for _, data in shaped)
+    event_types = lookup_cache.get_event_types(data['event_type_code'] for _, data in shaped)
+
+    for index, data in shaped:
+        camera = cameras.get(data['camera_id'])
+        event_type = event_types.get(data['event_type_code'])
+        if camera is None:
+            errors[index] = {'camera_id': [f"Camera '{data['camera_id']}' does not exist."]}
+        elif event_type is None:
+            errors[index] = {'event_type_code': [f"EventType '{data['event_type_code']}' does not exist."]}
+        else:
+            valid.append((index, data, camera, event_type))
+
+    return valid, errors, duplicates
+
+
+def _bulk_insert(valid):
+    observations = [
+        AreaObservation(
+            camera=camera,
+            event_type=event_type,
+            evidence_path=data['evidence_path'],
+            analyst_notes=data.get('analyst_notes'),
+            idempotency_key=data.get('idempotency_key'),
+        )
+        for _, data, camera, event_type in valid
+    ]
+
+    with transaction.atomic():
+        # bulk_create sets primary keys on backends that support RETURNING (PostgreSQL, SQLite 3.35+)
+        AreaObservation.objects.bulk_create(observations)
+
+        details = []
+        for observation, (_, data, _, _) in zip(observations, valid):
+            detail = data.get('details')
+            if detail is None:
+                continue
+            details.append(ObjectDetail(
+                observation=observation,
+                object_confidence=detail.get('confidence'),
+                bounding_box=detail.get('bounding_box'),
+                movement_path=detail.get('movement_path'),
+                is_human=detail.get('is_human', False),
+                duration_seconds=detail.get('duration_seconds', 0),
+            ))
+        ObjectDetail.objects.bulk_create(details)
+        store_boxes(boxes_for_details(details))
+
+        events = [(obs.timestamp, obs.event_type_id, obs.camera_id) for obs in observations]
+        record_events(events)
+        invalidate_on_commit(events)
+
+    return observations
+
+
+def create_observation_batch(valid):
+    """
+    Writes validated observations and their ObjectDetail rows with one bulk
+    INSERT per table in a single transaction.
+
+    Returns (created, duplicates): 'created' is a list of (index, AreaObservation)
+    pairs in input order, 'duplicates' maps the index of items whose idempotency
+    key was stored concurrently (unique constraint hit) to the stored result.
+    """
+    duplicates = {}
+    try:
+        observations = _bulk_insert(valid)
+    except IntegrityError:
+        keys = [data['idempotency_key'] for _, data, _, _ in valid if data.get('idempotency_key')]
+        stored = {
+            obs.idempotency_key: observation_result(obs)
+            for obs in AreaObservation.objects.select_related('camera', 'event_type')
+            .filter(idempotency_key__in=keys)
+        }
+        if not stored:
+            raise
+        # Another request won the race for some keys: report those and insert the rest
+        remaining = []
+        for item in valid:
+            result = stored.get(item[1].get('idempotency_key'))
+            if result is not None:
+                duplicates[item[0]] = result
+            else:
+                remaining.append(item)
+        valid = remaining
+        observations = _bulk_insert(valid) if valid else []
+
+    for observation in observations:
+        remember_idempotent(observation.idempotency_key, observation_result(observation))
+
+    return [(index, observation) for (index, _, _, _), observation in zip(valid, observations)], duplicates
+
+
+def ingest_observation_batch(items):
+    """
+    Validates and stores a batch, returning one result dict per input item.
+    Invalid items are reported individually and never block the valid ones;
+    items whose idempotency key was already ingested are reported as 'duplicate'.
+    """
+    valid, errors, duplicates = validate_observation_batch(items)
+    created = []
+    if valid:
+        created, raced = create_observation_batch(valid)
+        duplicates.update(raced)
+
+    results = [None] * len(items)
+    for index, error in errors.items():
+        results[index] = {'index': index, 'status': 'error', 'errors': error}
+    for index, result in duplicates.items():
+        results[index] = {'index': index, 'status': 'duplicate', **result}
+    for index, observation in created:
+        results[index] = {'index': index, 'status': 'created', **observation_result(observation)}
+    return results
@@ -0,0 +1,153 @@
+"""
+Process-local lookup cache for configuration rows on the ingest hot path.
+
+Camera, SurveillanceArea and EventType almost never change, yet every ingested
+event resolves a camera_id and an event_type_code. Instances are cached here by
+primary key and by natural key (Camera.camera_id, EventType.code). Cameras are
+loaded with their area so Camera.__str__ does not issue another query.
+
+Entries are dropped by the post_save/post_delete receivers in signals.py. The
+TTL only bounds staleness for changes made by *other* processes.
+
+Cached instances are shared between requests and must be treated as read-only.
+"""
+
+from django.conf import settings
+
+from .caching import TTLCache
+from .models import Camera, EventType, SurveillanceArea
+
+
+class LookupCache:
+    """Caches Camera, SurveillanceArea and EventType rows with hit/miss counters per model."""
+
+    def __init__(self, max_size=None, ttl=None):
+        max_size = max_size or getattr(settings, 'SURVEILLANCE_LOOKUP_CACHE_SIZE', 4096)
+        ttl = ttl or getattr(settings, 'SURVEILLANCE_LOOKUP_CACHE_TTL', 300)
+        self.cameras = TTLCache(max_size=max_size, ttl=ttl)
+        self.areas = TTLCache(max_size=max_size, ttl=ttl)
+        self.event_types = TTLCache(max_size=max_size, ttl=ttl)
+
+    # --- Cameras ---
+
+    def _store_camera(self, camera):
+        self.cameras.set(('pk', camera.pk), camera)
+        self.cameras.set(('code', camera.camera_id), camera)
+        if camera.area is not None:
+            self.areas.set(camera.area.pk, camera.area)
+
+    def get_camera(self, camera_id):
+        """Camera by hardware identifier (Camera.camera_id), or None."""
+        camera = self.cameras.get(('code', camera_id))
+        if camera is None:
+            camera = Camera.objects.select_related('area').filter(camera_id=camera_id).first()
+            if camera is not None:
+                self._store_camera(camera)
+        return camera
+
+    def get_camera_by_pk(self, pk):
+        if pk is None:
+            return None
+        camera = self.cameras.get(('pk', pk))
+        if camera is None:
+            camera = Camera.objects.select_related('area').filter(pk=pk).first()
+            if camera is not None:
+                self._store_camera(camera)
+        return camera
+
+    def get_cameras(self, camera_ids):
+        """Resolves many camera_ids at once; cache misses are fetched with a single query."""
+        found = {}
+        missing = []
+        for camera_id in set(camera_ids):
+            camera = self.cameras.get(('code', camera_id))
+            if camera is None:
+                missing.append(camera_id)
+            else:
+                found[camera_id] = camera
+        if missing:
+            for camera in Camera.objects.select_related('area').filter(camera_id__in=missing):
+                self._store_camera(camera)
+                found[camera.camera_id] = camera
+        return found
+
+    # --- Areas ---
+
+    def get_area(self, pk):
+        if pk is None:
+            return None
+        area = self.areas.get(pk)
+        if area is None:
+            area = SurveillanceArea.objects.filter(pk=pk).first()
+            if area is not None:
+                self.areas.set(pk, area)
+        return area
+
+    # --- Event Types ---
+
+    def _store_event_type(self, event_type):
+        self.event_types.set(('pk', event_type.pk), event_type)
+        self.event_types.set(('code', event_type.code), event_type)
+
+    def get_event_type(self, code):
+        """EventType by short code (e.g. 'WEAPON'), or None."""
+        event_type = self.event_types.get(('code', code))
+        if event_type is None:
+            event_type = EventType.objects.filter(code=code).first()
+            if event_type is not None:
+                self._store_event_type(event_type)
+        return event_type
+
+    def get_event_type_by_pk(self, pk):
+        if pk is None:
+            return None
+        event_type = self.event_types.get(('pk', pk))
+        if event_type is None:
+            event_type = EventType.objects.filter(pk=pk).first()
+            if event_type is not None:
+                self._store_event_type(event_type)
+        return event_type
+
+    def get_event_types(self, codes):
+        """Resolves many event type codes at once; cache misses are fetched with a single query."""
+        found = {}
+        missing = []
+        for code in set(codes):
+            event_type = self.event_types.get(('code', code))
+            if event_type is None:
+                missing.append(code)
+            else:
+                found[code] = event_type
+        if missing:
+            for event_type in EventType.objects.filter(code__in=missing):
+                self._store_event_type(event_type)
+                found[event_type.code] = event_type
+        return found
+
+    # --- Invalidation & Stats ---
+
+    def invalidate_cameras(self):
+        self.cameras.clear()
+
+    def invalidate_areas(self):
+        # Cached cameras carry their area instance, so they go too
+        self.areas.clear()
+        self.cameras.clear()
+
+    def invalidate_event_types(self):
+        self.event_types.clear()
+
+    def clear(self):
+        self.cameras.clear()
+        self.areas.clear()
+        self.event_types.clear()
+
+    def stats(self):
+        return {
+            'cameras': self.cameras.stats(),
+            'areas': self.areas.stats(),
+            'event_types': self.event_types.stats(),
+        }
+
+
+lookup_cache = LookupCache()
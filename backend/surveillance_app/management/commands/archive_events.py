@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.surveillance_app.archive import ARCHIVE_TABLES, month_label, month_start, next_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves whole months of AreaObservation and SecurityIncident rows older than the hot "
+        "window into compressed columnar archive files, oldest month first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=getattr(settings, 'SURVEILLANCE_HOT_MONTHS', 3),
+            help="Months (including the current one) that stay in the database (default: SURVEILLANCE_HOT_MONTHS).",
+        )
+        parser.add_argument('--table', choices=sorted(ARCHIVE_TABLES), help="Archive only this table.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction (default: 1000).")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be archived without changing anything.")
+
+    def handle(self, *args, **options):
+        if options['keep_months'] < 1:
+            raise CommandError("--keep-months must be at least 1.")
+
+        cutoff = month_start(timezone.now())
+        for _ in range(options['keep_months'] - 1):
+            cutoff = month_start(cutoff - timedelta(days=1))
+
+        tables = [ARCHIVE_TABLES[options['table']]] if options['table'] else ARCHIVE_TABLES.values()
+        for table in tables:
+            oldest = table.model.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True).first()
+            if oldest is None:
+                self.stdout.write(f"{table.name}: nothing older than {month_label(cutoff)}.")
+                continue
+
+            month = month_start(oldest)
+            while month < cutoff:
+                if options['dry_run']:
+                    count = table.hot_rows(month, next_month(month)).count()
+                    self.stdout.write(f"{table.name} {month_label(month)}: would archive {count} rows.")
+                else:
+                    written, deleted = table.archive_month(month, batch_size=options['batch_size'])
+                    self.stdout.write(f"{table.name} {month_label(month)}: archived {written}, deleted {deleted} rows.")
+                month = next_month(month)
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS("Dry run complete."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archived everything before {month_label(cutoff)}."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from backend.surveillance_app.spatial import backfill_detection_boxes
+
+
+class Command(BaseCommand):
+    help = "Creates DetectionBox rows for existing ObjectDetail and weapon metrics bounding boxes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows inserted per batch (default: 1000).")
+
+    def handle(self, *args, **options):
+        created = backfill_detection_boxes(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} detection boxes."))
@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+import statistics
+import tempfile
+import time
+
+from channels.layers import InMemoryChannelLayer
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core.channel_layers import UnixSocketChannelLayer
+
+
+GROUP = 'benchmark'
+RECEIVE_TIMEOUT = 10
+
+
+async def _receive(layer, count, ready, report):
+    """Joins GROUP, then reports the latencies of 'count' received messages."""
+    channel = await layer.new_channel()
+    await layer.group_add(GROUP, channel)
+    ready()
+    latencies = []
+    try:
+        for _ in range(count):
+            message = await asyncio.wait_for(layer.receive(channel), RECEIVE_TIMEOUT)
+            latencies.append(time.time() - message['sent_at'])
+    except asyncio.TimeoutError:
+        pass
+    report({'latencies': latencies, 'finished': time.time()})
+
+
+def _receive_in_process(path, count, capacity, ready, results):
+    async def run():
+        layer = UnixSocketChannelLayer(path=path, capacity=capacity)
+        await _receive(layer, count, ready.set, results.put)
+        await layer.close()
+
+    asyncio.run(run())
+
+
+async def _send(layer, count, payload, interval):
+    started = time.time()
+    for seq in range(count):
+        await layer.group_send(GROUP, {'type': 'benchmark.message', 'seq': seq, 'sent_at': time.time(), 'payload': payload})
+        if interval:
+            await asyncio.sleep(interval)
+    return started
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures group_send throughput and latency of the in-memory channel layer (receivers in "
+        "the sending process) and of UnixSocketChannelLayer (receivers in separate processes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000, help="Messages sent to the group (default: 5000).")
+        parser.add_argument('--receivers', type=int, default=4,
+                            help="Receiving channels; one process each for the socket layer (default: 4).")
+        parser.add_argument('--payload-bytes', type=int, default=200, help="Size of each message's payload (default: 200).")
+        parser.add_argument('--interval', type=float, default=0.0,
+                            help="Seconds between sends. 0 (default) sends as fast as possible, so latency "
+                                 "includes queueing; set e.g. 0.001 to measure latency below saturation.")
+        parser.add_argument('--path', help="Socket directory for the socket layer (default: a temporary directory).")
+
+    def handle(self, *args, **options):
+        if options['messages'] < 1 or options['receivers'] < 1:
+            raise CommandError("--messages and --receivers must be positive.")
+
+        rows = [self.run_in_memory(options), self.run_unix_socket(options)]
+        self.stdout.write(f"{'layer':<12} {'receivers':>9} {'delivered':>10} {'msg/s':>10} "
+                          f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['layer']:<12} {row['receivers']:>9} {row['delivered']:>10} {row['rate']:>10.0f} "
+                f"{row['p50']:>8.2f} {row['p99']:>8.2f} {row['max']:>8.2f}"
+            )
+
+    def run_in_memory(self, options):
+        count, receivers = options['messages'], options['receivers']
+        layer = InMemoryChannelLayer(capacity=count + 1)
+        reports = []
+
+        async def run():
+            ready = []
+            tasks = [
+                asyncio.ensure_future(_receive(layer, count, lambda: ready.append(True), reports.append))
+                for _ in range(receivers)
+            ]
+            while len(ready) < receivers:
+                await asyncio.sleep(0)
+            started = await _send(layer, count, 'x' * options['payload_bytes'], options['interval'])
+            await asyncio.gather(*tasks)
+            return started
+
+        started = asyncio.run(run())
+        return self.summarize('in-memory', receivers, reports, started)
+
+    def run_unix_socket(self, options):
+        count, receivers = options['messages'], options['receivers']
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        with tempfile.TemporaryDirectory(prefix='channels-') as scratch:
+            path = options['path'] or scratch
+            results = context.Queue()
+            processes = []
+            for _ in range(receivers):
+                ready = context.Event()
+                process = context.Process(target=_receive_in_process, args=(path, count, count + 1, ready, results))
+                process.start()
+                processes.append((process, ready))
+            for _, ready in processes:
+                if not ready.wait(RECEIVE_TIMEOUT):
+                    raise CommandError("A receiver process did not start.")
+
+            async def run():
+                layer = UnixSocketChannelLayer(path=path)
+                started = await _send(layer, count, 'x' * options['payload_bytes'], options['interval'])
+                await layer.close()
+                return started
+
+            started = asyncio.run(run())
+            reports = [results.get(timeout=RECEIVE_TIMEOUT * 2) for _ in processes]
+            for process, _ in processes:
+                process.join()
+        return self.summarize('unix-socket', receivers, reports, started)
+
+    @staticmethod
+    def summarize(layer, receivers, reports, started):
+        latencies = sorted(latency * 1000 for report in reports for latency in report['latencies'])
+        elapsed = max(report['finished'] for report in reports) - started
+        if not latencies:
+            return {'layer': layer, 'receivers': receivers, 'delivered': 0, 'rate': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        return {
+            'layer': layer,
+            'receivers': receivers,
+            'delivered': len(latencies),
+            'rate': len(latencies) / elapsed if elapsed > 0 else 0.0,
+            'p50': statistics.median(latencies),
+            'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+            'max': latencies[-1],
+        }
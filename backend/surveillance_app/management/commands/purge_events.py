@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.surveillance_app.retention import get_retention_policies, purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes incidents and observations older than their event type's retention period "
+        "(SURVEILLANCE_RETENTION_DAYS) in small batches, along with their snapshot files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', action='append', dest='types', metavar='CODE',
+                            help="Only purge this event type (repeatable).")
+        parser.add_argument('--days', type=int,
+                            help="Override the retention period (in days) for the selected types.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per transaction (default: 1000).")
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help="Seconds to sleep between batches so ingestion keeps up (default: 0.1).")
+        parser.add_argument('--keep-files', action='store_true', help="Delete rows but leave snapshot files on disk.")
+        parser.add_argument('--skip-archive', action='store_true', help="Do not touch archived months.")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be deleted without changing anything.")
+
+    def handle(self, *args, **options):
+        policies = get_retention_policies()
+        if options['types']:
+            codes = [code.upper() for code in options['types']]
+            unknown = [code for code in codes if code not in policies and options['days'] is None]
+            if unknown:
+                raise CommandError(f"No retention policy for: {', '.join(unknown)}. Pass --days to set one.")
+            policies = {code: policies.get(code) for code in codes}
+        if options['days'] is not None:
+            if options['days'] < 0:
+                raise CommandError("--days must not be negative.")
+            policies = dict.fromkeys(policies, options['days'])
+        if not policies:
+            self.stdout.write("No retention policies configured (SURVEILLANCE_RETENTION_DAYS is empty).")
+            return
+
+        verb = "would delete" if options['dry_run'] else "deleted"
+
+        def report(stats):
+            self.stdout.write(
+                f"{stats.table} {stats.code} < {stats.cutoff:%Y-%m-%d %H:%M}: {verb} {stats.rows} rows, "
+                f"{stats.files} files ({stats.bytes / 1_048_576:.1f} MiB), {stats.rows_per_second:.0f} rows/s"
+            )
+
+        results = purge_expired(
+            policies,
+            include_archive=not options['skip_archive'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+            remove_files=not options['keep_files'],
+            progress=report,
+        )
+        rows = sum(stats.rows for stats in results)
+        files = sum(stats.files for stats in results)
+        self.stdout.write(self.style.SUCCESS(f"Done: {verb} {rows} rows and {files} snapshot files."))
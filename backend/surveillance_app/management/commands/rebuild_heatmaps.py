@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.surveillance_app.heatmaps import rebuild_heatmaps
+
+
+class Command(BaseCommand):
+    help = "Recomputes DailyHeatmap rows from the stored detection boxes (e.g. after changing the grid size)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Rebuild the last N days (default: 30).")
+        parser.add_argument('--start', help="First day to rebuild (YYYY-MM-DD). Overrides --days.")
+        parser.add_argument('--end', help="Last day to rebuild (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        try:
+            end_day = date.fromisoformat(options['end']) if options['end'] else timezone.localdate()
+            if options['start']:
+                start_day = date.fromisoformat(options['start'])
+            else:
+                start_day = end_day - timedelta(days=options['days'] - 1)
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        if start_day > end_day:
+            raise CommandError("--start must not be after --end.")
+
+        written = rebuild_heatmaps(start_day, end_day)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} heatmaps for {start_day} .. {end_day}."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-16 22:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveillance_app', '0004_remove_eventlog_area_remove_eventlog_object_details_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='areaobservation',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Optional client-supplied key used to deduplicate retried submissions.', max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='areaobservation',
+            name='status',
+            field=models.CharField(choices=[('NEW', 'New'), ('INVESTIGATING', 'Investigating'), ('RESOLVED', 'Resolved'), ('FALSE_POSITIVE', 'False_Positive')], default='NEW', max_length=20),
+        ),
+    ]
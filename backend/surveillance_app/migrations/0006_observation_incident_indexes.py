@@ -0,0 +1,49 @@
+# Generated by Django 5.0 on 2026-10-16 23:03
+
+from django.db import migrations, models
+from django.db.models import Q
+
+
+# SecurityIncident belongs to security_app, so its indexes cannot be declared with
+# AddIndex here; they are created through the schema editor against the historical model.
+INCIDENT_INDEXES = [
+    # Unresolved incidents, newest first (RecentIncidentListView)
+    models.Index(
+        fields=['-timestamp', '-id'], name='incident_unresolved_ts_idx',
+        condition=Q(is_resolved=False),
+    ),
+    # (timestamp, id) keyset used by the incident feeds and pagination
+    models.Index(fields=['timestamp', 'id'], name='incident_ts_id_idx'),
+]
+
+
+def add_incident_indexes(apps, schema_editor):
+    SecurityIncident = apps.get_model('security_app', 'SecurityIncident')
+    for index in INCIDENT_INDEXES:
+        schema_editor.add_index(SecurityIncident, index)
+
+
+def remove_incident_indexes(apps, schema_editor):
+    SecurityIncident = apps.get_model('security_app', 'SecurityIncident')
+    for index in INCIDENT_INDEXES:
+        schema_editor.remove_index(SecurityIncident, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveillance_app', '0005_areaobservation_idempotency_key'),
+        ('security_app', '__first__'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='areaobservation',
+            index=models.Index(fields=['camera', '-timestamp'], name='areaobs_camera_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='areaobservation',
+            index=models.Index(fields=['status', '-timestamp'], name='areaobs_status_ts_idx'),
+        ),
+        migrations.RunPython(add_incident_indexes, remove_incident_indexes),
+    ]
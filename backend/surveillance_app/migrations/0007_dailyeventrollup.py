@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-16 23:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveillance_app', '0006_observation_incident_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyEventRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local calendar day (TIME_ZONE) the events occurred on.')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('area', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_rollups', to='surveillance_app.surveillancearea')),
+                ('camera', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_rollups', to='surveillance_app.camera')),
+                ('event_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='surveillance_app.eventtype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'event_type'], name='rollup_day_type_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyeventrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'event_type', 'camera'), name='rollup_unique_day_type_camera'),
+        ),
+    ]
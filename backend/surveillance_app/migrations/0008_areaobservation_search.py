@@ -0,0 +1,70 @@
+# Generated by Django 5.0 on 2026-10-16 23:40
+
+from django.db import migrations
+
+
+FTS_TABLE = 'surveillance_app_areaobservation_fts'
+OBSERVATION_TABLE = 'surveillance_app_areaobservation'
+
+# External-content FTS5 table over analyst_notes and evidence_path, kept in sync by triggers
+SQLITE_FORWARD = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        analyst_notes, evidence_path, content='{OBSERVATION_TABLE}', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {OBSERVATION_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, analyst_notes, evidence_path)
+        VALUES (new.id, new.analyst_notes, new.evidence_path);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {OBSERVATION_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, analyst_notes, evidence_path)
+        VALUES ('delete', old.id, old.analyst_notes, old.evidence_path);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF analyst_notes, evidence_path ON {OBSERVATION_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, analyst_notes, evidence_path)
+        VALUES ('delete', old.id, old.analyst_notes, old.evidence_path);
+        INSERT INTO {FTS_TABLE}(rowid, analyst_notes, evidence_path)
+        VALUES (new.id, new.analyst_notes, new.evidence_path);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def search_index():
+    # Must match search.search_vector() so the planner can use it
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(SearchVector('analyst_notes', 'evidence_path', config='english'), name='areaobs_search_idx')
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('surveillance_app', 'AreaObservation'), search_index())
+    elif schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_FORWARD:
+            schema_editor.execute(statement)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('surveillance_app', 'AreaObservation'), search_index())
+    elif schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_BACKWARD:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveillance_app', '0007_dailyeventrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
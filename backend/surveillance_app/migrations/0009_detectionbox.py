@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-16 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('security_app', '__first__'),
+        ('surveillance_app', '0008_areaobservation_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectionBox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(help_text='Time of the detection (copied from the observation or incident).')),
+                ('x1', models.FloatField()),
+                ('y1', models.FloatField()),
+                ('x2', models.FloatField()),
+                ('y2', models.FloatField()),
+                ('camera', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='detection_boxes', to='surveillance_app.camera')),
+                ('event_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detection_boxes', to='surveillance_app.eventtype')),
+                ('incident', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='detection_boxes', to='security_app.securityincident')),
+                ('observation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='detection_boxes', to='surveillance_app.areaobservation')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['camera', 'timestamp'], name='detbox_camera_ts_idx'), models.Index(fields=['camera', 'x1', 'x2', 'y1', 'y2'], name='detbox_camera_coords_idx')],
+            },
+        ),
+    ]
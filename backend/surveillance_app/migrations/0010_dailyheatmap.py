@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-17 00:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveillance_app', '0009_detectionbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHeatmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local calendar day (TIME_ZONE) of the detections.')),
+                ('rows', models.PositiveSmallIntegerField()),
+                ('cols', models.PositiveSmallIntegerField()),
+                ('detections', models.PositiveIntegerField(default=0)),
+                ('grid', models.BinaryField(help_text='Raw float32 bytes of the (2, rows, cols) grid.')),
+                ('camera', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_heatmaps', to='surveillance_app.camera')),
+                ('event_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_heatmaps', to='surveillance_app.eventtype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['camera', 'day'], name='heatmap_camera_day_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyheatmap',
+            constraint=models.UniqueConstraint(fields=('day', 'camera', 'event_type'), name='heatmap_unique_day_camera_type'),
+        ),
+    ]
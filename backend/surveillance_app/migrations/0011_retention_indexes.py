@@ -0,0 +1,45 @@
+# Generated by Django 5.0 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+# SecurityIncident belongs to security_app, so its indexes are created through the
+# schema editor against the historical model (as in 0006).
+INCIDENT_INDEXES = [
+    # Retention purges: expired incidents of one event type, oldest first
+    models.Index(fields=['event_type', 'timestamp'], name='incident_type_ts_idx'),
+    # "Is this snapshot still referenced?" before a purge deletes the file
+    models.Index(fields=['snapshot_url'], name='incident_snapshot_idx'),
+]
+
+
+def add_incident_indexes(apps, schema_editor):
+    SecurityIncident = apps.get_model('security_app', 'SecurityIncident')
+    for index in INCIDENT_INDEXES:
+        schema_editor.add_index(SecurityIncident, index)
+
+
+def remove_incident_indexes(apps, schema_editor):
+    SecurityIncident = apps.get_model('security_app', 'SecurityIncident')
+    for index in INCIDENT_INDEXES:
+        schema_editor.remove_index(SecurityIncident, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveillance_app', '0010_dailyheatmap'),
+        ('security_app', '__first__'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='areaobservation',
+            index=models.Index(fields=['event_type', 'timestamp'], name='areaobs_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='areaobservation',
+            index=models.Index(fields=['evidence_path'], name='areaobs_evidence_idx'),
+        ),
+        migrations.RunPython(add_incident_indexes, remove_incident_indexes),
+    ]
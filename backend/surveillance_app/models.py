@@ -64,6 +64,7 @@ class AreaObservation(models.Model):
 
     camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='area_observations')
     event_type = models.ForeignKey(EventType, on_delete=models.PROTECT, limit_choices_to={'code__in': ['UOD', 'INTRUSION']})
+    timestamp = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='NEW')
     analyst_notes = models.TextField(blank=True, null=True)
     resolution_time = models.DateTimeField(null=True, blank=True)
@@ -71,6 +72,21 @@ class AreaObservation(models.Model):
     # NEW FIELD: Reference to the image/video file saved in cloud storage for evidence.
     evidence_path = models.CharField(max_length=255, help_text="Path or URL to the digital evidence (snapshot/video clip).")
 
+    # Client-supplied key that makes worker retries idempotent (unique, so duplicates are rejected by the DB)
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True, help_text="Optional client-supplied key used to deduplicate retried submissions.")
+
+    class Meta:
+        indexes = [
+            # "Latest observations for a camera"
+            models.Index(fields=['camera', '-timestamp'], name='areaobs_camera_ts_idx'),
+            # "NEW (or other status) observations ordered by time"
+            models.Index(fields=['status', '-timestamp'], name='areaobs_status_ts_idx'),
+            # Retention purges: expired rows of one event type, oldest first
+            models.Index(fields=['event_type', 'timestamp'], name='areaobs_type_ts_idx'),
+            # "Is this snapshot still referenced?" before a purge deletes the file
+            models.Index(fields=['evidence_path'], name='areaobs_evidence_idx'),
+        ]
+
     def __str__(self):
         return f"{self.event_type.name} at {self.camera.area.name} ({self.timestamp.strftime('%Y-%m-%d %H:%M')})"
 
@@ -93,3 +109,87 @@ class ObjectDetail(models.Model):
 
     def __str__(self):
         return f"Details for {self.observation.id} ({self.observation.event_type.code})"
+
+# --- AGGREGATE MODELS (ANALYTICS) ---
+
+class DailyEventRollup(models.Model):
+    """
+    Per-day event counts by event type and camera, maintained incrementally at ingest
+    (see rollups.py) so analytics never scan raw event rows. The unique constraint
+    does not cover rows without a camera (NULLs are distinct), so concurrent first
+    inserts or a deleted camera can leave several rows for such a key: increments
+    only go to the oldest of them, reads sum them, and rebuild_rollups merges them.
+    """
+    day = models.DateField(help_text="Local calendar day (TIME_ZONE) the events occurred on.")
+    event_type = models.ForeignKey(EventType, on_delete=models.CASCADE, related_name='daily_rollups')
+    camera = models.ForeignKey(Camera, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_rollups')
+    area = models.ForeignKey(SurveillanceArea, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_rollups')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day', 'event_type'], name='rollup_day_type_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'event_type', 'camera'], name='rollup_unique_day_type_camera'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.event_type.code} {self.camera.camera_id if self.camera else 'Unknown'}: {self.count}"
+
+class DailyHeatmap(models.Model):
+    """
+    Where in one camera's frame detections of one event type landed on one day.
+    'grid' holds a float32 NumPy array of shape (2, rows, cols): channel 0 counts
+    box centers per cell, channel 1 counts boxes covering each cell. Maintained
+    incrementally at ingest (see heatmaps.py).
+    """
+    day = models.DateField(help_text="Local calendar day (TIME_ZONE) of the detections.")
+    camera = models.ForeignKey(Camera, on_delete=models.CASCADE, related_name='daily_heatmaps')
+    event_type = models.ForeignKey(EventType, on_delete=models.CASCADE, related_name='daily_heatmaps')
+    rows = models.PositiveSmallIntegerField()
+    cols = models.PositiveSmallIntegerField()
+    detections = models.PositiveIntegerField(default=0)
+    grid = models.BinaryField(help_text="Raw float32 bytes of the (2, rows, cols) grid.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['camera', 'day'], name='heatmap_camera_day_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'camera', 'event_type'], name='heatmap_unique_day_camera_type'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.camera.camera_id} {self.event_type.code}: {self.detections} detections"
+
+# --- SPATIAL MODELS ---
+
+class DetectionBox(models.Model):
+    """
+    Numeric copy of a detection's bounding box ([x1, y1, x2, y2] in frame pixels),
+    taken from ObjectDetail.bounding_box or an incident's weapon detection_box at
+    ingest (see spatial.py). Camera, type and time are copied too, so region
+    queries filter on indexed columns without joining or decoding JSON.
+    """
+    observation = models.ForeignKey(AreaObservation, on_delete=models.CASCADE, null=True, blank=True, related_name='detection_boxes')
+    incident = models.ForeignKey('security_app.SecurityIncident', on_delete=models.CASCADE, null=True, blank=True, related_name='detection_boxes')
+    camera = models.ForeignKey(Camera, on_delete=models.SET_NULL, null=True, blank=True, related_name='detection_boxes')
+    event_type = models.ForeignKey(EventType, on_delete=models.CASCADE, related_name='detection_boxes')
+    timestamp = models.DateTimeField(help_text="Time of the detection (copied from the observation or incident).")
+    x1 = models.FloatField()
+    y1 = models.FloatField()
+    x2 = models.FloatField()
+    y2 = models.FloatField()
+
+    class Meta:
+        indexes = [
+            # "Detections of a camera in a time range"
+            models.Index(fields=['camera', 'timestamp'], name='detbox_camera_ts_idx'),
+            # Box overlap predicates answered from the index alone
+            models.Index(fields=['camera', 'x1', 'x2', 'y1', 'y2'], name='detbox_camera_coords_idx'),
+        ]
+
+    def __str__(self):
+        source = f"observation {self.observation_id}" if self.observation_id else f"incident {self.incident_id}"
+        return f"Box ({self.x1:.0f}, {self.y1:.0f})-({self.x2:.0f}, {self.y2:.0f}) for {source}"
@@ -0,0 +1,215 @@
+"""
+Keyset (cursor) pagination for incident feeds, keyed on (timestamp, id).
+
+Two ways to move through a feed:
+  * ?cursor=<token>            - the next older page. Tokens come from the 'next' link.
+  * ?since=<iso>&after_id=<id> - incremental polling. Only rows newer than the anchor
+                                 are returned, so each poll costs O(new events). The
+                                 'poll' link always carries the newest anchor seen.
+
+Both filter on an indexed (timestamp, id) range instead of using OFFSET, so deep
+pages cost the same as the first one.
+"""
+
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _row_key(row):
+    """(timestamp, id) of a model instance or a values() dict."""
+    if isinstance(row, dict):
+        return row['timestamp'], row['id']
+    return row.timestamp, row.id
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        # parse_datetime() returns None for malformed and raises ValueError for out-of-range values
+        timestamp, pk = parse_datetime(timestamp), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        timestamp = None
+    if timestamp is None:
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp, pk
+
+
+def parse_since(value):
+    try:
+        timestamp = parse_datetime(value)
+    except ValueError:
+        timestamp = None
+    if timestamp is None:
+        raise ValidationError({'since': 'Expected an ISO 8601 datetime.'})
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
+
+
+def newer_than(timestamp=None, pk=None):
+    """Rows strictly after the (timestamp, id) anchor; either part may be omitted."""
+    if timestamp is not None and pk is not None:
+        return Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=pk)
+    if timestamp is not None:
+        return Q(timestamp__gt=timestamp)
+    return Q(id__gt=pk)
+
+
+def older_than(timestamp, pk):
+    return Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first keyset pagination over querysets that have 'timestamp' and 'id'.
+    Works with model querysets and values() querysets.
+    """
+    default_limit = 50
+    max_limit = 500
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    since_query_param = 'since'
+    after_id_query_param = 'after_id'
+
+    def get_limit(self, request):
+        value = request.query_params.get(self.limit_query_param)
+        if not value:
+            return self.default_limit
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ValidationError({self.limit_query_param: 'Expected an integer.'})
+        return max(1, min(limit, self.max_limit))
+
+    def get_anchor(self, request):
+        since = request.query_params.get(self.since_query_param)
+        after_id = request.query_params.get(self.after_id_query_param)
+        since = parse_since(since) if since else None
+        if after_id:
+            try:
+                after_id = int(after_id)
+            except ValueError:
+                raise ValidationError({self.after_id_query_param: 'Expected an integer.'})
+        else:
+            after_id = None
+        return since, after_id
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        limit = self.get_limit(request)
+        since, after_id = self.get_anchor(request)
+        self.next_key = None
+
+        if since is not None or after_id is not None:
+            # Incremental poll: walk forward from the anchor, then present newest-first
+            rows = list(queryset.filter(newer_than(since, after_id)).order_by('timestamp', 'id')[:limit + 1])
+            self.has_more = len(rows) > limit
+            rows = rows[:limit]
+            rows.reverse()
+            self.newest_key = _row_key(rows[0]) if rows else (since, after_id)
+            return rows
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(older_than(*decode_cursor(cursor)))
+        rows = list(queryset.order_by('-timestamp', '-id')[:limit + 1])
+        self.has_more = len(rows) > limit
+        rows = rows[:limit]
+        if self.has_more:
+            self.next_key = _row_key(rows[-1])
+        # Only the first page defines where pollers should resume
+        self.newest_key = _row_key(rows[0]) if rows and not cursor else (None, None)
+        return rows
+
+    def paginate_sequence(self, rows, request, complete=False):
+        """
+        In-memory equivalent of paginate_queryset() over a newest-first list of
+        rows (e.g. the recent incident ring buffer). Returns None when the request
+        reaches past the window, in which case the caller should use the database.
+        'complete' means the list holds every row, so no request can fall outside it.
+        """
+        self.request = request
+        limit = self.get_limit(request)
+        since, after_id = self.get_anchor(request)
+        self.next_key = None
+
+        def is_newer(row):
+            timestamp, pk = _row_key(row)
+            if since is not None and after_id is not None:
+                return (timestamp, pk) > (since, after_id)
+            if since is not None:
+                return timestamp > since
+            return pk > after_id
+
+        if since is not None or after_id is not None:
+            newer = [row for row in rows if is_newer(row)]
+            if len(newer) == len(rows) and not complete:
+                return None  # The anchor is older than the oldest buffered row
+            forward = newer[::-1][:limit + 1]
+            self.has_more = len(forward) > limit
+            page = forward[:limit][::-1]
+            self.newest_key = _row_key(page[0]) if page else (since, after_id)
+            return page
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position = decode_cursor(cursor)
+            rows = [row for row in rows if _row_key(row) < position]
+        if len(rows) <= limit and not complete:
+            return None
+        self.has_more = len(rows) > limit
+        page = rows[:limit]
+        if self.has_more:
+            self.next_key = _row_key(page[-1])
+        self.newest_key = _row_key(page[0]) if page and not cursor else (None, None)
+        return page
+
+    def get_next_link(self):
+        if self.next_key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.since_query_param)
+        url = remove_query_param(url, self.after_id_query_param)
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(*self.next_key))
+
+    def get_poll_link(self):
+        timestamp, pk = self.newest_key
+        if timestamp is None and pk is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        if timestamp is not None:
+            url = replace_query_param(url, self.since_query_param, timestamp.isoformat())
+        if pk is not None:
+            url = replace_query_param(url, self.after_id_query_param, pk)
+        return url
+
+    def get_page_links(self):
+        return {
+            'next': self.get_next_link(),
+            'poll': self.get_poll_link(),
+            'has_more': self.has_more,
+        }
+
+    def get_paginated_response(self, data):
+        return Response({**self.get_page_links(), 'results': data})
+
+
+class IncidentListPagination(KeysetPagination):
+    """RecentIncidentListView historically returned up to 100 rows per request."""
+    default_limit = 100
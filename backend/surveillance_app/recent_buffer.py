@@ -0,0 +1,163 @@
+"""
+Process-wide ring buffer of the most recent incidents.
+
+The recent-incidents, status and log endpoints are the hottest reads in the
+system and only ever look at the newest rows. This buffer keeps the newest
+SURVEILLANCE_RECENT_BUFFER_SIZE incident rows (plus their serialized form)
+in memory, newest first:
+
+  * filled at ingest time by the SecurityIncident / metrics post_save receivers
+    in signals.py (after the transaction commits),
+  * warmed from the database on first use,
+  * caught up with incidents written by *other* worker processes by one
+    'id > newest' query at most every SURVEILLANCE_RECENT_BUFFER_SYNC_INTERVAL
+    seconds (set it to None for single-process deployments).
+
+Reads that reach past the buffered window return None so callers fall back
+to the database.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from .incident_feed import incident_feed_queryset, serialize_incident_row
+
+
+def _key(row):
+    return row['timestamp'], row['id']
+
+
+class IncidentRingBuffer:
+    """Fixed-capacity, newest-first window of incident feed rows."""
+
+    def __init__(self, capacity=None, sync_interval=None):
+        self.capacity = capacity or getattr(settings, 'SURVEILLANCE_RECENT_BUFFER_SIZE', 1000)
+        self.sync_interval = (
+            sync_interval if sync_interval is not None
+            else getattr(settings, 'SURVEILLANCE_RECENT_BUFFER_SYNC_INTERVAL', 1.0)
+        )
+        self._lock = threading.RLock()
+        self._rows = []         # newest first, at most 'capacity' entries
+        self._ids = set()       # ids in _rows
+        self._serialized = {}   # incident id -> serialize_incident_row() output
+        self._warmed = False
+        self._complete = False  # True while the buffer holds every incident in the table
+        self._synced_at = 0.0
+
+    # --- Loading ---
+
+    def warm(self):
+        """(Re)loads the newest 'capacity' incidents from the database."""
+        rows = list(incident_feed_queryset()[:self.capacity])
+        with self._lock:
+            self._rows = rows
+            self._ids = {row['id'] for row in rows}
+            self._serialized = {}
+            self._complete = len(rows) < self.capacity
+            self._warmed = True
+            self._synced_at = time.monotonic()
+
+    def reset(self):
+        """Forgets the buffered rows; the next read warms the buffer again."""
+        with self._lock:
+            self._rows = []
+            self._ids = set()
+            self._serialized = {}
+            self._warmed = False
+            self._complete = False
+
+    def _ensure_current(self):
+        if not self._warmed:
+            self.warm()
+            return
+        if self.sync_interval is None or time.monotonic() - self._synced_at < self.sync_interval:
+            return
+
+        with self._lock:
+            newest_id = max((row['id'] for row in self._rows), default=0)
+            self._synced_at = time.monotonic()
+        # Incidents stored by other processes since the last sync
+        for row in reversed(list(incident_feed_queryset().filter(id__gt=newest_id)[:self.capacity])):
+            self._insert(row)
+
+    # --- Writes (ingest side) ---
+
+    def _insert(self, row):
+        with self._lock:
+            self._discard(row['id'])
+            key = _key(row)
+            position = 0
+            while position < len(self._rows) and _key(self._rows[position]) > key:
+                position += 1
+            if position >= self.capacity:
+                return
+            self._rows.insert(position, row)
+            self._ids.add(row['id'])
+            while len(self._rows) > self.capacity:
+                dropped = self._rows.pop()
+                self._ids.discard(dropped['id'])
+                self._serialized.pop(dropped['id'], None)
+                self._complete = False
+
+    def _discard(self, pk):
+        if pk not in self._ids:
+            return False
+        self._ids.discard(pk)
+        self._serialized.pop(pk, None)
+        self._rows = [row for row in self._rows if row['id'] != pk]
+        return True
+
+    def record(self, pk):
+        """Adds or refreshes one incident after it was saved (one indexed query at ingest time)."""
+        if not self._warmed:
+            return  # The first read warms the buffer and will include this incident
+        row = incident_feed_queryset().filter(pk=pk).first()
+        if row is None:
+            self.discard(pk)
+        else:
+            self._insert(row)
+
+    def discard(self, pk):
+        """
+        Drops one deleted incident. The window just gets shorter (readers that need
+        more fall back to the database), so bulk deletes of old rows, which are
+        mostly outside the window, cost nothing; it is only reloaded once
+        deletes have shrunk it below half its capacity.
+        """
+        with self._lock:
+            if self._discard(pk) and not self._complete and len(self._rows) < self.capacity // 2:
+                self._warmed = False
+
+    # --- Reads ---
+
+    def window(self):
+        """
+        (rows, complete): newest-first snapshot of the buffered rows and whether it
+        covers the whole table. Costs no query unless a warm-up or sync is due.
+        """
+        self._ensure_current()
+        with self._lock:
+            return list(self._rows), self._complete
+
+    def latest(self):
+        rows, _ = self.window()
+        return rows[0] if rows else None
+
+    def serialize(self, row):
+        """serialize_incident_row() output, computed once per buffered incident (only pass rows from window())."""
+        data = self._serialized.get(row['id'])
+        if data is None:
+            data = self._serialized[row['id']] = serialize_incident_row(row)
+        return data
+
+    def state(self):
+        """(max_id, latest_timestamp) of the buffered window, used as the feed version."""
+        rows, _ = self.window()
+        if not rows:
+            return 0, None
+        return max(row['id'] for row in rows), rows[0]['timestamp']
+
+
+recent_incidents = IncidentRingBuffer()
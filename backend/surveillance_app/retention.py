@@ -0,0 +1,220 @@
+"""
+Per-event-type retention for incidents, observations and their snapshot files.
+
+SURVEILLANCE_RETENTION_DAYS maps an EventType code to the number of days its
+events are kept; types that are not listed are kept forever. Expired hot rows
+are deleted in bounded batches (one short transaction each, with an optional
+pause in between so ingestion is never blocked for long), walked with a
+(timestamp, id) keyset over the (event_type, timestamp) indexes, and each
+batch's snapshot files are removed once its transaction has committed, unless a
+remaining hot row of either table still references them. Expired rows in
+archived months (archive.py) are dropped from the archive files as well.
+
+DailyEventRollup rows are left alone, so analytics history outlives the purge;
+the timeseries cache of this process is cleared.
+"""
+
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .analytics import analytics_cache
+from .archive import ARCHIVE_TABLES, to_datetime64
+from .lookups import lookup_cache
+from .pagination import newer_than
+
+
+def get_retention_policies():
+    """{event type code: days to keep}."""
+    return dict(getattr(settings, 'SURVEILLANCE_RETENTION_DAYS', {}))
+
+
+# --- Snapshot Files ---
+
+def snapshot_file(reference):
+    """
+    Local file behind a snapshot URL or evidence path ('/snapshots/x.jpg', an
+    absolute path under SNAPSHOT_ROOT or a bare file name), or None for
+    anything outside SNAPSHOT_ROOT such as remote URLs.
+    """
+    if not reference:
+        return None
+    root = Path(settings.SNAPSHOT_ROOT).resolve()
+    prefix = getattr(settings, 'SNAPSHOT_URL', '/snapshots/')
+    if reference.startswith(prefix):
+        candidate = root / reference[len(prefix):]
+    elif '://' in reference:
+        return None
+    else:
+        candidate = root / reference
+    candidate = candidate.resolve()
+    return candidate if candidate.parent == root or root in candidate.parents else None
+
+
+def referenced_snapshots(references):
+    """The 'references' still used by a hot row of any event table (indexed lookups)."""
+    references = list(set(filter(None, references)))
+    used = set()
+    if references:
+        for table in ARCHIVE_TABLES.values():
+            field = table.snapshot_field
+            used.update(table.model.objects.filter(**{f'{field}__in': references}).values_list(field, flat=True))
+    return used
+
+
+def remove_snapshot_files(references, keep=()):
+    """
+    Deletes the local files behind 'references', except those that are also
+    behind a reference in 'keep'. Returns (files removed, bytes freed).
+    """
+    kept = set(filter(None, map(snapshot_file, set(keep))))
+    removed, freed = 0, 0
+    for path in filter(None, map(snapshot_file, set(references))):
+        if path in kept:
+            continue
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def snapshot_size(references):
+    """(existing files, total bytes) for a dry run."""
+    files, total = 0, 0
+    for path in filter(None, map(snapshot_file, set(references))):
+        if path.is_file():
+            files += 1
+            total += path.stat().st_size
+    return files, total
+
+
+# --- Purge ---
+
+class PurgeStats:
+    """Running totals for one (table, event type) purge, reported after every batch."""
+
+    def __init__(self, table, code, cutoff):
+        self.table = table
+        self.code = code
+        self.cutoff = cutoff
+        self.rows = 0
+        self.files = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+
+def purge_table(table, event_type, cutoff, batch_size=1000, pause=0.0, dry_run=False,
+                remove_files=True, progress=None):
+    """
+    Deletes hot rows of 'table' for 'event_type' older than 'cutoff', oldest
+    first, 'batch_size' rows per transaction. 'progress' is called with the
+    PurgeStats after each batch.
+    """
+    stats = PurgeStats(table.name, event_type.code, cutoff)
+    expired = table.model.objects.filter(event_type_id=event_type.pk, timestamp__lt=cutoff)
+
+    if dry_run:
+        stats.rows = expired.count()
+        if remove_files:
+            stats.files, stats.bytes = snapshot_size(expired.values_list(table.snapshot_field, flat=True).iterator())
+        if progress:
+            progress(stats)
+        return stats
+
+    expired = expired.order_by('timestamp', 'id').values_list('id', 'timestamp', table.snapshot_field)
+    last = None
+    while True:
+        # Resume after the previous batch instead of re-walking the rows before it
+        batch = list((expired.filter(newer_than(*last)) if last else expired)[:batch_size])
+        if not batch:
+            break
+        ids = [pk for pk, _, _ in batch]
+        references = [reference for _, _, reference in batch]
+        with transaction.atomic():
+            table.model.objects.filter(pk__in=ids).delete()
+        last = batch[-1][1], batch[-1][0]
+
+        stats.rows += len(ids)
+        if remove_files:
+            files, freed = remove_snapshot_files(references, keep=referenced_snapshots(references))
+            stats.files += files
+            stats.bytes += freed
+        if progress:
+            progress(stats)
+        if len(batch) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return stats
+
+
+def purge_archive(table, event_type, cutoff, dry_run=False, remove_files=True, progress=None):
+    """Drops expired rows of 'event_type' from the archived months of 'table'."""
+    stats = PurgeStats(f"{table.name} (archive)", event_type.code, cutoff)
+    limit = to_datetime64(cutoff)
+    for month in table.archived_months():
+        if month >= cutoff:
+            break
+        for path in table.parts(month):
+            columns = table.load(path, ['event_type_id', 'timestamp', table.snapshot_field])
+            expired = (columns['event_type_id'] == event_type.pk) & (columns['timestamp'] < limit)
+            if not expired.any():
+                continue
+
+            references = [str(reference) for reference in columns[table.snapshot_field][expired]]
+            stats.rows += int(expired.sum())
+            if dry_run:
+                if remove_files:
+                    files, size = snapshot_size(references)
+                    stats.files += files
+                    stats.bytes += size
+            else:
+                table.rewrite_part(path, ~expired)
+                if remove_files:
+                    kept = {str(reference) for reference in columns[table.snapshot_field][~expired]}
+                    files, freed = remove_snapshot_files(references, keep=kept | referenced_snapshots(references))
+                    stats.files += files
+                    stats.bytes += freed
+            if progress:
+                progress(stats)
+    return stats
+
+
+def purge_expired(policies=None, now=None, include_archive=True, **options):
+    """
+    Applies every retention policy to every event table. Returns the list of
+    PurgeStats; 'options' are passed to purge_table().
+    """
+    policies = get_retention_policies() if policies is None else policies
+    now = now or timezone.now()
+    event_types = lookup_cache.get_event_types(policies)
+
+    results = []
+    for code, days in policies.items():
+        event_type = event_types.get(code)
+        if event_type is None:
+            continue
+        cutoff = now - timedelta(days=days)
+        for table in ARCHIVE_TABLES.values():
+            results.append(purge_table(table, event_type, cutoff, **options))
+            if include_archive:
+                results.append(purge_archive(
+                    table, event_type, cutoff, dry_run=options.get('dry_run', False),
+                    remove_files=options.get('remove_files', True), progress=options.get('progress'),
+                ))
+    if not options.get('dry_run'):
+        analytics_cache.clear()  # Cached counts may include purged events
+    return results
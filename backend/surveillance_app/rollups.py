@@ -0,0 +1,154 @@
+"""
+Incremental maintenance of DailyEventRollup.
+
+Every stored event (SecurityIncident or AreaObservation) adds one to the rollup
+row for (local day, event type, camera). The /api/analytics/ endpoint reads only
+the rollup table, so its cost depends on the number of days requested, not on
+how many raw events exist. The 'rebuild_rollups' management command recomputes
+a date range from the raw tables.
+
+Raw-event deletions (e.g. retention purges) intentionally leave the rollup
+untouched, so analytics history outlives the raw rows.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend.security_app.models import SecurityIncident
+from .lookups import lookup_cache
+from .models import AreaObservation, DailyEventRollup
+
+
+# Analytics column names used by the dashboard for each event type code
+ANALYTICS_COLUMNS = {
+    'WEAPON': 'weapon',
+    'CROWD': 'overcrowding',
+    'UOD': 'uod',
+    'INTRUSION': 'intrusion',
+}
+
+
+def _area_id(camera_id):
+    camera = lookup_cache.get_camera_by_pk(camera_id)
+    return camera.area_id if camera else None
+
+
+# --- Incremental Updates ---
+
+def _increment(day, event_type_id, camera_id, amount):
+    """
+    Adds 'amount' to the oldest row for the key; returns whether one existed.
+    Rows without a camera can be duplicated (NULLs never collide in the unique
+    constraint), and updating all of them would count every event twice.
+    """
+    oldest = (
+        DailyEventRollup.objects
+        .filter(day=day, event_type_id=event_type_id, camera_id=camera_id)
+        .order_by('pk').values('pk')[:1]
+    )
+    return DailyEventRollup.objects.filter(pk=Subquery(oldest)).update(count=F('count') + amount) > 0
+
+
+def add_to_rollup(day, event_type_id, camera_id, amount=1):
+    """Adds 'amount' events to one rollup row, creating it on first use."""
+    if _increment(day, event_type_id, camera_id, amount):
+        return
+
+    try:
+        with transaction.atomic():
+            DailyEventRollup.objects.create(
+                day=day, event_type_id=event_type_id, camera_id=camera_id,
+                area_id=_area_id(camera_id), count=amount,
+            )
+    except IntegrityError:
+        # A concurrent writer created the row first
+        _increment(day, event_type_id, camera_id, amount)
+
+
+def record_event(timestamp, event_type_id, camera_id):
+    add_to_rollup(timezone.localdate(timestamp), event_type_id, camera_id)
+
+
+def record_events(events):
+    """
+    Adds many events at once, one UPDATE per distinct (day, event type, camera).
+    'events' yields (timestamp, event_type_id, camera_id) tuples.
+    """
+    counts = Counter(
+        (timezone.localdate(timestamp), event_type_id, camera_id)
+        for timestamp, event_type_id, camera_id in events
+    )
+    for (day, event_type_id, camera_id), amount in counts.items():
+        add_to_rollup(day, event_type_id, camera_id, amount)
+
+
+# --- Rebuild ---
+
+def _raw_daily_counts(model, start_day, end_day):
+    """(day, event_type_id, camera_id, count) rows grouped in SQL for [start_day, end_day]."""
+    tz = timezone.get_current_timezone()
+    return (
+        model.objects
+        .annotate(day=TruncDate('timestamp', tzinfo=tz))
+        .filter(day__gte=start_day, day__lte=end_day)
+        .values('day', 'event_type_id', 'camera_id')
+        .annotate(total=Count('id'))
+    )
+
+
+def rebuild_rollups(start_day, end_day):
+    """
+    Replaces the rollup rows for [start_day, end_day] with counts recomputed from
+    the raw event tables, one row per key (merging duplicated camera-less rows).
+    Returns the number of rollup rows written.
+    """
+    totals = Counter()
+    for model in (SecurityIncident, AreaObservation):
+        for row in _raw_daily_counts(model, start_day, end_day):
+            totals[(row['day'], row['event_type_id'], row['camera_id'])] += row['total']
+
+    rollups = [
+        DailyEventRollup(
+            day=day, event_type_id=event_type_id, camera_id=camera_id,
+            area_id=_area_id(camera_id), count=total,
+        )
+        for (day, event_type_id, camera_id), total in totals.items()
+    ]
+    with transaction.atomic():
+        DailyEventRollup.objects.filter(day__gte=start_day, day__lte=end_day).delete()
+        DailyEventRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
+
+
+# --- Reads ---
+
+def daily_analytics(days=30, today=None):
+    """
+    One row per day for the last 'days' days, e.g. {'date': '2025-10-20', 'weapon': 3,
+    'overcrowding': 1, 'uod': 0, 'intrusion': 2}. Reads only the rollup table.
+    """
+    today = today or timezone.localdate()
+    start_day = today - timedelta(days=days - 1)
+
+    series = {
+        start_day + timedelta(days=offset): dict.fromkeys(ANALYTICS_COLUMNS.values(), 0)
+        for offset in range(days)
+    }
+    totals = (
+        DailyEventRollup.objects
+        .filter(day__gte=start_day, day__lte=today)
+        .values('day', 'event_type_id')
+        .annotate(total=Sum('count'))
+    )
+    for row in totals:
+        event_type = lookup_cache.get_event_type_by_pk(row['event_type_id'])
+        column = ANALYTICS_COLUMNS.get(event_type.code) if event_type else None
+        if column:
+            series[row['day']][column] += row['total']
+
+    return [{'date': day.isoformat(), **counts} for day, counts in series.items()]
@@ -0,0 +1,13 @@
+"""
+WebSocket URL patterns, mounted by backend/core/asgi.py.
+"""
+
+from django.urls import path
+
+from .consumers import DashboardConsumer
+
+
+websocket_urlpatterns = [
+    # Full URL: ws://127.0.0.1:8000/ws/dashboard/
+    path('ws/dashboard/', DashboardConsumer.as_asgi()),
+]
@@ -0,0 +1,87 @@
+"""
+Indexed full-text search over AreaObservation.analyst_notes and evidence_path.
+
+  * PostgreSQL: an expression GIN index on the same SearchVector used here
+    (migration 0008), matched with websearch_to_tsquery and ranked with ts_rank.
+  * SQLite: an external-content FTS5 table kept in sync by triggers (also
+    migration 0008), ranked with bm25().
+  * Other backends fall back to icontains, newest first, without ranks.
+
+The django.contrib.postgres imports are local so that SQLite setups don't need
+a PostgreSQL driver.
+"""
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import AreaObservation
+
+
+SEARCH_CONFIG = 'english'
+SEARCH_FIELDS = ('analyst_notes', 'evidence_path')
+FTS_TABLE = 'surveillance_app_areaobservation_fts'
+
+
+def search_vector():
+    """The indexed expression; must stay identical to the GIN index in migration 0008."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(*SEARCH_FIELDS, config=SEARCH_CONFIG)
+
+
+def fts5_query(text):
+    """User text as an FTS5 query: every word must match, FTS5 syntax characters are quoted."""
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+def _postgres_query(text):
+    from django.contrib.postgres.search import SearchQuery
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def filter_observations(queryset, text):
+    """Restricts an AreaObservation queryset to rows matching 'text' (unordered)."""
+    if not text.split():
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return queryset.annotate(search=search_vector()).filter(search=_postgres_query(text))
+    if connection.vendor == 'sqlite':
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (fts5_query(text),)
+        ))
+    return queryset.filter(Q(analyst_notes__icontains=text) | Q(evidence_path__icontains=text))
+
+
+def ranked_observations(text, limit=50):
+    """
+    Up to 'limit' (observation, rank) pairs for 'text', best match first. Higher
+    ranks are better; the rank is None on backends without full-text search.
+    """
+    if not text.split():
+        return []
+    queryset = AreaObservation.objects.select_related('camera__area', 'event_type')
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchRank
+        query = _postgres_query(text)
+        matches = (
+            queryset.annotate(search=search_vector(), rank=SearchRank(search_vector(), query))
+            .filter(search=query)
+            .order_by('-rank', '-timestamp')[:limit]
+        )
+        return [(observation, observation.rank) for observation in matches]
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            # bm25() is lower for better matches
+            cursor.execute(
+                f'SELECT rowid, -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+                (fts5_query(text), limit),
+            )
+            ranks = dict(cursor.fetchall())
+        observations = queryset.in_bulk(list(ranks))
+        return [(observations[pk], rank) for pk, rank in ranks.items() if pk in observations]
+
+    matches = filter_observations(queryset, text).order_by('-timestamp')[:limit]
+    return [(observation, None) for observation in matches]
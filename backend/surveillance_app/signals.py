@@ -0,0 +1,123 @@
+"""
+Signal receivers for the surveillance app. Connected in SurveillanceAppConfig.ready().
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from backend.security_app.models import SecurityIncident
+from .analytics import invalidate_on_commit
+from .conditional import incident_changes
+from .consumers import broadcast_incident_alert
+from .lookups import lookup_cache
+from .recent_buffer import recent_incidents
+from .rollups import record_event
+from .spatial import WEAPON_RELATION, record_incident_box, record_observation_box
+from .models import AreaObservation, Camera, EventType, ObjectDetail, SurveillanceArea
+
+
+# --- Lookup Cache Invalidation ---
+
+@receiver([post_save, post_delete], sender=Camera)
+def invalidate_camera_lookups(sender, **kwargs):
+    lookup_cache.invalidate_cameras()
+
+
+@receiver([post_save, post_delete], sender=SurveillanceArea)
+def invalidate_area_lookups(sender, **kwargs):
+    lookup_cache.invalidate_areas()
+
+
+@receiver([post_save, post_delete], sender=EventType)
+def invalidate_event_type_lookups(sender, **kwargs):
+    lookup_cache.invalidate_event_types()
+
+
+# --- Incident Feed Versioning ---
+
+@receiver([post_save, post_delete], sender=SecurityIncident)
+def bump_incident_version(sender, **kwargs):
+    incident_changes.bump()
+
+
+# --- Recent Incident Buffer ---
+# Incidents are added once their transaction commits, so the metrics rows saved
+# alongside them are visible; a later metrics save refreshes the buffered row.
+
+@receiver(post_save, sender=SecurityIncident)
+def buffer_saved_incident(sender, instance, **kwargs):
+    transaction.on_commit(lambda: recent_incidents.record(instance.pk))
+
+
+@receiver(post_delete, sender=SecurityIncident)
+def unbuffer_deleted_incident(sender, instance, **kwargs):
+    recent_incidents.discard(instance.pk)
+
+
+def _connect_metrics_receiver(relation_name):
+    relation = SecurityIncident._meta.get_field(relation_name)
+    incident_attname = relation.field.attname
+
+    def refresh_buffered_incident(sender, instance, **kwargs):
+        incident_id = getattr(instance, incident_attname)
+        transaction.on_commit(lambda: recent_incidents.record(incident_id))
+
+    post_save.connect(
+        refresh_buffered_incident, sender=relation.related_model, weak=False,
+        dispatch_uid=f'surveillance_app.refresh_buffered_incident.{relation_name}',
+    )
+
+
+for _relation_name in ('weapon_metrics', 'crowd_metrics'):
+    _connect_metrics_receiver(_relation_name)
+
+
+# --- Live Dashboard Push ---
+# Registered after buffer_saved_incident, so the buffer already holds the new
+# incident when the status banner is recomputed for the broadcast.
+
+@receiver(post_save, sender=SecurityIncident)
+def push_incident_to_dashboards(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(lambda: broadcast_incident_alert(instance.pk))
+
+
+# --- Daily Rollups ---
+# Bulk ingestion (ingest.py) updates the rollup itself, since bulk_create sends no signals.
+
+@receiver(post_save, sender=SecurityIncident)
+@receiver(post_save, sender=AreaObservation)
+def count_event_in_rollup(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_event(instance.timestamp, instance.event_type_id, instance.camera_id)
+
+
+# --- Analytics Cache ---
+
+@receiver(post_save, sender=SecurityIncident)
+@receiver(post_save, sender=AreaObservation)
+def invalidate_analytics_cache(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        invalidate_on_commit([(instance.timestamp, instance.event_type_id, instance.camera_id)])
+
+
+
+# --- Detection Boxes ---
+# Bulk ingestion (ingest.py) writes DetectionBox rows itself.
+
+@receiver(post_save, sender=ObjectDetail)
+def materialize_observation_box(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_observation_box(instance)
+
+
+def _materialize_incident_box(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_incident_box(instance)
+
+
+post_save.connect(
+    _materialize_incident_box, sender=SecurityIncident._meta.get_field(WEAPON_RELATION).related_model,
+    dispatch_uid='surveillance_app.materialize_incident_box',
+)
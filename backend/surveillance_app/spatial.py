@@ -0,0 +1,204 @@
+"""
+Bounding-box materialization and region queries.
+
+ObjectDetail.bounding_box and the weapon metrics' detection_box are JSON. At
+ingest every box is also written to DetectionBox as numeric x1/y1/x2/y2 columns
+(ingest.py for bulk writes, signals.py for everything else), so a region query
+is an indexed range filter:
+
+    x1 <= region.max_x AND x2 >= region.min_x AND y1 <= region.max_y AND y2 >= region.min_y
+
+Polygons are pre-filtered by their bounding rectangle in SQL and then tested
+exactly with shapely against the few remaining candidates.
+
+Stored boxes also feed the per-camera heatmaps (heatmaps.py).
+"""
+
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from backend.security_app.models import SecurityIncident
+from .filters import filter_events
+from .heatmaps import add_boxes
+from .models import DetectionBox, ObjectDetail
+
+
+WEAPON_RELATION = 'weapon_metrics'
+
+
+def parse_box(value):
+    """(x1, y1, x2, y2) from a stored box ([x1, y1, x2, y2], a dict or a JSON string), or None if unusable."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if isinstance(value, dict):
+        value = [value.get(key) for key in ('x1', 'y1', 'x2', 'y2')]
+    if not isinstance(value, (list, tuple)) or len(value) != 4:
+        return None
+    try:
+        x1, y1, x2, y2 = (float(coordinate) for coordinate in value)
+    except (TypeError, ValueError):
+        return None
+    return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+
+def _box(box, **fields):
+    x1, y1, x2, y2 = box
+    return DetectionBox(x1=x1, y1=y1, x2=x2, y2=y2, **fields)
+
+
+# --- Materialization ---
+
+def boxes_for_details(details):
+    """Unsaved DetectionBox rows for ObjectDetail instances whose observation is loaded."""
+    boxes = []
+    for detail in details:
+        box = parse_box(detail.bounding_box)
+        if box is None:
+            continue
+        observation = detail.observation
+        boxes.append(_box(
+            box, observation=observation, camera_id=observation.camera_id,
+            event_type_id=observation.event_type_id, timestamp=observation.timestamp,
+        ))
+    return boxes
+
+
+def store_boxes(boxes):
+    """Inserts new DetectionBox rows and adds them to the heatmaps."""
+    boxes = DetectionBox.objects.bulk_create(boxes)
+    add_boxes(boxes)
+    return boxes
+
+
+def replace_boxes(existing, boxes):
+    """Swaps the boxes in the 'existing' queryset for 'boxes', keeping the heatmaps in step."""
+    with transaction.atomic():
+        old = list(existing)
+        if old:
+            add_boxes(old, weight=-1)
+            existing.delete()
+        return store_boxes(boxes)
+
+
+def record_observation_box(detail):
+    """Replaces the DetectionBox of one ObjectDetail after it was saved."""
+    replace_boxes(DetectionBox.objects.filter(observation_id=detail.observation_id), boxes_for_details([detail]))
+
+
+def _weapon_relation():
+    return SecurityIncident._meta.get_field(WEAPON_RELATION)
+
+
+def boxes_for_weapon_metrics(metrics_rows):
+    """Unsaved DetectionBox rows for weapon metrics instances (one incident query for all of them)."""
+    incident_attname = _weapon_relation().field.attname
+    metrics_rows = [(metrics, parse_box(metrics.detection_box)) for metrics in metrics_rows]
+    metrics_rows = [(metrics, box) for metrics, box in metrics_rows if box is not None]
+    incidents = SecurityIncident.objects.in_bulk([getattr(metrics, incident_attname) for metrics, _ in metrics_rows])
+
+    boxes = []
+    for metrics, box in metrics_rows:
+        incident = incidents.get(getattr(metrics, incident_attname))
+        if incident is None:
+            continue
+        boxes.append(_box(
+            box, incident=incident, camera_id=incident.camera_id,
+            event_type_id=incident.event_type_id, timestamp=incident.timestamp,
+        ))
+    return boxes
+
+
+def record_incident_box(metrics):
+    """Replaces the DetectionBox of one incident after its weapon metrics were saved."""
+    incident_id = getattr(metrics, _weapon_relation().field.attname)
+    replace_boxes(DetectionBox.objects.filter(incident_id=incident_id), boxes_for_weapon_metrics([metrics]))
+
+
+def backfill_detection_boxes(batch_size=1000):
+    """Creates missing DetectionBox rows for existing events. Returns the number created."""
+    created = 0
+    details = (
+        ObjectDetail.objects.select_related('observation')
+        .filter(bounding_box__isnull=False)
+        .exclude(observation__detection_boxes__isnull=False)
+        .order_by('pk')
+    )
+    weapon_model = _weapon_relation().related_model
+    incident_field = _weapon_relation().field.name
+    weapon_metrics = (
+        weapon_model.objects.filter(detection_box__isnull=False)
+        .exclude(**{f'{incident_field}__detection_boxes__isnull': False})
+        .order_by('pk')
+    )
+    for queryset, build in ((details, boxes_for_details), (weapon_metrics, boxes_for_weapon_metrics)):
+        batch = []
+        for row in queryset.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) == batch_size:
+                created += len(store_boxes(build(batch)))
+                batch = []
+        if batch:
+            created += len(store_boxes(build(batch)))
+    return created
+
+
+# --- Region Queries ---
+
+def parse_region(params):
+    """
+    ((min_x, min_y, max_x, max_y), polygon or None) from ?bbox=x1,y1,x2,y2 or
+    ?polygon=[[x, y], ...] (JSON, at least three points).
+    """
+    if params.get('polygon'):
+        try:
+            points = json.loads(params['polygon'])
+            points = [(float(x), float(y)) for x, y in points]
+        except (ValueError, TypeError):
+            raise ValidationError({'polygon': 'Expected a JSON list of [x, y] points.'})
+        if len(points) < 3:
+            raise ValidationError({'polygon': 'A polygon needs at least three points.'})
+
+        from shapely.geometry import Polygon
+        polygon = Polygon(points)
+        if not polygon.is_valid:
+            raise ValidationError({'polygon': 'The polygon must not intersect itself.'})
+        return polygon.bounds, polygon
+
+    if params.get('bbox'):
+        box = parse_box(params['bbox'].split(','))
+        if box is None:
+            raise ValidationError({'bbox': 'Expected x1,y1,x2,y2.'})
+        return box, None
+
+    raise ValidationError({'bbox': 'Pass either bbox=x1,y1,x2,y2 or polygon=[[x, y], ...].'})
+
+
+def detections_in_region(query, bounds, polygon=None, limit=500):
+    """
+    DetectionBox rows (newest first) matching the time range and event filters in
+    'query' whose box intersects the region. At most 'limit' rows.
+    """
+    min_x, min_y, max_x, max_y = bounds
+    candidates = (
+        filter_events(DetectionBox, query)
+        .filter(x1__lte=max_x, x2__gte=min_x, y1__lte=max_y, y2__gte=min_y)
+        .order_by('-timestamp', '-id')
+    )
+    if polygon is None:
+        return list(candidates[:limit])
+
+    from shapely.geometry import box as shapely_box
+    from shapely.prepared import prep
+    region = prep(polygon)
+    matches = []
+    for detection in candidates.iterator(chunk_size=limit):
+        if region.intersects(shapely_box(detection.x1, detection.y1, detection.x2, detection.y2)):
+            matches.append(detection)
+            if len(matches) == limit:
+                break
+    return matches
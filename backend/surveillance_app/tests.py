@@ -1,2 +1,1684 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gc
+import json
+import tempfile
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from backend.core.channel_layers import UnixSocketChannelLayer
+from backend.security_app.models import SecurityIncident
+from .analytics import AnalyticsCache, analytics_cache
+from .archive import ARCHIVE_TABLES, archived_rows
+from .consumers import DashboardConsumer, current_status
+from .fanout import FanoutHub, dashboard_hub
+from .topics import ALL_TOPIC
+from .video_feed import CameraBroadcaster, TierFeed, VideoFeedRegistry
+from .write_behind import WriteBehindQueue, forget_dropped_observation, write_observations
+from .ingest import find_idempotent_observation, idempotency_cache, ingest_observation_batch, remember_idempotent
+from .lookups import lookup_cache
+from .recent_buffer import recent_incidents
+from .pagination import IncidentListPagination
+from .retention import purge_expired
+from .rollups import add_to_rollup
+from .models import AreaObservation, Camera, DailyEventRollup, DetectionBox, EventType, ObjectDetail, SurveillanceArea
+
+
+# --- Helpers ---
+
+def create_reference_data():
+    """Areas, cameras and event types matching the AI worker simulation in tests/test.py."""
+    entrance = SurveillanceArea.objects.create(name="Main Entrance")
+    parking = SurveillanceArea.objects.create(name="Parking Lot")
+    cameras = [
+        Camera.objects.create(camera_id='CAM001', area=entrance, location_description='North wall'),
+        Camera.objects.create(camera_id='CAM002', area=entrance, location_description='South wall'),
+        Camera.objects.create(camera_id='CAM003', area=parking, location_description='East corner'),
+    ]
+    event_types = {
+        code: EventType.objects.create(code=code, name=name)
+        for code, name in EventType.EVENT_CHOICES
+    }
+    return cameras, event_types
+
+
+def seed_incidents(count, cameras, event_types, start=0):
+    """Bulk-creates incidents start..count-1, alternating WEAPON (with metrics) and CROWD."""
+    incidents = SecurityIncident.objects.bulk_create([
+        SecurityIncident(
+            event_type=event_types['WEAPON'] if i % 2 == 0 else event_types['CROWD'],
+            camera=cameras[i % len(cameras)],
+            incident_level='CRIT' if i % 3 == 0 else 'HIGH',
+            snapshot_url=f'/snapshots/incident_{i}.jpg',
+        )
+        for i in range(start, count)
+    ])
+
+    # Reverse one-to-one relations from SecurityIncident to its metrics tables
+    weapon_relation = SecurityIncident._meta.get_field('weapon_metrics')
+    crowd_relation = SecurityIncident._meta.get_field('crowd_metrics')
+    weapon_relation.related_model.objects.bulk_create([
+        weapon_relation.related_model(**{
+            weapon_relation.field.name: incident,
+            'confidence': 0.9,
+            'weapon_type': 'Knife',
+            'detection_box': [10, 20, 110, 220],
+        })
+        for incident in incidents if incident.event_type.code == 'WEAPON'
+    ])
+    crowd_relation.related_model.objects.bulk_create([
+        crowd_relation.related_model(**{
+            crowd_relation.field.name: incident,
+            'person_count': 40,
+            'density_level': 'High',
+            'avg_velocity': 1.2,
+        })
+        for incident in incidents if incident.event_type.code == 'CROWD'
+    ])
+    return incidents
+
+
+# --- Batch Ingestion ---
+
+class BatchIngestTests(TestCase):
+    """/area-observations/batch/ stores the valid items of a batch with bulk INSERTs."""
+
+    def setUp(self):
+        lookup_cache.clear()
+        idempotency_cache.clear()
+        self.addCleanup(idempotency_cache.clear)
+        self.cameras, self.event_types = create_reference_data()
+        self.url = reverse('surveillance_app:area-observation-batch-api')
+
+    def observation(self, i, **fields):
+        return {
+            'event_type_code': 'UOD' if i % 2 else 'INTRUSION',
+            'camera_id': 'CAM001' if i % 2 else 'CAM003',
+            'evidence_path': f'/snapshots/batch_{i}.jpg',
+            'details': {'confidence': 0.9, 'bounding_box': [10, 20, 110, 220], 'is_human': bool(i % 2)},
+            **fields,
+        }
+
+    def post(self, items):
+        return self.client.post(self.url, items, content_type='application/json')
+
+    def test_all_valid_items_are_created(self):
+        response = self.post({'observations': [self.observation(i) for i in range(4)]})
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data['created'], data['duplicates'], data['failed']), (4, 0, 0))
+        self.assertEqual([result['index'] for result in data['results']], [0, 1, 2, 3])
+        self.assertEqual(AreaObservation.objects.count(), 4)
+        self.assertEqual(ObjectDetail.objects.filter(is_human=True).count(), 2)
+
+    def test_partial_batch_stores_only_the_valid_items(self):
+        items = [
+            self.observation(0),
+            self.observation(1, camera_id='CAM999'),
+            self.observation(2, event_type_code='WEAPON'),
+            self.observation(3),
+        ]
+        response = self.post(items)
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'error', 'error', 'created'])
+        self.assertIn('camera_id', results[1]['errors'])
+        self.assertEqual(
+            sorted(AreaObservation.objects.values_list('evidence_path', flat=True)),
+            ['/snapshots/batch_0.jpg', '/snapshots/batch_3.jpg'],
+        )
+
+    def test_rejected_batches(self):
+        response = self.post([self.observation(0, camera_id='CAM999')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['failed'], 1)
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post({'observation': []}).status_code, 400)
+        with override_settings(SURVEILLANCE_BULK_MAX_ITEMS=2):
+            self.assertEqual(self.post([self.observation(i) for i in range(3)]).status_code, 400)
+        self.assertEqual(AreaObservation.objects.count(), 0)
+
+    def test_observations_and_details_share_one_transaction(self):
+        with mock.patch.object(ObjectDetail.objects, 'bulk_create', side_effect=IntegrityError("detail failed")):
+            with self.assertRaises(IntegrityError):
+                ingest_observation_batch([self.observation(i) for i in range(3)])
+        self.assertEqual(AreaObservation.objects.count(), 0)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        self.post([self.observation(i) for i in range(2)])  # Warms the lookup cache and rollup rows
+        query_counts = []
+        for size in (2, 40):  # Both fit one INSERT per table, even within SQLite's parameter limit
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.post([self.observation(i) for i in range(size)]).status_code, 201)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(AreaObservation.objects.count(), 44)
+
+
+# --- Write-Behind Ingestion ---
+
+@override_settings(SURVEILLANCE_INGEST_MODE='async')
+@mock.patch.object(WriteBehindQueue, '_ensure_started', lambda self: None)  # Tests flush synchronously
+class WriteBehindQueueTests(TestCase):
+    """Async ingestion answers 202/429 and the queue writes batches, retrying failures one by one."""
+
+    def setUp(self):
+        lookup_cache.clear()
+        idempotency_cache.clear()
+        self.addCleanup(idempotency_cache.clear)
+        self.cameras, self.event_types = create_reference_data()
+
+    def post(self, i):
+        return self.client.post(reverse('surveillance_app:area-observation-api'), {
+            'event_type_code': 'UOD', 'camera_id': 'CAM001', 'evidence_path': f'/snapshots/queued_{i}.jpg',
+        }, content_type='application/json')
+
+    def test_accepts_until_full_then_flushes_in_batches(self):
+        write_queue = WriteBehindQueue('test', write_observations, max_size=3, flush_size=2, flush_interval=0.01)
+        with mock.patch('backend.surveillance_app.views.observation_queue', write_queue):
+            self.assertEqual([self.post(i).status_code for i in range(3)], [202, 202, 202])
+            response = self.post(3)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(AreaObservation.objects.count(), 0)
+
+        batch = write_queue._take_batch()
+        self.assertEqual(len(batch), 2)  # flush_size
+        write_queue._flush(batch)
+        write_queue._flush(write_queue._take_batch())
+        self.assertEqual(write_queue._take_batch(), [])
+        self.assertEqual(AreaObservation.objects.count(), 3)
+        stats = write_queue.stats()
+        self.assertEqual(
+            (stats['enqueued'], stats['rejected'], stats['written'], stats['batches'], stats['pending']), (3, 1, 3, 2, 0),
+        )
+
+    def test_failed_batch_is_retried_item_by_item(self):
+        written, dropped = [], []
+
+        def writer(batch):
+            if 'bad' in batch:
+                raise ValueError("bad item")
+            written.extend(batch)
+
+        write_queue = WriteBehindQueue('test', writer, on_drop=dropped.append)
+        write_queue._flush(['a', 'bad', 'b'])
+        self.assertEqual((written, dropped), (['a', 'b'], ['bad']))
+        self.assertEqual((write_queue.written, write_queue.failed, write_queue.batches), (2, 1, 1))
+
+    def test_shutdown_drains_the_queue(self):
+        written = []
+        write_queue = WriteBehindQueue('test', written.extend, flush_size=2)
+        for item in range(5):
+            self.assertTrue(write_queue.submit(item))
+        write_queue.shutdown(timeout=1)
+        self.assertEqual(written, [0, 1, 2, 3, 4])
+        self.assertFalse(write_queue.submit(5))
+
+
+# --- Lookup Cache ---
+
+class LookupCacheTests(TestCase):
+    """Cameras, areas and event types are resolved once, and re-read after they change."""
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.addCleanup(lookup_cache.clear)
+        self.cameras, self.event_types = create_reference_data()
+
+    def test_repeated_ingests_skip_lookup_queries(self):
+        items = [
+            {'event_type_code': code, 'camera_id': camera, 'evidence_path': '/snapshots/x.jpg'}
+            for code, camera in (('UOD', 'CAM001'), ('INTRUSION', 'CAM003'))
+        ]
+        lookup_tables = (Camera._meta.db_table, SurveillanceArea._meta.db_table, EventType._meta.db_table)
+
+        def lookup_queries():
+            with CaptureQueriesContext(connection) as queries:
+                ingest_observation_batch(items)
+            return [
+                query['sql'] for query in queries.captured_queries
+                if query['sql'].startswith('SELECT') and any(f'FROM "{table}"' in query['sql'] for table in lookup_tables)
+            ]
+
+        self.assertEqual(len(lookup_queries()), 2)  # One query for the cameras, one for the event types
+        self.assertEqual(lookup_queries(), [])
+        with self.assertNumQueries(0):
+            camera = lookup_cache.get_camera_by_pk(self.cameras[2].pk)
+            self.assertEqual(camera.area.name, 'Parking Lot')
+            self.assertEqual(lookup_cache.get_event_type('UOD').code, 'UOD')
+            self.assertEqual(lookup_cache.get_area(camera.area_id).name, 'Parking Lot')
+
+    def test_saves_and_deletes_invalidate_entries(self):
+        self.assertEqual(lookup_cache.get_camera('CAM001').location_description, 'North wall')
+        self.cameras[0].location_description = 'Lobby'
+        self.cameras[0].save()
+        self.assertEqual(lookup_cache.get_camera('CAM001').location_description, 'Lobby')
+
+        area = self.cameras[0].area
+        area.name = 'Front Gate'
+        area.save()
+        self.assertEqual(lookup_cache.get_camera('CAM001').area.name, 'Front Gate')
+
+        self.assertIsNotNone(lookup_cache.get_event_type('UOD'))
+        self.event_types['UOD'].delete()
+        self.assertIsNone(lookup_cache.get_event_type('UOD'))
+
+
+# --- Idempotent Ingestion ---
+
+class IdempotentIngestTests(TestCase):
+    """
+    A retried idempotency key returns the original row instead of inserting a
+    second one; 'pending' markers of queued writes never outlive or hide the write.
+    """
+
+    def setUp(self):
+        lookup_cache.clear()
+        idempotency_cache.clear()
+        self.addCleanup(idempotency_cache.clear)
+        self.cameras, self.event_types = create_reference_data()
+        self.url = reverse('surveillance_app:area-observation-api')
+
+    def ingest(self, key):
+        [result] = ingest_observation_batch([{
+            'event_type_code': 'UOD', 'camera_id': 'CAM001', 'evidence_path': '/snapshots/uod_1.jpg', 'idempotency_key': key,
+        }])
+        self.assertEqual(result['status'], 'created')
+        return result
+
+    def retry(self, **kwargs):
+        return self.client.post(self.url, kwargs.pop('data', {}), content_type='application/json', **kwargs)
+
+    def test_retry_is_answered_from_the_cache(self):
+        original = self.ingest('retry-header')
+        with self.assertNumQueries(0):
+            response = self.retry(headers={'Idempotency-Key': 'retry-header'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], original['id'])
+        self.assertEqual(AreaObservation.objects.count(), 1)
+
+        # The same key sent in the body
+        response = self.retry(data={'idempotency_key': 'retry-header', 'camera_id': 'CAM002'})
+        self.assertEqual((response.status_code, response.json()['id']), (200, original['id']))
+
+        # A batch retry reports the item as a duplicate of the stored row
+        [result] = ingest_observation_batch([{
+            'event_type_code': 'UOD', 'camera_id': 'CAM001', 'evidence_path': '/snapshots/uod_1.jpg',
+            'idempotency_key': 'retry-header',
+        }])
+        self.assertEqual((result['status'], result['id']), ('duplicate', original['id']))
+        self.assertEqual(AreaObservation.objects.count(), 1)
+
+    def test_expired_cache_entry_falls_back_to_the_unique_column(self):
+        with mock.patch.object(idempotency_cache, 'ttl', 0):  # Cached entries expire at once
+            original = self.ingest('retry-expired')
+            self.assertIsNone(idempotency_cache.get('retry-expired'))
+            with self.assertNumQueries(1):
+                response = self.retry(headers={'Idempotency-Key': 'retry-expired'})
+        self.assertEqual((response.status_code, response.json()['id']), (200, original['id']))
+        self.assertEqual(AreaObservation.objects.count(), 1)
+
+    def test_pending_marker_falls_back_to_the_database(self):
+        remember_idempotent('retry-1', {'idempotency_key': 'retry-1', 'pending': True})
+        self.assertTrue(find_idempotent_observation('retry-1')['pending'])
+
+        observation = AreaObservation.objects.create(
+            camera=self.cameras[0], event_type=self.event_types['UOD'],
+            evidence_path='/snapshots/uod_1.jpg', idempotency_key='retry-1',
+        )
+        self.assertEqual(find_idempotent_observation('retry-1')['id'], observation.pk)
+
+    def test_dropped_write_forgets_its_marker(self):
+        remember_idempotent('retry-2', {'idempotency_key': 'retry-2', 'pending': True})
+
+        def failing_writer(batch):
+            raise ValueError("constraint violated")
+
+        write_queue = WriteBehindQueue('test', failing_writer, on_drop=forget_dropped_observation)
+        write_queue._flush([({'idempotency_key': 'retry-2'}, self.cameras[0], self.event_types['UOD'])])
+        self.assertEqual(write_queue.failed, 1)
+        self.assertIsNone(find_idempotent_observation('retry-2'))
+
+
+# --- Recent Incidents Query Count ---
+
+class RecentIncidentsQueryCountTests(TestCase):
+    """RecentIncidentsAPIView's query count must stay fixed as the incident table grows."""
+    SIZES = (50, 500, 5000)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+
+    def setUp(self):
+        lookup_cache.clear()
+        # The buffer is process-wide: tests warm it explicitly and drop it afterwards
+        patcher = mock.patch.object(recent_incidents, 'sync_interval', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(recent_incidents.reset)
+        self.url = reverse('surveillance_app:recent-incidents-frontend')
+
+    def get_page(self, num_queries):
+        with self.assertNumQueries(num_queries):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        incidents = response.json()['incidents']
+        self.assertEqual(len(incidents), 50)
+        self.assertTrue(all(i['confidence_score'] is not None for i in incidents))
+
+    def test_database_path_query_count_is_constant(self):
+        # A 10-row window is smaller than a page, so every request falls back to the database
+        with mock.patch.object(recent_incidents, 'capacity', 10):
+            seeded = 0
+            for size in self.SIZES:
+                seed_incidents(size, self.cameras, self.event_types, start=seeded)
+                seeded = size
+                recent_incidents.warm()
+
+                # First request warms the camera/event type lookup cache
+                self.client.get(self.url)
+                self.get_page(1)
+
+    def test_buffered_path_runs_no_queries(self):
+        seeded = 0
+        for size in self.SIZES:
+            seed_incidents(size, self.cameras, self.event_types, start=seeded)
+            seeded = size
+            recent_incidents.warm()
+
+            self.client.get(self.url)
+            self.get_page(0)
+
+    def test_deletes_drop_rows_without_rewarming(self):
+        incidents = seed_incidents(60, self.cameras, self.event_types)
+        with mock.patch.object(recent_incidents, 'capacity', 55):
+            recent_incidents.warm()
+            self.client.get(self.url)
+
+            incidents[-1].delete()
+            SecurityIncident.objects.filter(pk__in=[incident.pk for incident in incidents[:5]]).delete()
+            with self.assertNumQueries(0):
+                response = self.client.get(self.url)
+        ids = [incident['id'] for incident in response.json()['incidents']]
+        self.assertEqual(len(ids), 50)
+        self.assertNotIn(incidents[-1].pk, ids)
+
+
+# --- Keyset Pagination ---
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages, since/after_id polling and parameter validation of the incident feeds."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+        incidents = seed_incidents(230, cls.cameras, cls.event_types)
+        # Shared timestamps, so the id part of the key has to break ties
+        base = timezone.now() - timedelta(hours=1)
+        for i, incident in enumerate(incidents):
+            incident.timestamp = base + timedelta(seconds=i // 3)
+        SecurityIncident.objects.bulk_update(incidents, ['timestamp'])
+        cls.user = User.objects.create_user('analyst', password='secret')
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('surveillance_app:recent-incident-list')
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['id'] for row in response.json()['results']]
+
+    def test_cursor_pages_cover_every_row_once(self):
+        expected = list(SecurityIncident.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        seen, url, pages = [], self.url, 0
+        while url:
+            response = self.client.get(url)
+            seen += self.ids(response)
+            url = response.json()['next']
+            pages += 1
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)  # 100 + 100 + 30 with the list view's default limit
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.ids(self.client.get(self.url, {'limit': 0}))), 1)
+        with mock.patch.object(IncidentListPagination, 'max_limit', 40):
+            self.assertEqual(len(self.ids(self.client.get(self.url, {'limit': 1000}))), 40)
+        self.assertEqual(self.client.get(self.url, {'limit': 'many'}).status_code, 400)
+
+    def test_poll_returns_only_newer_rows(self):
+        poll = self.client.get(self.url, {'limit': 10}).json()['poll']
+        self.assertEqual(self.ids(self.client.get(poll)), [])
+
+        new = seed_incidents(233, self.cameras, self.event_types, start=230)
+        response = self.client.get(poll)
+        self.assertEqual(self.ids(response), sorted((incident.pk for incident in new), reverse=True))
+        self.assertEqual(self.ids(self.client.get(response.json()['poll'])), [])
+
+        # after_id alone works as well
+        self.assertEqual(self.ids(self.client.get(self.url, {'after_id': new[0].pk})), [new[2].pk, new[1].pk])
+
+    def test_invalid_anchors_are_rejected(self):
+        def token(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+        for params in (
+            {'cursor': 'not a cursor!'},
+            {'cursor': token('foo|1')},
+            {'cursor': token('2025-13-45T00:00:00|1')},
+            {'cursor': token('2025-01-01T00:00:00|x')},
+            {'since': 'yesterday'},
+            {'since': '2025-02-30T00:00:00'},
+            {'after_id': 'x'},
+        ):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+        # The buffer-backed frontend feed validates the same way
+        frontend = reverse('surveillance_app:recent-incidents-frontend')
+        self.assertEqual(self.client.get(frontend, {'cursor': token('foo|1')}).status_code, 400)
+
+
+# --- Conditional GET ---
+
+class ConditionalGetTests(TestCase):
+    """ETag / If-None-Match on the polled status and log endpoints."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+
+    def setUp(self):
+        lookup_cache.clear()
+        recent_incidents.reset()
+        seed_incidents(3, self.cameras, self.event_types)
+
+    def create_incident(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SecurityIncident.objects.create(
+                event_type=self.event_types['WEAPON'], camera=self.cameras[0], incident_level='CRIT',
+            )
+
+    def assertNotModified(self, url, etag):
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_logs_etag_changes_with_incidents(self):
+        url = reverse('event-logs')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag)
+        self.assertNotModified(url, etag)
+
+        incident = self.create_incident()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['id'], incident.pk)
+
+        # An update of an existing incident changes it as well
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            incident.is_resolved = True
+            incident.save()
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    @override_settings(SURVEILLANCE_ALERT_WINDOW_SECONDS=30)
+    def test_status_etag_changes_when_the_alert_expires(self):
+        url = reverse('latest-status')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['status_level'], 'ALERT')
+        etag = response['ETag']
+        self.assertNotModified(url, etag)
+
+        # No new incident, but the alert window has run out
+        later = timezone.now() + timedelta(seconds=31)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['status_level'], 'ALERT')
+        self.assertNotEqual(response['ETag'], etag)
+
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            self.assertNotModified(url, response['ETag'])
+        self.create_incident()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_validators_are_dropped_for_multi_process_deployments(self):
+        url = reverse('latest-status')
+        etag = self.client.get(url)['ETag']
+        with override_settings(SURVEILLANCE_CONDITIONAL_GET=False):
+            for url in (url, reverse('event-logs'), reverse('surveillance_app:recent-incidents-frontend')):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE=http_date())
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(response.has_header('ETag'))
+                self.assertFalse(response.has_header('Last-Modified'))
+
+
+# --- Query Plan Checks ---
+
+class QueryPlanIndexTests(TestCase):
+    """
+    Seeds large observation and incident tables and checks with EXPLAIN that the
+    planner uses the indexes from migration 0006 for the production query shapes.
+    """
+    ROWS = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, event_types = create_reference_data()
+        statuses = ['RESOLVED'] * 8 + ['NEW', 'INVESTIGATING']
+        AreaObservation.objects.bulk_create([
+            AreaObservation(
+                camera=cls.cameras[i % len(cls.cameras)],
+                event_type=event_types['UOD'] if i % 2 else event_types['INTRUSION'],
+                status=statuses[i % len(statuses)],
+                evidence_path=f'/snapshots/uod_{i}.jpg',
+            )
+            for i in range(cls.ROWS)
+        ], batch_size=2000)
+
+        incidents = seed_incidents(cls.ROWS, cls.cameras, event_types)
+        # Most incidents are resolved; the partial index only covers the newest 500
+        unresolved = [incident.pk for incident in incidents[-500:]]
+        SecurityIncident.objects.exclude(pk__in=unresolved).update(is_resolved=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"Expected {index_name} in plan:\n{plan}")
+
+    def test_latest_observations_by_camera(self):
+        queryset = AreaObservation.objects.filter(camera=self.cameras[1]).order_by('-timestamp')[:20]
+        self.assertUsesIndex(queryset, 'areaobs_camera_ts_idx')
+
+    def test_new_observations_by_timestamp(self):
+        queryset = AreaObservation.objects.filter(status='NEW').order_by('-timestamp')[:50]
+        self.assertUsesIndex(queryset, 'areaobs_status_ts_idx')
+
+    def test_unresolved_incidents_by_timestamp(self):
+        queryset = SecurityIncident.objects.filter(is_resolved=False).order_by('-timestamp', '-id')[:100]
+        self.assertUsesIndex(queryset, 'incident_unresolved_ts_idx')
+
+
+# --- Time-Bucketed Analytics ---
+
+class AnalyticsTimeseriesTests(TestCase):
+    """Bucketed counts for /api/analytics/timeseries/ across both event tables."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+        cls.base = timezone.make_aware(datetime(2025, 10, 20, 9, 0))
+
+        incidents = seed_incidents(6, cls.cameras, cls.event_types)
+        for i, incident in enumerate(incidents):
+            incident.timestamp = cls.base + timedelta(minutes=20 * i)
+        SecurityIncident.objects.bulk_update(incidents, ['timestamp'])
+
+        observation = AreaObservation.objects.create(
+            camera=cls.cameras[2], event_type=cls.event_types['UOD'],
+            evidence_path='/snapshots/uod_0.jpg',
+        )
+        AreaObservation.objects.filter(pk=observation.pk).update(timestamp=cls.base + timedelta(minutes=5))
+
+    def setUp(self):
+        lookup_cache.clear()
+        analytics_cache.clear()
+        self.addCleanup(analytics_cache.clear)
+        self.url = reverse('analytics-timeseries')
+
+    def get_series(self, **params):
+        params.setdefault('start', self.base.isoformat())
+        params.setdefault('end', (self.base + timedelta(hours=3)).isoformat())
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()
+        return list(zip(data['time'], data['event_type'], data['count']))
+
+    def test_hourly_buckets_merge_both_tables(self):
+        rows = self.get_series(bucket='hour')
+        first_hour = self.base.isoformat()
+        second_hour = (self.base + timedelta(hours=1)).isoformat()
+        self.assertEqual(rows, [
+            (first_hour, 'WEAPON', 2), (first_hour, 'CROWD', 1), (first_hour, 'UOD', 1),
+            (second_hour, 'WEAPON', 1), (second_hour, 'CROWD', 2),
+        ])
+
+    def test_filters_by_event_type_and_area(self):
+        self.assertEqual(self.get_series(bucket='day', event_type='crowd'), [(self.base.replace(hour=0).isoformat(), 'CROWD', 3)])
+        parking = self.cameras[2].area
+        rows = self.get_series(bucket='minute', area=parking.name)
+        self.assertEqual([code for _, code, _ in rows], ['UOD', 'WEAPON', 'CROWD'])
+
+    def test_rejects_unknown_bucket_and_oversized_range(self):
+        self.assertEqual(self.client.get(self.url, {'bucket': 'fortnight'}).status_code, 400)
+        response = self.client.get(self.url, {'bucket': 'minute', 'start': '2024-01-01', 'end': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_until_an_event_lands_in_range(self):
+        rows = self.get_series(bucket='hour', event_type='WEAPON')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_series(bucket='hour', event_type='WEAPON'), rows)
+
+        # A CROWD incident is outside the filter and leaves the entry in place
+        with self.captureOnCommitCallbacks(execute=True):
+            SecurityIncident.objects.create(event_type=self.event_types['CROWD'], camera=self.cameras[0])
+        with self.assertNumQueries(0):
+            self.get_series(bucket='hour', event_type='WEAPON')
+
+    def test_new_events_only_visit_entries_of_their_day(self):
+        self.get_series(bucket='hour')  # 2025-10-20: closed, indexed under that day
+        self.client.get(self.url, {'bucket': 'hour'})  # Last 7 days up to now
+        historical = [key for key in analytics_cache._cache.keys() if key[0] == self.base]
+
+        covers = mock.Mock(side_effect=AnalyticsCache._covers)
+        with mock.patch.object(AnalyticsCache, '_covers', covers):
+            with self.captureOnCommitCallbacks(execute=True):
+                ingest_observation_batch([
+                    {'event_type_code': 'UOD', 'camera_id': 'CAM001', 'evidence_path': f'/snapshots/uod_{i}.jpg'}
+                    for i in range(50)
+                ])
+        visited = {call.args[0] for call in covers.call_args_list}
+        self.assertTrue(visited)
+        self.assertFalse(visited & set(historical))
+        self.assertLessEqual(covers.call_count, 2 * len(visited))  # The batch collapses to one or two distinct events
+        self.assertIn(historical[0], analytics_cache._cache.keys())
+
+    def test_reports_the_start_of_the_first_bucket(self):
+        response = self.client.get(self.url, {
+            'bucket': 'hour', 'start': (self.base + timedelta(minutes=10)).isoformat(),
+            'end': (self.base + timedelta(hours=3)).isoformat(),
+        })
+        data = response.json()
+        self.assertEqual(data['start'], self.base.isoformat())
+        self.assertEqual(data['time'][0], data['start'])
+
+    def test_default_range_is_served_from_cache(self):
+        # No start/end: the last 7 days up to now, which moves between requests
+        first = self.client.get(self.url, {'bucket': 'hour'})
+        time.sleep(0.01)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {'bucket': 'hour'})
+        self.assertEqual(second.json()['count'], first.json()['count'])
+        self.assertEqual(analytics_cache.stats()['size'], 2)  # The closed hours and the current one
+
+    def test_purge_clears_cached_counts(self):
+        self.get_series(bucket='hour')
+        purge_expired(policies={'CROWD': 1})
+        self.assertEqual(analytics_cache.stats()['size'], 0)
+
+    def test_new_event_recomputes_the_current_bucket(self):
+        now = timezone.now()
+        window = {'bucket': 'hour', 'event_type': 'WEAPON',
+                  'start': (now - timedelta(hours=2)).isoformat(), 'end': (now + timedelta(hours=1)).isoformat()}
+        self.assertEqual(self.get_series(**window), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SecurityIncident.objects.create(event_type=self.event_types['WEAPON'], camera=self.cameras[0])
+        rows = self.get_series(**window)
+        self.assertEqual([count for _, _, count in rows], [1])
+
+
+class DailyRollupTests(TestCase):
+    """DailyEventRollup increments at ingest, rebuild_rollups and /api/analytics/."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.today = timezone.localdate()
+
+    def rollup(self):
+        return {
+            (row['day'], row['event_type__code'], row['camera__camera_id']): row['total']
+            for row in DailyEventRollup.objects.values('day', 'event_type__code', 'camera__camera_id')
+            .annotate(total=Sum('count'))
+        }
+
+    def analytics(self, **params):
+        response = self.client.get(reverse('analytics'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_signals_and_bulk_ingest_increment_the_rollup(self):
+        SecurityIncident.objects.create(event_type=self.event_types['WEAPON'], camera=self.cameras[0])
+        AreaObservation.objects.create(
+            camera=self.cameras[2], event_type=self.event_types['UOD'], evidence_path='/snapshots/uod.jpg',
+        )
+        ingest_observation_batch([
+            {'event_type_code': code, 'camera_id': camera, 'evidence_path': '/snapshots/x.jpg'}
+            for code, camera in (('UOD', 'CAM001'), ('UOD', 'CAM001'), ('INTRUSION', 'CAM003'))
+        ])
+        self.assertEqual(self.rollup(), {
+            (self.today, 'WEAPON', 'CAM001'): 1,
+            (self.today, 'UOD', 'CAM003'): 1,
+            (self.today, 'UOD', 'CAM001'): 2,
+            (self.today, 'INTRUSION', 'CAM003'): 1,
+        })
+        self.assertEqual(DailyEventRollup.objects.count(), 4)  # One row per (day, type, camera)
+
+    def test_rows_without_camera_are_summed_on_read(self):
+        weapon = self.event_types['WEAPON']
+        # NULL cameras don't collide in the unique constraint, so concurrent first inserts can duplicate them
+        DailyEventRollup.objects.create(day=self.today, event_type=weapon, camera=None, count=2)
+        DailyEventRollup.objects.create(day=self.today, event_type=weapon, camera=None, count=3)
+        DailyEventRollup.objects.create(day=self.today, event_type=weapon, camera=self.cameras[0], count=1)
+        # Later events are counted once, not once per duplicate
+        add_to_rollup(self.today, weapon.pk, None)
+
+        yesterday, today = self.analytics(days=2)
+        self.assertEqual(today, {'date': self.today.isoformat(), 'weapon': 7, 'overcrowding': 0, 'uod': 0, 'intrusion': 0})
+        self.assertEqual(yesterday['weapon'], 0)
+
+    def test_rebuild_replaces_rows_from_raw_events(self):
+        seed_incidents(5, self.cameras, self.event_types)  # bulk_create: no signals, nothing counted
+        DailyEventRollup.objects.create(day=self.today, event_type=self.event_types['UOD'], camera=None, count=99)
+
+        out = StringIO()
+        call_command('rebuild_rollups', days=1, stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        [today] = self.analytics(days=1)
+        self.assertEqual((today['weapon'], today['overcrowding'], today['uod']), (3, 2, 0))
+
+    def test_endpoint_parameters(self):
+        rows = self.analytics()
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[-1]['date'], self.today.isoformat())
+        self.assertEqual(len(self.analytics(days=5000)), 366)
+        self.assertEqual(self.client.get(reverse('analytics'), {'days': 'week'}).status_code, 400)
+
+
+# --- Cold Archive ---
+
+class ArchiveEventsTests(TestCase):
+    """archive_events moves old months to files; analytics reads them back transparently."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+        cls.old = timezone.make_aware(datetime(2025, 3, 10, 12, 0))
+
+        incidents = seed_incidents(4, cls.cameras, cls.event_types)
+        for incident in incidents:
+            incident.timestamp = cls.old
+        SecurityIncident.objects.bulk_update(incidents, ['timestamp'])
+
+        observation = AreaObservation.objects.create(
+            camera=cls.cameras[2], event_type=cls.event_types['UOD'], evidence_path='/snapshots/uod_old.jpg',
+        )
+        AreaObservation.objects.filter(pk=observation.pk).update(timestamp=cls.old)
+        # Stays hot: the current month is never archived
+        SecurityIncident.objects.create(event_type=cls.event_types['WEAPON'], camera=cls.cameras[0])
+
+    def setUp(self):
+        lookup_cache.clear()
+        analytics_cache.clear()
+        self.addCleanup(analytics_cache.clear)
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        settings_override = override_settings(SURVEILLANCE_ARCHIVE_ROOT=archive_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def series(self):
+        response = self.client.get(reverse('analytics-timeseries'), {
+            'bucket': 'week', 'start': '2025-01-01', 'end': (timezone.now() + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return list(zip(data['time'], data['event_type'], data['count']))
+
+    def test_archive_round_trip(self):
+        before = self.series()
+        call_command('archive_events', keep_months=1, stdout=StringIO())
+
+        self.assertEqual(SecurityIncident.objects.count(), 1)
+        self.assertEqual(AreaObservation.objects.count(), 0)
+        self.assertEqual([month.month for month in ARCHIVE_TABLES['incidents'].archived_months()], [3])
+
+        analytics_cache.clear()
+        self.assertEqual(self.series(), before)
+
+        rows = list(archived_rows(ARCHIVE_TABLES['incidents'], self.old, self.old + timedelta(hours=1)))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['timestamp'], self.old)
+        self.assertEqual(rows[0]['weapon_metrics__detection_box'], [10, 20, 110, 220])
+        self.assertIsNone(rows[1]['weapon_metrics__id'])
+        self.assertEqual(rows[1]['crowd_metrics__person_count'], 40)
+
+    def test_month_is_archived_in_bounded_parts(self):
+        before = self.series()
+        table = ARCHIVE_TABLES['incidents']
+        month = timezone.make_aware(datetime(2025, 3, 1))
+        hot_rows = list(table.hot_rows(month, month + timedelta(days=31)))
+
+        with override_settings(SURVEILLANCE_ARCHIVE_PART_ROWS=3):
+            call_command('archive_events', keep_months=1, stdout=StringIO())
+
+        self.assertEqual([len(table.load(path, ['id'])['id']) for path in table.parts(month)], [3, 1])
+        analytics_cache.clear()
+        self.assertEqual(self.series(), before)
+
+        # A run interrupted before its deletes committed does not archive the rows twice
+        self.assertEqual(table.write_part(month, hot_rows), 0)
+        self.assertEqual(len(table.parts(month)), 2)
+        self.assertEqual(len(list(archived_rows(table, self.old, self.old + timedelta(hours=1)))), 4)
+
+
+# --- Retention ---
+
+@override_settings(SURVEILLANCE_RETENTION_DAYS={'WEAPON': 365, 'CROWD': 30})
+class PurgeEventsTests(TestCase):
+    """purge_events applies per-type retention in batches and removes snapshot files."""
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.cameras, self.event_types = create_reference_data()
+        snapshot_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(snapshot_dir.cleanup)
+        self.snapshot_root = Path(snapshot_dir.name)
+        settings_override = override_settings(SNAPSHOT_ROOT=snapshot_dir.name, SURVEILLANCE_ARCHIVE_ROOT=snapshot_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # 6 incidents aged 100 days: 3 WEAPON (kept for a year) and 3 CROWD (expired)
+        self.incidents = seed_incidents(6, self.cameras, self.event_types)
+        SecurityIncident.objects.update(timestamp=timezone.now() - timedelta(days=100))
+        for incident in self.incidents:
+            (self.snapshot_root / incident.snapshot_url.rsplit('/', 1)[-1]).write_bytes(b'jpeg')
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command('purge_events', *args, '--batch-size=2', '--pause=0', stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        output = self.purge('--dry-run')
+        self.assertIn('incidents CROWD', output)
+        self.assertIn('would delete 3 rows, 3 files', output)
+        self.assertEqual(SecurityIncident.objects.count(), 6)
+        self.assertEqual(len(list(self.snapshot_root.glob('*.jpg'))), 6)
+
+    def test_purges_expired_types_with_their_snapshots(self):
+        self.purge()
+        self.assertEqual(
+            sorted(SecurityIncident.objects.values_list('event_type__code', flat=True)), ['WEAPON'] * 3,
+        )
+        crowd_relation = SecurityIncident._meta.get_field('crowd_metrics')
+        self.assertFalse(crowd_relation.related_model.objects.exists())
+        self.assertEqual(len(list(self.snapshot_root.glob('*.jpg'))), 3)
+
+    def test_keeps_snapshots_still_referenced_by_retained_rows(self):
+        weapon, crowd = self.incidents[0], self.incidents[1]
+        (self.snapshot_root / crowd.snapshot_url.rsplit('/', 1)[-1]).unlink()
+        SecurityIncident.objects.filter(pk=crowd.pk).update(snapshot_url=weapon.snapshot_url)
+        AreaObservation.objects.create(
+            camera=self.cameras[0], event_type=self.event_types['UOD'], evidence_path=self.incidents[3].snapshot_url,
+        )
+
+        self.purge()
+        self.assertEqual(SecurityIncident.objects.count(), 3)
+        remaining = sorted(path.name for path in self.snapshot_root.glob('*.jpg'))
+        expected = sorted(incident.snapshot_url.rsplit('/', 1)[-1] for incident in self.incidents[:5] if incident is not crowd)
+        self.assertEqual(remaining, expected)  # CROWD incident 3's file is still an observation's evidence
+
+
+# --- Export ---
+
+class EventExportTests(TestCase):
+    """Streaming CSV/NDJSON export of incidents."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+        seed_incidents(1200, cls.cameras, cls.event_types)
+        cls.user = User.objects.create_user('compliance', password='secret')
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('surveillance_app:event-export')
+
+    def test_csv_streams_in_chunks(self):
+        response = self.client.get(self.url, {'event_type': 'WEAPON'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        chunks = list(response.streaming_content)
+        # Header, then 600 rows in chunks of 500
+        self.assertEqual(len(chunks), 3)
+        rows = list(csv.DictReader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual(len(rows), 600)
+        self.assertEqual(rows[0]['event_type'], 'WEAPON')
+        self.assertEqual(rows[0]['area'], 'Main Entrance')
+        self.assertEqual(json.loads(rows[0]['weapon_metrics__detection_box']), [10, 20, 110, 220])
+
+    def test_ndjson_with_camera_filter(self):
+        response = self.client.get(self.url, {'output': 'ndjson', 'camera': 'CAM003'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 400)
+        record = json.loads(lines[0])
+        self.assertEqual(record['camera'], 'CAM003')
+        self.assertEqual(record['area'], 'Parking Lot')
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+
+# --- Full-Text Search ---
+
+class ObservationSearchTests(TestCase):
+    """Indexed search over analyst notes and evidence paths (FTS5 on SQLite, GIN on PostgreSQL)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, event_types = create_reference_data()
+        notes = [
+            'Black backpack left near the north gate',
+            'Backpack removed by owner, backpack owner identified',
+            'Person climbing the parking fence',
+            None,
+        ]
+        cls.observations = [
+            AreaObservation.objects.create(
+                camera=cls.cameras[i % len(cls.cameras)], event_type=event_types['UOD'],
+                evidence_path=f'/snapshots/uod_{i}.jpg', analyst_notes=note,
+            )
+            for i, note in enumerate(notes)
+        ]
+        cls.user = User.objects.create_superuser('analyst', password='secret')
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.client.force_login(self.user)
+
+    def search(self, text):
+        response = self.client.get(reverse('surveillance_app:area-observation-search'), {'q': text})
+        self.assertEqual(response.status_code, 200)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_ranked_results(self):
+        first, second, third, _ = self.observations
+        # The note mentioning 'backpack' twice ranks first
+        self.assertEqual(self.search('backpack'), [second.id, first.id])
+        self.assertEqual(self.search('parking fence'), [third.id])
+        self.assertEqual(self.search('helicopter'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        fourth = self.observations[3]
+        fourth.analyst_notes = 'Suitcase next to the fence'
+        fourth.save()
+        self.assertEqual(sorted(self.search('fence')), sorted([self.observations[2].id, fourth.id]))
+        fourth.delete()
+        self.assertEqual(self.search('suitcase'), [])
+
+    def test_admin_search(self):
+        response = self.client.get(reverse('admin:surveillance_app_areaobservation_changelist'), {'q': 'backpack'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+
+# --- Spatial Region Queries ---
+
+class DetectionRegionTests(TestCase):
+    """Bounding boxes are materialized at ingest and queried by rectangle or polygon."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+        cls.user = User.objects.create_user('analyst', password='secret')
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('surveillance_app:detection-region')
+        boxes = {
+            'door': [100, 50, 200, 300],      # Doorway on the left of the frame
+            'corner': [600, 400, 640, 480],   # Bottom-right corner
+            'diagonal': [350, 0, 420, 60],    # Inside the doorway polygon's bounding box, outside the polygon
+        }
+        items = [
+            {'event_type_code': 'UOD', 'camera_id': 'CAM002', 'evidence_path': f'/snapshots/{name}.jpg',
+             'details': {'bounding_box': box, 'confidence': 0.8}}
+            for name, box in boxes.items()
+        ]
+        results = ingest_observation_batch(items)
+        self.ids = {name: result['id'] for name, result in zip(boxes, results)}
+
+    def region(self, **params):
+        response = self.client.get(self.url, {'camera': 'CAM002', **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(result['source_id'] for result in response.json()['results'])
+
+    def test_rectangle(self):
+        self.assertEqual(self.region(bbox='150,100,180,120'), [self.ids['door']])
+        self.assertEqual(self.region(bbox='0,0,640,480'), sorted(self.ids.values()))
+        self.assertEqual(self.region(bbox='0,0,640,480', camera='CAM001'), [])
+
+    def test_polygon(self):
+        # Triangle whose bounding box covers 'diagonal', though the triangle itself does not
+        polygon = json.dumps([[0, 0], [0, 400], [400, 400]])
+        self.assertEqual(self.region(polygon=polygon), [self.ids['door']])
+
+    def test_saved_detail_is_materialized(self):
+        detail = AreaObservation.objects.get(pk=self.ids['corner']).detail
+        detail.bounding_box = [10, 10, 20, 20]
+        detail.save()
+        self.assertEqual(self.region(bbox='0,0,30,30'), [self.ids['corner']])
+        self.assertEqual(DetectionBox.objects.filter(observation_id=self.ids['corner']).count(), 1)
+
+    def test_rejects_missing_region(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+
+# --- Heatmaps ---
+
+@override_settings(SURVEILLANCE_HEATMAP={'GRID': (4, 3), 'FRAME_SIZE': (400, 300)})
+class CameraHeatmapTests(TestCase):
+    """Daily heatmaps follow ingest and are merged by the heatmap API without touching events."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+        cls.user = User.objects.create_user('analyst', password='secret')
+
+    def setUp(self):
+        lookup_cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('surveillance_app:camera-heatmap', args=['CAM001'])
+
+    def ingest(self, *boxes, event_type='UOD'):
+        return ingest_observation_batch([
+            {'event_type_code': event_type, 'camera_id': 'CAM001', 'evidence_path': '/snapshots/x.jpg',
+             'details': {'bounding_box': box}}
+            for box in boxes
+        ])
+
+    def heatmap(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_centers_and_coverage(self):
+        # Cells are 100 x 100 px: a small box in the top-left cell, a large one over the right half
+        self.ingest([10, 10, 50, 50], [210, 10, 390, 290])
+        self.ingest([20, 20, 40, 40], event_type='INTRUSION')
+
+        data = self.heatmap()
+        self.assertEqual(data['detections'], 3)
+        self.assertEqual(data['grid'], [[2, 0, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]])
+        self.assertEqual(self.heatmap(event_type='UOD')['grid'][0][0], 1)
+
+        coverage = self.heatmap(mode='coverage')['grid']
+        self.assertEqual(coverage, [[2, 0, 1, 1], [0, 0, 1, 1], [0, 0, 1, 1]])
+
+    def test_reads_stored_grids_only(self):
+        self.ingest([10, 10, 50, 50])
+        self.client.get(self.url)  # Warms the camera lookup cache
+        with self.assertNumQueries(3):  # Session, user, heatmap rows
+            self.assertEqual(self.heatmap()['detections'], 1)
+
+    def test_replaced_box_moves_on_the_grid(self):
+        result, = self.ingest([10, 10, 50, 50])
+        detail = AreaObservation.objects.get(pk=result['id']).detail
+        detail.bounding_box = [310, 210, 350, 250]
+        detail.save()
+        grid = self.heatmap()['grid']
+        self.assertEqual(grid[0][0], 0)
+        self.assertEqual(grid[2][3], 1)
+
+    def test_rebuild_matches_incremental(self):
+        self.ingest([10, 10, 50, 50], [210, 10, 390, 290])
+        before = self.heatmap(mode='coverage')
+        today = timezone.localdate().isoformat()
+        call_command('rebuild_heatmaps', start=today, end=today, stdout=StringIO())
+        self.assertEqual(self.heatmap(mode='coverage'), before)
+
+
+class DashboardPushTests(TestCase):
+    """The dashboard WebSocket sends one snapshot, then only deltas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+
+    def setUp(self):
+        lookup_cache.clear()
+        recent_incidents.reset()
+
+    def create_incident(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SecurityIncident.objects.create(
+                event_type=self.event_types['WEAPON'], camera=self.cameras[2],
+                incident_level='CRIT', snapshot_url='/snapshots/pushed.jpg',
+            )
+
+    def test_snapshot_then_deltas(self):
+        seed_incidents(3, self.cameras, self.event_types)
+
+        @async_to_sync
+        async def scenario():
+            communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), '/ws/dashboard/')
+            await communicator.connect()
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['type'], 'snapshot')
+            self.assertEqual(len(snapshot['logs']), 3)
+            self.assertEqual(snapshot['status']['status_level'], 'ALERT')
+
+            incident = await database_sync_to_async(self.create_incident)()
+            log = await communicator.receive_json_from()
+            self.assertEqual(log, {'type': 'log', 'row': {
+                'id': incident.pk, 'timestamp': incident.timestamp.isoformat(), 'label': 'Weapon Detection',
+                'confidence': None, 'snapshot_path': 'pushed.jpg',
+            }})
+            status = await communicator.receive_json_from()
+            self.assertEqual(status['type'], 'status')
+            self.assertEqual(status['status']['message'], 'WEAPON DETECTION DETECTED ON CAM003')
+
+            self.assertTrue(await communicator.receive_nothing())  # Idle: nothing is sent
+            await communicator.disconnect()
+
+        scenario()
+
+    @override_settings(SURVEILLANCE_ALERT_WINDOW_SECONDS=0.2)
+    def test_alert_falls_back_to_ok(self):
+        self.create_incident()
+
+        @async_to_sync
+        async def scenario():
+            communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), '/ws/dashboard/')
+            await communicator.connect()
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['status']['status_level'], 'ALERT')
+            status = await communicator.receive_json_from(timeout=2)
+            self.assertEqual(status['status']['status_level'], 'OK')
+            await communicator.disconnect()
+
+        scenario()
+
+
+class LiveSubscriptionTests(TestCase):
+    """Live clients only receive incidents from the cameras, types and levels they subscribed to."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+
+    def setUp(self):
+        lookup_cache.clear()
+        recent_incidents.reset()
+
+    def create_incident(self, camera, code='WEAPON', level='HIGH'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SecurityIncident.objects.create(
+                event_type=self.event_types[code], camera=camera, incident_level=level,
+            )
+
+    async def connect(self, path='/ws/dashboard/'):
+        communicator = WebsocketCommunicator(DashboardConsumer.as_asgi(), path)
+        await communicator.connect()
+        return communicator, await communicator.receive_json_from()
+
+    def test_camera_in_query_string(self):
+        seed_incidents(6, self.cameras, self.event_types)
+        parking = self.cameras[2]
+
+        @async_to_sync
+        async def scenario():
+            communicator, snapshot = await self.connect('/ws/dashboard/?camera=CAM003')
+            self.assertEqual(snapshot['subscription'], {'cameras': ['CAM003'], 'areas': []})
+            self.assertEqual(len(snapshot['logs']), 2)
+            self.assertIn('CAM003', snapshot['status']['message'])
+
+            await database_sync_to_async(self.create_incident)(self.cameras[0])
+            self.assertTrue(await communicator.receive_nothing())
+
+            incident = await database_sync_to_async(self.create_incident)(parking)
+            log = await communicator.receive_json_from()
+            self.assertEqual(log['row']['id'], incident.pk)
+            await communicator.disconnect()
+
+        scenario()
+
+    def test_subscribe_message(self):
+        @async_to_sync
+        async def scenario():
+            communicator, _ = await self.connect()
+            await communicator.send_json_to({
+                'action': 'subscribe', 'areas': ['Parking Lot'], 'event_types': ['weapon'], 'min_level': 'CRIT',
+            })
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['type'], 'snapshot')
+            self.assertEqual(snapshot['subscription']['min_level'], 'CRIT')
+
+            parking = self.cameras[2]
+            await database_sync_to_async(self.create_incident)(parking, level='HIGH')
+            await database_sync_to_async(self.create_incident)(parking, code='CROWD', level='CRIT')
+            await database_sync_to_async(self.create_incident)(self.cameras[0], level='CRIT')
+            self.assertTrue(await communicator.receive_nothing())
+
+            incident = await database_sync_to_async(self.create_incident)(parking, level='CRIT')
+            self.assertEqual((await communicator.receive_json_from())['row']['id'], incident.pk)
+            status = await communicator.receive_json_from()
+            self.assertEqual(status['status']['incident']['id'], incident.pk)
+
+            await communicator.send_json_to({'action': 'subscribe', 'cameras': ['CAM999']})
+            error = await communicator.receive_json_from()
+            self.assertEqual(error['type'], 'error')
+            await communicator.disconnect()
+
+        scenario()
+
+    def test_unknown_topic_closes_connection(self):
+        @async_to_sync
+        async def scenario():
+            communicator, error = await self.connect('/ws/dashboard/?min_level=SEVERE')
+            self.assertEqual(error['type'], 'error')
+            self.assertEqual((await communicator.receive_output())['type'], 'websocket.close')
+
+        scenario()
+
+
+class UnixSocketChannelLayerTests(TestCase):
+    """Two layer instances sharing a socket directory behave like two worker processes."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def test_group_send_and_send_cross_processes(self):
+        @async_to_sync
+        async def scenario():
+            first, second = UnixSocketChannelLayer(path=self.path), UnixSocketChannelLayer(path=self.path)
+            one, two = await first.new_channel(), await second.new_channel()
+            await first.group_add('live.all.all.all', one)
+            await second.group_add('live.all.all.all', two)
+
+            await first.group_send('live.all.all.all', {'type': 'dashboard.incident', 'seq': 1})
+            for layer, channel in ((first, one), (second, two)):
+                self.assertEqual(await asyncio.wait_for(layer.receive(channel), 2), {'type': 'dashboard.incident', 'seq': 1})
+
+            await second.send(one, {'type': 'direct'})
+            self.assertEqual(await asyncio.wait_for(first.receive(one), 2), {'type': 'direct'})
+
+            # A process that went away leaves nothing behind for the others
+            await second.close()
+            await first.group_send('live.all.all.all', {'type': 'dashboard.incident', 'seq': 2})
+            self.assertEqual(await asyncio.wait_for(first.receive(one), 2), {'type': 'dashboard.incident', 'seq': 2})
+            await first.close()
+
+        scenario()
+        self.assertEqual(list(Path(self.path).iterdir()), [])
+
+    def start_loop(self):
+        """A long-lived event loop on its own thread, like a worker's serving loop."""
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(2)
+            loop.close()
+
+        self.addCleanup(stop)
+        return lambda coroutine: asyncio.run_coroutine_threadsafe(coroutine, loop).result(3)
+
+    def test_sync_group_sends_close_their_connections(self):
+        receiver, sender = UnixSocketChannelLayer(path=self.path), UnixSocketChannelLayer(path=self.path)
+        served = []  # Server side of every connection the receiver accepted
+        serve = receiver._serve
+
+        async def track(name, reader, writer):
+            served.append(writer)
+            await serve(name, reader, writer)
+
+        receiver._serve = track
+        # Channels created on two long-lived loops of one process both keep receiving
+        on_first, on_second = self.start_loop(), self.start_loop()
+        channels = []
+        for run in (on_first, on_second):
+            channel = run(receiver.new_channel())
+            run(receiver.group_add('live.all.all.all', channel))
+            channels.append(channel)
+        self.addCleanup(on_first, receiver.close())
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            # What broadcast_incident_alert does from sync ingest code: a fresh event loop per call
+            for seq in (1, 2):
+                async_to_sync(sender.group_send)('live.all.all.all', {'type': 'dashboard.incident', 'seq': seq})
+            for run, channel in zip((on_first, on_second), channels):
+                received = [run(asyncio.wait_for(receiver.receive(channel), 2))['seq'] for _ in range(2)]
+                self.assertEqual(received, [1, 2])
+            gc.collect()
+
+        self.assertEqual(len(served), 4)  # One short-lived connection per call and receiving socket
+        deadline = time.monotonic() + 2  # The receiver closes its side once it reads the sender's EOF
+        while not all(writer.is_closing() for writer in served) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(all(writer.is_closing() for writer in served))
+        self.assertEqual(len(sender._connections), 0)
+        self.assertEqual([warning for warning in caught if issubclass(warning.category, ResourceWarning)], [])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('benchmark_channel_layer', messages=50, receivers=2, path=self.path, stdout=out)
+        rows = out.getvalue().splitlines()[1:]
+        self.assertEqual([row.split()[:3] for row in rows], [['in-memory', '2', '100'], ['unix-socket', '2', '100']])
+
+
+class IncidentEventStreamTests(TestCase):
+    """The SSE stream replays missed incidents after Last-Event-ID, then follows new ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cameras, cls.event_types = create_reference_data()
+
+    def setUp(self):
+        lookup_cache.clear()
+        recent_incidents.reset()
+
+    def create_incident(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SecurityIncident.objects.create(
+                event_type=self.event_types['CROWD'], camera=self.cameras[0], incident_level='HIGH',
+            )
+
+    async def open_stream(self, **headers):
+        response = await self.async_client.get(reverse('event-stream'), headers=headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return aiter(response.streaming_content)
+
+    async def next_chunk(self, stream):
+        return (await asyncio.wait_for(anext(stream), 2)).decode()
+
+    async def test_resume_then_live_incidents(self):
+        incidents = await database_sync_to_async(seed_incidents)(3, self.cameras, self.event_types)
+        stream = await self.open_stream(last_event_id=str(incidents[0].pk))
+
+        self.assertTrue((await self.next_chunk(stream)).startswith('retry: '))
+        replayed = [await self.next_chunk(stream) for _ in range(2)]
+        self.assertEqual(
+            [chunk.split('\n')[:2] for chunk in replayed],
+            [[f'id: {incident.pk}', 'event: incident'] for incident in incidents[1:]],
+        )
+        self.assertIn('event: status', await self.next_chunk(stream))
+
+        incident = await database_sync_to_async(self.create_incident)()
+        chunk = await self.next_chunk(stream)
+        self.assertTrue(chunk.startswith(f'id: {incident.pk}\nevent: incident\n'))
+        data = json.loads(chunk.split('data: ', 1)[1])
+        self.assertEqual(data['label'], 'Overcrowding')
+        status = await self.next_chunk(stream)
+        self.assertIn('"status_level":"ALERT"', status)
+        self.assertIn('OVERCROWDING DETECTED ON CAM001', status)
+
+    async def test_live_incidents_committed_out_of_id_order(self):
+        stream = await self.open_stream()
+        await self.next_chunk(stream)  # retry
+        await self.next_chunk(stream)  # status
+        status = await database_sync_to_async(current_status)()
+
+        # Incident 4's transaction commits after incident 5's
+        for incident_id in (5, 4):
+            dashboard_hub.publish({'topic': ALL_TOPIC, 'row': {'id': incident_id}, 'status': status})
+        chunks = [await self.next_chunk(stream) for _ in range(2)]
+        self.assertEqual([chunk.split('\n')[0] for chunk in chunks], ['id: 5', 'id: 4'])
+
+    @override_settings(SURVEILLANCE_SSE_KEEPALIVE_SECONDS=0.05)
+    async def test_keepalive_on_idle_stream(self):
+        stream = await self.open_stream()
+        await self.next_chunk(stream)  # retry
+        self.assertIn('"status_level":"IDLE"', await self.next_chunk(stream))
+        self.assertEqual(await self.next_chunk(stream), ': keepalive\n\n')
+
+
+class LiveFanoutLoadTests(TestCase):
+    """
+    Load test for the live fan-out: hundreds of simulated clients, some slow and
+    some stalled, through an alert storm. Queues must stay bounded, lagging
+    clients must end on the latest status and must not hold back the others.
+    """
+    CLIENTS = 500
+    SLOW = 25
+    STALLED = 25
+    STORM = 2000
+
+    @override_settings(SURVEILLANCE_LIVE_QUEUE_SIZE=50)
+    def test_alert_storm(self):
+        hub = FanoutHub()
+
+        @async_to_sync
+        async def storm():
+            subscriptions = [await hub.subscribe('websocket', f'client-{i}') for i in range(self.CLIENTS)]
+            stalled = subscriptions[:self.STALLED]
+            slow = subscriptions[self.STALLED:self.STALLED + self.SLOW]
+            received = {subscription.id: [] for subscription in subscriptions}
+
+            async def read(subscription, delay):
+                while True:
+                    received[subscription.id].append(await subscription.get())
+                    if delay:
+                        await asyncio.sleep(delay)
+
+            readers = [
+                asyncio.ensure_future(read(subscription, 0.001 if subscription in slow else 0))
+                for subscription in subscriptions[self.STALLED:]
+            ]
+            for i in range(self.STORM):
+                hub.publish({'type': 'dashboard.incident', 'topic': ALL_TOPIC, 'row': {'id': i}, 'status': {'seq': i}})
+                if i % 20 == 19:
+                    await asyncio.sleep(0)  # Lets the readers run, as socket writes would
+            await asyncio.sleep(0.2)  # Slow readers catch up
+
+            metrics = hub.metrics()
+            for reader in readers:
+                reader.cancel()
+            for subscription in subscriptions:
+                await hub.unsubscribe(subscription)
+            return stalled, slow, received, metrics
+
+        stalled, slow, received, metrics = storm()
+        by_id = {entry['id']: entry for entry in metrics['subscriptions']}
+        self.assertEqual(metrics['connections'], self.CLIENTS)
+        self.assertTrue(all(entry['max_queued'] <= 50 for entry in metrics['subscriptions']))
+
+        for subscription in stalled:
+            self.assertEqual(by_id[subscription.id]['queued'], 2)  # One resync marker, one status
+            self.assertGreater(by_id[subscription.id]['dropped'], 0)
+        for subscription in slow:
+            messages = received[subscription.id]
+            self.assertIn({'type': 'dashboard.resync'}, messages)
+            self.assertEqual(messages[-1], {'type': 'dashboard.status', 'status': {'seq': self.STORM - 1}})
+
+        fast = [entry for entry in metrics['subscriptions'] if entry['kind'] == 'websocket'][self.STALLED + self.SLOW:]
+        for entry in fast:
+            messages = received[entry['id']]
+            self.assertEqual(entry['dropped'], 0)
+            self.assertEqual([m['row']['id'] for m in messages if m['type'] == 'dashboard.log'], list(range(self.STORM)))
+            self.assertEqual(messages[-1]['status'], {'seq': self.STORM - 1})
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in producing numbered frames."""
+
+    def __init__(self, source):
+        self.frames = 0
+
+    def read(self):
+        self.frames += 1
+        return True, self.frames
+
+    def release(self):
+        pass
+
+
+@override_settings(SURVEILLANCE_VIDEO={
+    'SOURCES': {'CAM001': 'rtsp://cam001/', 'CAM003': 'rtsp://cam003/'},
+    'MAX_FPS': 200,
+    'IDLE_SECONDS': 0.05,
+})
+@mock.patch('backend.surveillance_app.video_feed.encode_jpeg', lambda image, quality: b'jpeg-%d' % image)
+@mock.patch('backend.surveillance_app.video_feed.scale_frame', lambda image, height: image)
+@mock.patch('backend.surveillance_app.video_feed.open_capture', FakeCapture)
+class VideoFeedBroadcastTests(TestCase):
+    """MJPEG viewers of a camera share one capture, and one encode per frame and tier."""
+    VIEWERS = 50
+    FRAMES = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('operator', password='secret')
+
+    def test_viewers_share_encoded_frames(self):
+        broadcaster = CameraBroadcaster('CAM001', 'rtsp://cam001/')
+
+        @async_to_sync
+        async def watch():
+            async def viewer():
+                parts = []
+                stream = broadcaster.stream_async()
+                async for part in stream:
+                    parts.append(part)
+                    if len(parts) == self.FRAMES:
+                        break
+                await stream.aclose()
+                return parts
+
+            return await asyncio.gather(*(viewer() for _ in range(self.VIEWERS)))
+
+        views = watch()
+        metrics = broadcaster.metrics()
+        self.assertEqual(metrics['delivered'], self.VIEWERS * self.FRAMES)
+        self.assertLess(metrics['encoded'], metrics['delivered'])
+        self.assertEqual(metrics['viewers'], 0)
+
+        # Every viewer gets distinct, increasing frames, and the same bytes objects as the others
+        distinct = {}
+        for parts in views:
+            self.assertTrue(parts[0].startswith(b'--frame\r\nContent-Type: image/jpeg\r\n'))
+            numbers = [int(part.rsplit(b'jpeg-', 1)[1].strip()) for part in parts]
+            self.assertEqual(numbers, sorted(set(numbers)))
+            for part in parts:
+                self.assertIs(distinct.setdefault(part, part), part)
+        self.assertLessEqual(len(distinct), metrics['encoded'])
+
+        deadline = time.monotonic() + 2
+        while broadcaster.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(broadcaster.running)  # Capture stops once nobody watches
+
+    def test_tiers_are_encoded_once_per_frame(self):
+        broadcaster = CameraBroadcaster('CAM001', 'rtsp://cam001/')
+        scale = mock.Mock(side_effect=lambda image, height: image)
+
+        @async_to_sync
+        async def watch():
+            async def viewer(tier):
+                parts = []
+                stream = broadcaster.stream_async(tier)
+                async for part in stream:
+                    parts.append(part)
+                    if len(parts) == 5:
+                        break
+                await stream.aclose()
+
+            await asyncio.gather(*(viewer('full') for _ in range(10)), *(viewer('360p') for _ in range(30)))
+
+        with mock.patch('backend.surveillance_app.video_feed.scale_frame', scale):
+            watch()
+        metrics = broadcaster.metrics()
+        self.assertEqual(set(metrics['tiers']), {'full', '360p'})  # Nobody asked for 720p
+        full, thumbnails = metrics['tiers']['full'], metrics['tiers']['360p']
+        self.assertEqual((full['delivered'], thumbnails['delivered']), (50, 150))
+        self.assertLessEqual(max(full['encoded'], thumbnails['encoded']), metrics['captured'])
+        self.assertEqual(scale.call_count, thumbnails['encoded'])
+        self.assertEqual({call.args[1] for call in scale.call_args_list}, {360})
+
+    def test_slow_viewer_skips_to_newest_frame(self):
+        broadcaster = CameraBroadcaster('CAM001', 'rtsp://cam001/')
+        stream = broadcaster.stream('full', max_fps=20)  # The camera runs at 200 fps
+        numbers = []
+        for part in stream:
+            numbers.append(int(part.rsplit(b'jpeg-', 1)[1].strip()))
+            # Whatever the viewer missed, what it gets is live (give or take a capture in between)
+            self.assertGreaterEqual(numbers[-1], broadcaster.captured - 2)
+            if len(numbers) == 4:
+                break
+        stream.close()
+
+        tier = broadcaster.metrics()['tiers']['full']
+        self.assertGreater(min(b - a for a, b in zip(numbers, numbers[1:])), 1)
+        self.assertEqual(tier['skipped'], numbers[-1] - numbers[0] - 3)
+        self.assertEqual(tier['delivered'], 4)
+
+    def test_timed_out_waits_leave_no_waiters(self):
+        broadcaster = CameraBroadcaster('CAM001', 'rtsp://cam001/')
+        feed = TierFeed('full', None, 80)  # Not subscribed, so no frames ever arrive
+
+        @async_to_sync
+        async def wait():
+            for _ in range(3):
+                self.assertIsNone(await broadcaster.next_frame_async(feed, 0, timeout=0.01))
+
+        wait()
+        self.assertEqual(feed.waiters, [])
+
+    def test_video_feed_routes(self):
+        registry = VideoFeedRegistry()
+        with mock.patch('backend.surveillance_app.views.video_feeds', registry):
+            response = self.client.get(reverse('camera-video-feed', args=['CAM003']))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'multipart/x-mixed-replace; boundary=frame')
+            chunks = iter(response.streaming_content)
+            self.assertIn(b'jpeg-', next(chunks))
+            next(chunks)
+            response.close()
+
+            # /video_feed/ serves the first configured camera
+            response = self.client.get(reverse('video-feed'))
+            next(iter(response.streaming_content))
+            response.close()
+            self.assertEqual(self.client.get(reverse('camera-video-feed', args=['CAM999'])).status_code, 404)
+            url = reverse('camera-video-feed', args=['CAM001'])
+            self.assertEqual(self.client.get(url, {'quality': '4k'}).status_code, 400)
+            self.assertEqual(self.client.get(url, {'fps': '0'}).status_code, 400)
+            response = self.client.get(url, {'quality': '360p', 'fps': '10'})
+            next(iter(response.streaming_content))
+            response.close()
+
+            self.client.force_login(self.user)
+            metrics = self.client.get(reverse('surveillance_app:video-metrics')).json()
+        cameras = {camera['camera_id']: camera for camera in metrics['cameras']}
+        self.assertEqual(cameras['CAM003']['delivered'], 2)
+        self.assertEqual(cameras['CAM001']['delivered'], 2)
+        self.assertEqual(cameras['CAM001']['tiers']['360p']['delivered'], 1)
+        self.assertEqual(cameras['CAM003']['viewers'], 0)
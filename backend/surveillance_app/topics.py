@@ -0,0 +1,149 @@
+"""
+Subscription topics for the live dashboard feeds.
+
+Every incident is broadcast to one channel-layer group per combination of
+{its camera, any camera} x {its event type, any type} x {its level, any level},
+named like 'live.cam3.WEAPON.CRIT' or 'live.all.all.all'. A subscriber joins
+the cross product of what it asked for (areas are expanded to their cameras,
+a minimum incident_level to the levels at or above it), so each matching
+incident arrives exactly once and non-matching ones are never serialized or
+sent to it. An unfiltered subscriber joins only 'live.all.all.all'.
+"""
+
+from itertools import product
+
+from rest_framework.exceptions import ValidationError
+
+from .lookups import lookup_cache
+from .models import Camera, SurveillanceArea
+
+
+# SecurityIncident.incident_level values, lowest first
+INCIDENT_LEVELS = ('LOW', 'MEDIUM', 'HIGH', 'CRIT')
+
+ANY = 'all'
+
+
+def topic_name(camera_pk=None, event_type=None, level=None):
+    camera = ANY if camera_pk is None else f'cam{camera_pk}'
+    return f'live.{camera}.{event_type or ANY}.{level or ANY}'
+
+
+ALL_TOPIC = topic_name()
+
+
+def incident_topics(row):
+    """Every topic an incident feed row is broadcast to."""
+    event_type = lookup_cache.get_event_type_by_pk(row['event_type_id'])
+    cameras = [None] if row['camera_id'] is None else [row['camera_id'], None]
+    levels = [row['incident_level'], None] if row['incident_level'] in INCIDENT_LEVELS else [None]
+    return [topic_name(*key) for key in product(cameras, [event_type.code, None], levels)]
+
+
+class TopicFilter:
+    """
+    What one live client subscribed to. Each attribute is None for "any", or the
+    set of allowed values: camera pks, event type codes and incident levels.
+    """
+
+    def __init__(self, camera_pks=None, event_types=None, levels=None, description=None):
+        self.camera_pks = camera_pks
+        self.event_types = event_types
+        self.levels = levels
+        self.description = description or {}
+
+    def topics(self):
+        return [
+            topic_name(*key) for key in product(
+                self.camera_pks if self.camera_pks is not None else [None],
+                self.event_types if self.event_types is not None else [None],
+                self.levels if self.levels is not None else [None],
+            )
+        ]
+
+    def matches(self, row):
+        """Whether an incident feed row falls under the subscription."""
+        if self.camera_pks is not None and row['camera_id'] not in self.camera_pks:
+            return False
+        if self.levels is not None and row['incident_level'] not in self.levels:
+            return False
+        if self.event_types is not None:
+            return lookup_cache.get_event_type_by_pk(row['event_type_id']).code in self.event_types
+        return True
+
+    def filter_queryset(self, queryset):
+        """Restricts an incident queryset to the subscription."""
+        if self.camera_pks is not None:
+            queryset = queryset.filter(camera_id__in=self.camera_pks)
+        if self.event_types is not None:
+            queryset = queryset.filter(event_type__code__in=self.event_types)
+        if self.levels is not None:
+            queryset = queryset.filter(incident_level__in=self.levels)
+        return queryset
+
+
+EVERYTHING = TopicFilter()
+
+
+def _values(value):
+    """A list from a JSON list, one comma-separated string, or a list of them."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [part.strip() for item in value for part in str(item).split(',') if part.strip()]
+
+
+def parse_topic_filter(cameras=None, areas=None, event_types=None, min_level=None):
+    """
+    TopicFilter from camera_ids, areas (ids or names), event type codes and a
+    minimum incident_level. Cameras and areas are combined: an incident matches
+    if its camera is listed or lies in a listed area.
+    """
+    cameras, areas, event_types = _values(cameras), _values(areas), _values(event_types)
+    description = {}
+
+    camera_pks = None
+    if cameras or areas:
+        found = lookup_cache.get_cameras(cameras)
+        unknown = sorted(set(cameras) - set(found))
+        if unknown:
+            raise ValidationError({'cameras': f"Unknown camera(s): {', '.join(unknown)}."})
+        camera_pks = {camera.pk for camera in found.values()}
+        area_pks = set()
+        for area in areas:
+            area_obj = (
+                lookup_cache.get_area(int(area)) if area.isdigit()
+                else SurveillanceArea.objects.filter(name=area).first()
+            )
+            if area_obj is None:
+                raise ValidationError({'areas': f"Unknown area '{area}'."})
+            area_pks.add(area_obj.pk)
+        if area_pks:
+            camera_pks |= set(Camera.objects.filter(area_id__in=area_pks).values_list('pk', flat=True))
+        description.update(cameras=sorted(found), areas=sorted(area_pks))
+
+    codes = None
+    if event_types:
+        codes = {code.upper() for code in event_types}
+        unknown = sorted(code for code in codes if lookup_cache.get_event_type(code) is None)
+        if unknown:
+            raise ValidationError({'event_types': f"Unknown event type(s): {', '.join(unknown)}."})
+        description['event_types'] = sorted(codes)
+
+    levels = None
+    if min_level:
+        min_level = str(min_level).upper()
+        if min_level not in INCIDENT_LEVELS:
+            raise ValidationError({'min_level': f"Expected one of {', '.join(INCIDENT_LEVELS)}."})
+        levels = set(INCIDENT_LEVELS[INCIDENT_LEVELS.index(min_level):])
+        description['min_level'] = min_level
+
+    return TopicFilter(camera_pks, codes, levels, description)
+
+
+def topic_filter_from_query(params):
+    """TopicFilter from query parameters: camera, area, event_type (repeatable or comma-separated), min_level."""
+    return parse_topic_filter(
+        params.getlist('camera'), params.getlist('area'), params.getlist('event_type'), params.get('min_level'),
+    )
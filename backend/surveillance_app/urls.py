@@ -5,7 +5,14 @@ from .views import (
     CameraRetrieveUpdateDestroyView,
     RecentIncidentListView,
     AreaObservationAPIView,
-    RecentIncidentsAPIView
+    AreaObservationBatchAPIView,
+    RecentIncidentsAPIView,
+    EventExportView,
+    ObservationSearchAPIView,
+    DetectionRegionAPIView,
+    CameraHeatmapAPIView,
+    LiveFeedMetricsAPIView,
+    VideoFeedMetricsAPIView
 )
 
 # Set app_name for namespacing
@@ -19,6 +26,18 @@ urlpatterns = [
         AreaObservationAPIView.as_view(), 
         name='area-observation-api'
     ),
+    # Full URL: /api/surveillance/area-observations/batch/
+    path(
+        'area-observations/batch/',
+        AreaObservationBatchAPIView.as_view(),
+        name='area-observation-batch-api'
+    ),
+    # Full URL: /api/surveillance/area-observations/search/?q=...
+    path(
+        'area-observations/search/',
+        ObservationSearchAPIView.as_view(),
+        name='area-observation-search'
+    ),
 
     # --- 2. Dashboard & Reporting Data Endpoints (Corrected: Removed redundant 'api/') ---
     # Full URL: /api/surveillance/recent-incidents/
@@ -35,6 +54,37 @@ urlpatterns = [
         name='recent-incidents-frontend'
     ),
 
+    # Full URL: /api/surveillance/export/?start=...&end=...&output=csv|ndjson
+    path(
+        'export/',
+        EventExportView.as_view(),
+        name='event-export'
+    ),
+    # Full URL: /api/surveillance/detections/region/?bbox=x1,y1,x2,y2 (or polygon=...)
+    path(
+        'detections/region/',
+        DetectionRegionAPIView.as_view(),
+        name='detection-region'
+    ),
+    # Full URL: /api/surveillance/heatmaps/<camera_id>/?start=YYYY-MM-DD&end=YYYY-MM-DD
+    path(
+        'heatmaps/<str:camera_id>/',
+        CameraHeatmapAPIView.as_view(),
+        name='camera-heatmap'
+    ),
+    # Full URL: /api/surveillance/live/metrics/ (queue depth and lag of this process's live connections)
+    path(
+        'live/metrics/',
+        LiveFeedMetricsAPIView.as_view(),
+        name='live-metrics'
+    ),
+    # Full URL: /api/surveillance/video/metrics/ (encoded vs delivered MJPEG frames per camera)
+    path(
+        'video/metrics/',
+        VideoFeedMetricsAPIView.as_view(),
+        name='video-metrics'
+    ),
+
     # --- 3. Camera Management Endpoints (Corrected: Removed redundant 'api/') ---
     # Full URL: /api/surveillance/cameras/
     path(
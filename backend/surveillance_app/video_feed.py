@@ -0,0 +1,371 @@
+"""
+MJPEG streams for /video_feed/<camera_id>/, captured and encoded once per camera.
+
+Every camera has one CameraBroadcaster: while at least one viewer is connected
+a background thread reads frames from the camera's source (SURVEILLANCE_VIDEO
+'SOURCES', anything cv2.VideoCapture accepts) and publishes each frame, already
+JPEG-encoded and wrapped as a multipart part, in every resolution tier that has
+viewers (?quality=full|720p|360p, SURVEILLANCE_VIDEO 'TIERS'). A tier is scaled
+and encoded once per frame however many viewers it has, and tiers nobody
+watches cost nothing. The thread stops 'IDLE_SECONDS' after the last viewer
+left, releasing the camera.
+
+Viewers are paced individually: each one is only ever handed the newest frame
+of its tier when it is ready for the next one (and, with ?fps=, no more often
+than that), so frames it was too slow for are skipped rather than queued and a
+remote viewer on a slow link stays live instead of drifting into the past.
+Under WSGI, or an ASGI server that applies backpressure, "ready" means the
+socket accepted the previous frame; on servers that buffer writes without
+limit, ?fps= is what keeps the buffer from growing.
+
+The encoded / delivered / skipped counters of each camera and tier are served
+by the video metrics API: with N viewers on a tier, delivered is about
+N x encoded.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+
+logger = logging.getLogger(__name__)
+
+BOUNDARY = 'frame'
+CONTENT_TYPE = f'multipart/x-mixed-replace; boundary={BOUNDARY}'
+# Resolution tiers selectable with ?quality=; a smaller tier is also encoded at a lower quality
+DEFAULT_TIERS = {
+    'full': {'height': None, 'quality': 80},
+    '720p': {'height': 720, 'quality': 75},
+    '360p': {'height': 360, 'quality': 60},
+}
+DEFAULT_TIER = 'full'
+# Seconds a viewer waits for a frame before checking whether the camera is still running
+FRAME_WAIT_SECONDS = 5
+
+
+def get_video_settings():
+    return getattr(settings, 'SURVEILLANCE_VIDEO', {})
+
+
+def get_video_sources():
+    """camera_id -> capture source (device index, file path or stream URL)."""
+    return get_video_settings().get('SOURCES', {})
+
+
+def get_tiers():
+    """Tier name -> {'height': max frame height or None for as captured, 'quality': JPEG quality}."""
+    return get_video_settings().get('TIERS', DEFAULT_TIERS)
+
+
+def parse_stream_options(params):
+    """(tier, max_fps) from the ?quality= and ?fps= query parameters."""
+    tiers = get_tiers()
+    tier = params.get('quality', DEFAULT_TIER)
+    if tier not in tiers:
+        raise ValidationError({'quality': f"Expected one of: {', '.join(tiers)}."})
+    max_fps = params.get('fps')
+    if max_fps is not None:
+        try:
+            max_fps = float(max_fps)
+        except ValueError:
+            raise ValidationError({'fps': 'Expected a number.'})
+        if max_fps <= 0:
+            raise ValidationError({'fps': 'Must be positive.'})
+    return tier, max_fps
+
+
+def open_capture(source):
+    import cv2  # Only the process serving video needs OpenCV
+    return cv2.VideoCapture(source)
+
+
+def scale_frame(image, height):
+    """The frame scaled down to 'height' pixels, keeping its aspect ratio (never scaled up)."""
+    import cv2
+    rows, cols = image.shape[:2]
+    if rows <= height:
+        return image
+    return cv2.resize(image, (round(cols * height / rows), height), interpolation=cv2.INTER_AREA)
+
+
+def encode_jpeg(image, quality):
+    import cv2
+    ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+
+def multipart_frame(jpeg):
+    """One part of the multipart/x-mixed-replace response."""
+    header = f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n'
+    return header.encode() + jpeg + b'\r\n'
+
+
+class TierFeed:
+    """The newest frame of one resolution tier, and that tier's counters."""
+
+    def __init__(self, name, height, quality):
+        self.name = name
+        self.height = height
+        self.quality = quality
+        self.frame = None  # (seq, multipart part)
+        self.waiters = []  # (event loop, future) of async viewers waiting for a frame
+        self.viewers = 0
+        self.encoded = 0
+        self.delivered = 0
+        self.skipped = 0
+
+    def newer(self, after_seq):
+        if self.frame is not None and self.frame[0] > after_seq:
+            return self.frame
+        return None
+
+    def metrics(self):
+        return {
+            'viewers': self.viewers,
+            'encoded': self.encoded,
+            'delivered': self.delivered,
+            'skipped': self.skipped,
+        }
+
+
+class CameraBroadcaster:
+    """Captures one camera's frames and encodes them once per tier for all of its viewers."""
+
+    def __init__(self, camera_id, source):
+        self.camera_id = camera_id
+        self.source = source
+        self._lock = threading.Lock()
+        self._new_frame = threading.Condition(self._lock)
+        self._thread = None
+        self.tiers = {}  # name -> TierFeed, created on first use
+        self.captured = 0
+        self.read_errors = 0
+
+    # --- Viewers ---
+
+    def subscribe(self, tier=DEFAULT_TIER):
+        with self._lock:
+            feed = self.tiers.get(tier)
+            if feed is None:
+                options = get_tiers()[tier]
+                feed = self.tiers[tier] = TierFeed(
+                    tier, options.get('height'), options.get('quality', get_video_settings().get('JPEG_QUALITY', 80)),
+                )
+            feed.viewers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'video-feed-{self.camera_id}', daemon=True,
+                )
+                self._thread.start()
+            return feed
+
+    def unsubscribe(self, feed):
+        with self._lock:
+            feed.viewers -= 1
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    @property
+    def viewers(self):
+        return sum(feed.viewers for feed in self.tiers.values())
+
+    def _delivered(self, feed, seq, last_seq):
+        with self._lock:
+            feed.delivered += 1
+            if last_seq:
+                feed.skipped += seq - last_seq - 1
+
+    def next_frame(self, feed, after_seq, timeout=FRAME_WAIT_SECONDS):
+        """The newest frame of 'feed' newer than 'after_seq', waiting up to 'timeout'; None if there is none."""
+        with self._new_frame:
+            self._new_frame.wait_for(lambda: feed.newer(after_seq) is not None, timeout)
+            return feed.newer(after_seq)
+
+    async def next_frame_async(self, feed, after_seq, timeout=FRAME_WAIT_SECONDS):
+        """next_frame() for async views: waits on the event loop instead of a thread."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            frame = feed.newer(after_seq)
+            if frame is not None:
+                return frame
+            future = loop.create_future()
+            feed.waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._lock:
+            if (loop, future) in feed.waiters:
+                feed.waiters.remove((loop, future))  # Timed out: don't pile up until the next frame
+            return feed.newer(after_seq)  # The newest one, even if more arrived since the wake-up
+
+    def stream(self, tier=DEFAULT_TIER, max_fps=None):
+        """Multipart chunks for one viewer (sync, for WSGI)."""
+        feed = self.subscribe(tier)
+        interval = 1 / max_fps if max_fps else 0
+        try:
+            seq = 0
+            while True:
+                frame = self.next_frame(feed, seq)
+                if frame is None:
+                    if not self.running:
+                        return
+                    continue
+                self._delivered(feed, frame[0], seq)
+                seq = frame[0]
+                sent_at = time.monotonic()
+                yield frame[1]
+                if interval:
+                    time.sleep(max(0.0, sent_at + interval - time.monotonic()))
+        finally:
+            self.unsubscribe(feed)
+
+    async def stream_async(self, tier=DEFAULT_TIER, max_fps=None):
+        """Multipart chunks for one viewer (async, for ASGI)."""
+        feed = self.subscribe(tier)
+        interval = 1 / max_fps if max_fps else 0
+        try:
+            seq = 0
+            while True:
+                frame = await self.next_frame_async(feed, seq)
+                if frame is None:
+                    if not self.running:
+                        return
+                    continue
+                self._delivered(feed, frame[0], seq)
+                seq = frame[0]
+                sent_at = time.monotonic()
+                yield frame[1]
+                if interval:
+                    await asyncio.sleep(max(0.0, sent_at + interval - time.monotonic()))
+        finally:
+            self.unsubscribe(feed)
+
+    # --- Capture thread ---
+
+    def _publish(self, feed, frame):
+        with self._lock:
+            feed.frame = frame
+            waiters, feed.waiters = feed.waiters, []
+            self._new_frame.notify_all()
+        for loop, future in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, future, frame)
+
+    def _encode(self, image, seq):
+        """Scales and encodes the frame once for every tier that has viewers."""
+        with self._lock:
+            feeds = [feed for feed in self.tiers.values() if feed.viewers > 0]
+        for feed in feeds:
+            scaled = image if feed.height is None else scale_frame(image, feed.height)
+            part = multipart_frame(encode_jpeg(scaled, feed.quality))
+            feed.encoded += 1
+            self._publish(feed, (seq, part))
+
+    def _should_stop(self, idle_since):
+        """Ends the thread once nobody watched for IDLE_SECONDS; returns the new idle_since."""
+        with self._lock:
+            if self.viewers > 0:
+                return None, False
+            idle_since = idle_since or time.monotonic()
+            if time.monotonic() - idle_since < get_video_settings().get('IDLE_SECONDS', 10):
+                return idle_since, False
+            self._thread = None
+            return idle_since, True
+
+    def _run(self):
+        options = get_video_settings()
+        interval = 1 / options.get('MAX_FPS', 15)
+        capture = None
+        idle_since = None
+        try:
+            capture = open_capture(self.source)
+            while True:
+                idle_since, stop = self._should_stop(idle_since)
+                if stop:
+                    return
+                started = time.monotonic()
+                ok, image = capture.read()
+                if not ok:
+                    # Camera dropped out or the file ended: reopen and keep serving the last frame
+                    self.read_errors += 1
+                    capture.release()
+                    time.sleep(options.get('RECONNECT_SECONDS', 2))
+                    capture = open_capture(self.source)
+                    continue
+                self.captured += 1
+                self._encode(image, self.captured)
+                time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        except Exception:
+            logger.exception("Video capture for camera %s failed", self.camera_id)
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None  # Viewers' streams end; the next viewer starts a new thread
+        finally:
+            if capture is not None:
+                capture.release()
+
+    def metrics(self):
+        with self._lock:
+            tiers = {name: feed.metrics() for name, feed in sorted(self.tiers.items())}
+            encoded = sum(tier['encoded'] for tier in tiers.values())
+            delivered = sum(tier['delivered'] for tier in tiers.values())
+            return {
+                'camera_id': self.camera_id,
+                'running': self._thread is not None,
+                'viewers': sum(tier['viewers'] for tier in tiers.values()),
+                'captured': self.captured,
+                'encoded': encoded,
+                'delivered': delivered,
+                'skipped': sum(tier['skipped'] for tier in tiers.values()),
+                'delivered_per_encode': round(delivered / encoded, 2) if encoded else 0.0,
+                'read_errors': self.read_errors,
+                'tiers': tiers,
+            }
+
+
+def _resolve(future, frame):
+    if not future.done():
+        future.set_result(frame)
+
+
+class VideoFeedRegistry:
+    """One CameraBroadcaster per configured camera, created on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.broadcasters = {}
+
+    def get(self, camera_id=None):
+        """Broadcaster of 'camera_id' (the first configured camera if None), or None if unconfigured."""
+        sources = get_video_sources()
+        if camera_id is None:
+            camera_id = next(iter(sources), None)
+        if camera_id not in sources:
+            return None
+        with self._lock:
+            broadcaster = self.broadcasters.get(camera_id)
+            if broadcaster is None or broadcaster.source != sources[camera_id]:
+                broadcaster = self.broadcasters[camera_id] = CameraBroadcaster(camera_id, sources[camera_id])
+            return broadcaster
+
+    def metrics(self):
+        with self._lock:
+            broadcasters = sorted(self.broadcasters.values(), key=lambda b: b.camera_id)
+        cameras = [b.metrics() for b in broadcasters]
+        return {
+            'encoded': sum(camera['encoded'] for camera in cameras),
+            'delivered': sum(camera['delivered'] for camera in cameras),
+            'cameras': cameras,
+        }
+
+
+video_feeds = VideoFeedRegistry()
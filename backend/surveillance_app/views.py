@@ -1,14 +1,44 @@
-from django.http import JsonResponse
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET
 from rest_framework import generics
 from rest_framework.views import APIView # Needed for the new custom POST view
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response # Needed for custom APIView
 from rest_framework import status # Needed for custom APIView
+from rest_framework.exceptions import ValidationError
 
 from .models import Camera
 from .serializers import CameraSerializer, IncidentDisplaySerializer, AreaObservationCreationSerializer # Added AreaObservationCreationSerializer
 from backend.security_app.models import SecurityIncident
-from .consumers import broadcast_incident_alert
+from .consumers import broadcast_incident_alert, current_status, recent_log_rows
+from .event_stream import parse_last_event_id, sse_events
+from .fanout import dashboard_hub
+from .topics import topic_filter_from_query
+from .ingest import (
+    ingest_observation_batch, get_bulk_max_items, validate_observation_batch,
+    find_idempotent_observation, forget_pending_idempotent, observation_result, remember_idempotent
+)
+from .incident_feed import incident_feed_queryset, serialize_incident_row
+from .lookups import lookup_cache
+from .conditional import incident_conditional, status_conditional
+from .pagination import KeysetPagination, IncidentListPagination
+from .recent_buffer import recent_incidents
+from .analytics import event_timeseries, parse_timeseries_query
+from .archive import ARCHIVE_TABLES
+from .export import EXPORT_FORMATS, export_chunks, iterate_async
+from .filters import parse_event_filters, parse_moment, parse_time_range
+from .heatmaps import CHANNELS, get_frame_size, merged_heatmap
+from .search import ranked_observations
+from .spatial import detections_in_region, parse_region
+from .rollups import daily_analytics
+from .video_feed import CONTENT_TYPE as VIDEO_CONTENT_TYPE, parse_stream_options, video_feeds
+from .write_behind import is_async_ingest_enabled, observation_queue
 
 # --- 0. AI WORKER ENDPOINT (NEW) ---
 
@@ -25,17 +55,44 @@ class AreaObservationAPIView(APIView):
     def post(self, request, *args, **kwargs):
         """
         Handles POST requests to create a new AreaObservation and its related ObjectDetail.
+        In async ingest mode the validated payload is queued and 202 is returned at once.
+
+        An optional idempotency key ('Idempotency-Key' header or 'idempotency_key'
+        field) makes retries safe: a repeated key returns the original row instead
+        of inserting a second one.
         """
+        key = request.headers.get('Idempotency-Key')
+        if not key and isinstance(request.data, dict):
+            key = request.data.get('idempotency_key')
+        if key:
+            original = find_idempotent_observation(key)
+            if original is not None:
+                return self.replay(original)
+
+        if is_async_ingest_enabled():
+            return self.enqueue(request.data, key)
+
         serializer = AreaObservationCreationSerializer(data=request.data)
         
         if serializer.is_valid():
             try:
                 # The serializer's create method handles nested ObjectDetail creation
-                instance = serializer.save()
+                instance = serializer.save(idempotency_key=key) if key else serializer.save()
+                remember_idempotent(key, observation_result(instance))
                 return Response(
                     serializer.to_representation(instance), 
                     status=status.HTTP_201_CREATED
                 )
+            except IntegrityError as e:
+                # A concurrent retry stored the same key first
+                original = find_idempotent_observation(key) if key else None
+                if original is not None:
+                    return self.replay(original)
+                print(f"Error during AreaObservation creation: {e}")
+                return Response(
+                    {"error": "A server error occurred during creation.", "detail": str(e)},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
             except Exception as e:
                 print(f"Error during AreaObservation creation: {e}")
                 return Response(
@@ -45,6 +102,101 @@ class AreaObservationAPIView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def replay(self, original):
+        """Answers a retried idempotency key with the originally stored (or still queued) event."""
+        if original.get('pending'):
+            return Response(original, status=status.HTTP_202_ACCEPTED)
+        return Response(original, status=status.HTTP_200_OK)
+
+    def enqueue(self, data, key=None):
+        """
+        Validates the payload and hands it to the write-behind queue.
+        Answers 429 when the queue is full so the worker can back off and retry.
+        """
+        if key and isinstance(data, dict):
+            data = {**data, 'idempotency_key': key}
+        valid, errors, duplicates = validate_observation_batch([data])
+        if errors:
+            return Response(errors[0], status=status.HTTP_400_BAD_REQUEST)
+        if duplicates:
+            return self.replay(duplicates[0])
+
+        _, validated_data, camera, event_type = valid[0]
+        if key:
+            # Retries of a queued key are answered 202 until the writer stores the row. Set before
+            # submit() so the writer's stored result always replaces the marker, never the reverse.
+            remember_idempotent(key, {'idempotency_key': key, 'pending': True})
+        if not observation_queue.submit((validated_data, camera, event_type)):
+            forget_pending_idempotent(key)
+            return Response(
+                {"error": "Ingestion queue is full, retry later."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': '1'}
+            )
+
+        return Response(
+            {"status": "accepted", "pending": observation_queue.qsize(), "idempotency_key": key},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class AreaObservationBatchAPIView(APIView):
+    """
+    Batch variant of AreaObservationAPIView. Accepts a JSON array of observations
+    (or {"observations": [...]}) and writes all valid items with bulk INSERTs in
+    a single transaction.
+
+    Responds with one result per item so a bad record never rejects the batch:
+    201 when every item was stored (or was a retried duplicate), 207 when some
+    failed, 400 when none succeeded.
+    """
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get('observations')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Expected a non-empty JSON array of observations."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        max_items = get_bulk_max_items()
+        if len(items) > max_items:
+            return Response(
+                {"error": f"Batch too large: {len(items)} items (maximum is {max_items})."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = ingest_observation_batch(items)
+        except Exception as e:
+            print(f"Error during AreaObservation batch creation: {e}")
+            return Response(
+                {"error": "A server error occurred during batch creation.", "detail": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        created_count = sum(1 for r in results if r['status'] == 'created')
+        duplicate_count = sum(1 for r in results if r['status'] == 'duplicate')
+        failed_count = len(results) - created_count - duplicate_count
+        if not failed_count:
+            response_status = status.HTTP_201_CREATED
+        elif failed_count < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response(
+            {
+                'created': created_count,
+                'duplicates': duplicate_count,
+                'failed': failed_count,
+                'results': results,
+            },
+            status=response_status
+        )
+
 
 # --- 1. Camera Management Views ---
 
@@ -67,20 +219,25 @@ class CameraRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
 # --- 2. Incident Display Views ---
 
+@method_decorator(incident_conditional, name='get')
 class RecentIncidentListView(generics.ListAPIView):
     """
     API endpoint to list the most recent security incidents for the dashboard.
     This view reads data from the security_app's model using a read-only serializer.
+
+    Paginated by (timestamp, id) keyset: follow 'next' for older pages and 'poll'
+    (?since=&after_id=) to fetch only incidents newer than the last response.
     """
     # Order by timestamp descending to show the latest incidents first
-    queryset = SecurityIncident.objects.all().order_by('-timestamp')
+    queryset = SecurityIncident.objects.all().order_by('-timestamp', '-id')
     serializer_class = IncidentDisplaySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IncidentListPagination
 
     def get_queryset(self):
         """
         Optionally filter the queryset based on parameters (e.g., only unresolved incidents).
-        For the dashboard, let's limit it to the 100 most recent items to prevent overload.
+        Page size (100 by default) is enforced by the keyset paginator.
         """
         qs = super().get_queryset().filter(is_resolved=False)
 
@@ -91,7 +248,7 @@ class RecentIncidentListView(generics.ListAPIView):
              # Assuming 'incident_level' is the field name on SecurityIncident
             qs = qs.filter(incident_level=priority_filter.upper())
 
-        return qs[:100]
+        return qs
 
 # --- 3. Dashboard View ---
 
@@ -107,58 +264,314 @@ def dashboard_view(request):
 
 # --- 5. Recent Incidents API for Frontend ---
 
+@method_decorator(incident_conditional, name='get')
 class RecentIncidentsAPIView(APIView):
     """
     API endpoint to provide recent incidents data for the frontend dashboard.
     Returns incidents in a format suitable for the frontend.
+
+    Supports the same keyset parameters as RecentIncidentListView (?cursor=,
+    ?since=&after_id=, ?limit=) so pollers only receive new incidents.
+
+    Served from the in-memory recent incident buffer without a query; requests
+    that reach past the buffered window fall back to the database.
     """
     permission_classes = []  # Allow unauthenticated access for demo
 
     def get(self, request):
+        paginator = KeysetPagination()
         try:
-            # Get recent incidents (last 50)
-            incidents = SecurityIncident.objects.all().order_by('-timestamp')[:50]
-
-            incident_data = []
-            for incident in incidents:
-                # Get confidence score from related metrics or AreaObservation
-                confidence_score = None
-                snapshot_url = incident.snapshot_url
-
-                # For WEAPON and CROWD incidents, get confidence from metrics
-                if hasattr(incident, 'weapon_metrics'):
-                    confidence_score = incident.weapon_metrics.confidence
-                elif hasattr(incident, 'crowd_metrics'):
-                    confidence_score = 0.8  # Default confidence for crowd detection
-                # For UOD and INTRUSION, get from AreaObservation
-                elif hasattr(incident, 'areaobservation'):
-                    area_obs = incident.areaobservation
-                    if hasattr(area_obs, 'objectdetail'):
-                        confidence_score = area_obs.objectdetail.object_confidence
-                    if not snapshot_url:
-                        snapshot_url = area_obs.evidence_path
-
-                incident_data.append({
-                    'id': incident.id,
-                    'event_type': incident.event_type.code,
-                    'camera_id': incident.camera.camera_id if incident.camera else 'Unknown',
-                    'timestamp': incident.timestamp.isoformat(),
-                    'incident_level': incident.incident_level,
-                    'confidence_score': confidence_score,
-                    'snapshot_url': snapshot_url
-                })
+            rows, complete = recent_incidents.window()
+            page = paginator.paginate_sequence(rows, request, complete=complete)
+            if page is not None:
+                incident_data = [recent_incidents.serialize(row) for row in page]
+            else:
+                # Beyond the buffer: one query with metrics joined in, no per-row lookups
+                page = paginator.paginate_queryset(incident_feed_queryset(), request, view=self)
+                incident_data = [serialize_incident_row(row) for row in page]
 
             return Response({
                 'incidents': incident_data,
-                'total_count': len(incident_data)
+                'total_count': len(incident_data),
+                **paginator.get_page_links(),
             })
 
+        except ValidationError:
+            raise
         except Exception as e:
             return Response(
                 {'error': f'Failed to fetch incidents: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+# --- 6. Dashboard Status & Log Feeds ---
+# Polled by dashboard/dashboard.py. Both answer If-None-Match / If-Modified-Since
+# with 304 from a cheap version token and read from the recent incident buffer.
+
+@method_decorator(status_conditional, name='get')
+class LatestStatusAPIView(APIView):
+    """
+    API endpoint returning the current system status banner (ALERT / OK / IDLE).
+    """
+    permission_classes = []  # Polled by the dashboard without credentials
+
+    def get(self, request):
+        return Response(current_status())
+
+
+@method_decorator(incident_conditional, name='get')
+class EventLogAPIView(APIView):
+    """
+    API endpoint returning the most recent incidents in the dashboard's log table format.
+    """
+    permission_classes = []  # Polled by the dashboard without credentials
+
+    def get(self, request):
+        return Response(recent_log_rows())
+
+
+@require_GET
+async def incident_event_stream_view(request):
+    """
+    Server-Sent Events stream of status transitions and new incidents (needs the
+    ASGI server). Resumes after the Last-Event-ID header or ?last_event_id=;
+    camera, area, event_type and min_level narrow the stream.
+    """
+    try:
+        topic_filter = await sync_to_async(topic_filter_from_query)(request.GET)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID', request.GET.get('last_event_id'))
+    )
+    response = StreamingHttpResponse(
+        sse_events(last_event_id, request.META.get('REMOTE_ADDR'), topic_filter),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+class LiveFeedMetricsAPIView(APIView):
+    """
+    Queue depth, lag and drop counters of every live dashboard connection
+    (WebSocket and SSE) served by this process.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(dashboard_hub.metrics())
+
+# --- 7. Analytics ---
+
+class AnalyticsAPIView(APIView):
+    """
+    API endpoint for the analytics dashboard: per-day event counts for the last
+    N days (?days=, default 30, max 366). Reads only the DailyEventRollup table.
+    """
+    permission_classes = []  # Read by the analytics dashboard without credentials
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'error': 'days must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(1, min(days, 366))
+        return Response(daily_analytics(days))
+
+
+class AnalyticsTimeseriesAPIView(APIView):
+    """
+    Event counts grouped into minute/hour/day/week buckets, computed in the database.
+    Query params: start, end (ISO 8601; default the last 7 days), bucket (default day),
+    and optional event_type, camera (camera_id) and area (id or name) filters.
+    Returns parallel 'time', 'event_type' and 'count' arrays.
+    """
+    permission_classes = []  # Read by the analytics dashboard without credentials
+
+    def get(self, request):
+        query = parse_timeseries_query(request.query_params)
+        return Response(event_timeseries(query))
+
+
+class EventExportView(APIView):
+    """
+    Streams every incident (or observation, ?source=observations) in a time range
+    as CSV (default) or NDJSON (?output=ndjson). Accepts start, end (default: the
+    last 30 days) and the event_type / camera / area filters. Archived months are
+    included transparently.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Expected one of: {', '.join(EXPORT_FORMATS)}."})
+        source = request.query_params.get('source', 'incidents')
+        if source not in ARCHIVE_TABLES:
+            raise ValidationError({'source': f"Expected one of: {', '.join(ARCHIVE_TABLES)}."})
+
+        start, end = parse_time_range(request.query_params, default_span=timedelta(days=30))
+        query = {'start': start, 'end': end, **parse_event_filters(request.query_params)}
+
+        chunks = export_chunks(ARCHIVE_TABLES[source], query, output)
+        if getattr(request, 'scope', None) is not None:
+            # Running under ASGI (Channels/Daphne)
+            chunks = iterate_async(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[output])
+        filename = f"{source}_{start:%Y%m%d}_{end:%Y%m%d}.{output}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ObservationSearchAPIView(APIView):
+    """
+    Full-text search over observation analyst notes and evidence paths.
+    ?q=<words>&limit=<n> (default 50, max 200); results are ranked best match first.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': 'This parameter is required.'})
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 50)), 200))
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+
+        results = [
+            {
+                'id': observation.id,
+                'timestamp': observation.timestamp,
+                'camera': observation.camera.camera_id,
+                'area': observation.camera.area.name if observation.camera.area else None,
+                'event_type': observation.event_type.code,
+                'status': observation.status,
+                'analyst_notes': observation.analyst_notes,
+                'evidence_path': observation.evidence_path,
+                'rank': rank,
+            }
+            for observation, rank in ranked_observations(text, limit)
+        ]
+        return Response({'query': text, 'count': len(results), 'results': results})
+
+
+class DetectionRegionAPIView(APIView):
+    """
+    Detections whose bounding box intersects a frame region, newest first.
+    Region: ?bbox=x1,y1,x2,y2 or ?polygon=[[x, y], ...] (JSON). Also accepts start,
+    end (default: the last 7 days), event_type, camera, area and limit (default 500).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        bounds, polygon = parse_region(request.query_params)
+        start, end = parse_time_range(request.query_params, default_span=timedelta(days=7))
+        query = {'start': start, 'end': end, **parse_event_filters(request.query_params)}
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 500)), 5000))
+        except ValueError:
+            raise ValidationError({'limit': 'Expected an integer.'})
+
+        results = []
+        for detection in detections_in_region(query, bounds, polygon, limit):
+            camera = lookup_cache.get_camera_by_pk(detection.camera_id)
+            event_type = lookup_cache.get_event_type_by_pk(detection.event_type_id)
+            results.append({
+                'source': 'observation' if detection.observation_id else 'incident',
+                'source_id': detection.observation_id or detection.incident_id,
+                'camera': camera.camera_id if camera else None,
+                'event_type': event_type.code if event_type else None,
+                'timestamp': detection.timestamp,
+                'bbox': [detection.x1, detection.y1, detection.x2, detection.y2],
+            })
+        return Response({'count': len(results), 'results': results})
+
+
+class CameraHeatmapAPIView(APIView):
+    """
+    Where detections landed in one camera's frame, summed over ?start= and ?end=
+    (YYYY-MM-DD, default: the last 7 days) and optionally one ?event_type=.
+    ?mode=centers (default) counts box centers per cell; ?mode=coverage counts
+    the boxes covering each cell. Returns a rows x cols grid.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, camera_id):
+        camera = lookup_cache.get_camera(camera_id)
+        if camera is None:
+            return Response({'error': f"Unknown camera '{camera_id}'."}, status=status.HTTP_404_NOT_FOUND)
+        mode = request.query_params.get('mode', 'centers')
+        if mode not in CHANNELS:
+            raise ValidationError({'mode': f"Expected one of: {', '.join(CHANNELS)}."})
+
+        params = request.query_params
+        end_day = timezone.localdate(parse_moment('end', params['end'])) if params.get('end') else timezone.localdate()
+        start_day = (
+            timezone.localdate(parse_moment('start', params['start'])) if params.get('start')
+            else end_day - timedelta(days=6)
+        )
+        if start_day > end_day:
+            raise ValidationError({'start': 'start must not be after end.'})
+        if (end_day - start_day).days > 366:
+            raise ValidationError({'start': 'At most 366 days per request.'})
+        filters = parse_event_filters({'event_type': request.query_params.get('event_type')})
+        event_type_id = lookup_cache.get_event_type(filters['event_type']).pk if filters['event_type'] else None
+
+        grid, detections = merged_heatmap(camera.pk, start_day, end_day, event_type_id)
+        channel = grid[CHANNELS[mode]]
+        return Response({
+            'camera': camera.camera_id,
+            'start': start_day,
+            'end': end_day,
+            'event_type': filters['event_type'],
+            'mode': mode,
+            'rows': channel.shape[0],
+            'cols': channel.shape[1],
+            'frame_size': get_frame_size(camera.pk),
+            'detections': detections,
+            'max': float(channel.max()),
+            'grid': channel.astype(int).tolist(),
+        })
+
+# --- 8. Live Video ---
+
+@require_GET
+def video_feed_view(request, camera_id=None):
+    """
+    MJPEG stream of one camera (the first configured camera for /video_feed/),
+    for use as an <img> source. ?quality=full|720p|360p picks the resolution tier
+    and ?fps= caps the viewer's frame rate. Frames are captured once per camera and
+    encoded once per tier; a slow viewer skips to the newest frame.
+    """
+    broadcaster = video_feeds.get(camera_id)
+    if broadcaster is None:
+        return JsonResponse({'error': f"No video source configured for camera '{camera_id}'."},
+                            status=status.HTTP_404_NOT_FOUND)
+    try:
+        tier, max_fps = parse_stream_options(request.GET)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=status.HTTP_400_BAD_REQUEST)
+    if getattr(request, 'scope', None) is not None:
+        # Running under ASGI (Channels/Daphne): wait for frames on the event loop
+        frames = broadcaster.stream_async(tier, max_fps)
+    else:
+        frames = broadcaster.stream(tier, max_fps)
+    response = StreamingHttpResponse(frames, content_type=VIDEO_CONTENT_TYPE)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class VideoFeedMetricsAPIView(APIView):
+    """Viewers and encoded / delivered / skipped frame counts per camera and tier in this process."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(video_feeds.metrics())
+
 # --- 4. Incident Views (for URL patterns) ---
 
 def incident_list_view(request):
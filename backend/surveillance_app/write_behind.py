@@ -0,0 +1,228 @@
+"""
+Write-behind ingestion queue.
+
+When SURVEILLANCE_INGEST_MODE is 'async', ingestion views validate the payload,
+push it onto a bounded in-process queue and answer 202 immediately. A daemon
+writer thread drains the queue in batches, so a slow or briefly unavailable
+database no longer blocks the AI worker's detection loop.
+
+Two queues are provided:
+  * observation_queue - validated AreaObservation payloads, written with the
+    bulk INSERT path from ingest.py.
+  * serializer_queue  - any validated DRF serializer (e.g. the security incident
+    serializer). Items are saved with serializer.create() inside one transaction
+    per batch. Use enqueue_serializer_save() from the view.
+
+Both queues refuse new work when full (the view answers 429) and are drained
+on interpreter shutdown.
+"""
+
+import atexit
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .ingest import create_observation_batch, forget_pending_idempotent
+
+
+DEFAULT_WRITE_BEHIND = {
+    'MAX_SIZE': 10000,       # Items held in memory before new requests get 429
+    'FLUSH_SIZE': 500,       # Maximum items written per batch
+    'FLUSH_INTERVAL': 0.5,   # Seconds to wait for a batch to fill before flushing
+    'SHUTDOWN_TIMEOUT': 30,  # Seconds allowed for the final drain at exit
+}
+
+
+def get_write_behind_setting(key):
+    return getattr(settings, 'SURVEILLANCE_WRITE_BEHIND', {}).get(key, DEFAULT_WRITE_BEHIND[key])
+
+
+def is_async_ingest_enabled():
+    """True when ingestion views should enqueue instead of writing synchronously."""
+    return getattr(settings, 'SURVEILLANCE_INGEST_MODE', 'sync') == 'async'
+
+
+class WriteBehindQueue:
+    """
+    Bounded FIFO drained by a background thread in batches.
+
+    'writer' is called with a list of queued items. If a batch write raises,
+    items are retried one by one so a single bad record only loses itself;
+    'on_drop' (if given) is then called with that item.
+    """
+
+    def __init__(self, name, writer, max_size=None, flush_size=None, flush_interval=None, on_drop=None):
+        self.name = name
+        self.writer = writer
+        self.on_drop = on_drop
+        self.max_size = max_size or get_write_behind_setting('MAX_SIZE')
+        self.flush_size = flush_size or get_write_behind_setting('FLUSH_SIZE')
+        self.flush_interval = flush_interval or get_write_behind_setting('FLUSH_INTERVAL')
+
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()  # Guards the writer thread handle and the counters
+        self._thread = None
+
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    # --- Producer side ---
+
+    def submit(self, item):
+        """Queues an item. Returns False when the queue is full (caller should answer 429)."""
+        if self._stop.is_set():
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count('rejected')
+            return False
+        self._count('enqueued')
+        return True
+
+    def _count(self, counter, amount=1):
+        """Counters are bumped from request threads and the writer thread alike."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'pending': self.qsize(),
+                'max_size': self.max_size,
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'written': self.written,
+                'failed': self.failed,
+                'batches': self.batches,
+            }
+
+    # --- Writer thread ---
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'write-behind-{self.name}', daemon=True
+                )
+                self._thread.start()
+
+    def _take_batch(self):
+        """Blocks up to flush_interval for the first item, then fills the batch until the deadline."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_nowait(self):
+        batch = []
+        while len(batch) < self.flush_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        close_old_connections()
+        try:
+            self.writer(batch)
+            self._count('written', len(batch))
+        except Exception as e:
+            print(f"Write-behind queue '{self.name}': batch of {len(batch)} failed ({e}), retrying items individually")
+            for item in batch:
+                try:
+                    self.writer([item])
+                    self._count('written')
+                except Exception as item_error:
+                    self._count('failed')
+                    print(f"Write-behind queue '{self.name}': dropped item after error: {item_error}")
+                    if self.on_drop is not None:
+                        self.on_drop(item)
+        finally:
+            self._count('batches')
+            close_old_connections()
+
+    # --- Shutdown ---
+
+    def shutdown(self, timeout=None):
+        """Stops accepting work, waits for the writer thread and flushes whatever is left."""
+        timeout = get_write_behind_setting('SHUTDOWN_TIMEOUT') if timeout is None else timeout
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            batch = self._drain_nowait()
+            if not batch:
+                break
+            self._flush(batch)
+
+        if self.qsize():
+            print(f"Write-behind queue '{self.name}': {self.qsize()} items not written before shutdown")
+
+
+# --- Writers ---
+
+def write_observations(batch):
+    """Batch items are (data, camera, event_type) tuples from validate_observation_batch()."""
+    create_observation_batch([(index, data, camera, event_type) for index, (data, camera, event_type) in enumerate(batch)])
+
+
+def write_serializer_saves(batch):
+    """Batch items are (serializer_class, validated_data) pairs."""
+    with transaction.atomic():
+        for serializer_class, validated_data in batch:
+            serializer_class().create(validated_data)
+
+
+def forget_dropped_observation(item):
+    """A dropped observation's idempotency key must not keep answering retries with 'pending'."""
+    forget_pending_idempotent(item[0].get('idempotency_key'))
+
+
+observation_queue = WriteBehindQueue('area-observations', write_observations, on_drop=forget_dropped_observation)
+serializer_queue = WriteBehindQueue('serializer-saves', write_serializer_saves)
+
+
+def enqueue_serializer_save(serializer):
+    """Queues an already-validated serializer's create(). Returns False when the queue is full."""
+    return serializer_queue.submit((type(serializer), serializer.validated_data))
+
+
+@atexit.register
+def _drain_queues_on_exit():
+    for write_queue in (observation_queue, serializer_queue):
+        write_queue.shutdown()
@@ -3,9 +3,15 @@ import requests
 import pandas as pd
 import time
 import os
+import json
 from datetime import datetime
 import streamlit as st
 
+try:
+    import websocket  # websocket-client; without it the dashboard falls back to HTTP polling
+except ImportError:
+    websocket = None
+
 # ====== ADD THIS AT THE VERY TOP (after imports) ======
 st.markdown("""
 <style>
@@ -216,6 +222,13 @@ VIDEO_FEED_URL = f"{LOCAL_URL}/video_feed/"
 LOGS_URL = f"{LOCAL_URL}/api/logs/"
 # NEW: Endpoint for the latest status (e.g., /api/latest_status/) - Updated to match your Django view
 STATUS_API_URL = f"{LOCAL_URL}/api/latest_status/"
+# Push channel: a snapshot on connect, then status / log deltas (backend/surveillance_app/consumers.py)
+DASHBOARD_WS_URL = LOCAL_URL.replace("http", "ws", 1) + "/ws/dashboard/"
+# Seconds without a message before the socket is pinged, and before a reconnect is attempted
+WS_PING_INTERVAL = 30
+WS_RECONNECT_DELAY = 2
+# Rows kept in the log table (the backend sends the newest 50 in its snapshot)
+MAX_LOG_ROWS = 50
 
 st.set_page_config(
     page_title="AI Surveillance System Dashboard (Weapon & Overcrowding)",
@@ -225,15 +238,39 @@ st.set_page_config(
 
 # --- Functions to Fetch Data ---
 
+# Last ETag and JSON body per URL, so unchanged polls are answered by the backend with 304
+_conditional_cache = {}
+
+def conditional_get(url, timeout=None):
+    """
+    GET with If-None-Match. Returns (status_code, data); a 304 reuses the cached body
+    and is reported as 200 so callers don't need to care.
+    """
+    headers = {}
+    cached = _conditional_cache.get(url)
+    if cached:
+        headers['If-None-Match'] = cached[0]
+
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached:
+        return 200, cached[1]
+    if response.status_code == 200:
+        data = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            _conditional_cache[url] = (etag, data)
+        return 200, data
+    return response.status_code, None
+
 # Function to fetch latest system status
 def fetch_system_status():
     """Fetches the latest alert status from the Django backend API."""
     try:
-        response = requests.get(STATUS_API_URL, timeout=1) # Use a short timeout
-        if response.status_code == 200:
-            return response.json()
+        status_code, data = conditional_get(STATUS_API_URL, timeout=1) # Use a short timeout
+        if status_code == 200:
+            return data
         else:
-            return {'status_level': 'ERROR', 'message': f'Django Status API returned {response.status_code}'}
+            return {'status_level': 'ERROR', 'message': f'Django Status API returned {status_code}'}
     except requests.exceptions.ConnectionError:
         return {'status_level': 'ERROR', 'message': 'Cannot connect to Django API. Server may be down.'}
     except requests.exceptions.Timeout:
@@ -241,37 +278,39 @@ def fetch_system_status():
     except Exception as e:
         return {'status_level': 'ERROR', 'message': f'An unknown error occurred: {e}'}
 
-# Function to fetch event logs (Updated for new schema)
-def fetch_event_logs():
-    """Fetches the latest events (weapon, overcrowding, etc.) from the Django backend."""
-    try:
-        response = requests.get(LOGS_URL)
-        if response.status_code == 200:
-            data = response.json()
+def logs_frame(rows):
+    """Builds the log table DataFrame from serialize_log_row() dicts."""
+    # If there are no rows, return an empty DataFrame immediately
+    if not rows:
+        return pd.DataFrame()
 
-            # If the response is an empty list, return an empty DataFrame immediately
-            if not data:
-                return pd.DataFrame()
+    df = pd.DataFrame(rows)
 
-            df = pd.DataFrame(data)
+    # Format datetime
+    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
 
-            # Format datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    # Construct display_url locally from snapshot_path for dashboard display
+    if 'snapshot_path' in df.columns:
+         df['display_url'] = df['snapshot_path'].apply(
+             lambda p: f"{LOCAL_URL}/snapshots/{p}" if pd.notna(p) and p else None
+         )
+    else:
+         # If snapshot_path is not available, set display_url to None
+         df['display_url'] = None
 
-            # Construct display_url locally from snapshot_path for dashboard display
-            if 'snapshot_path' in df.columns:
-                 df['display_url'] = df['snapshot_path'].apply(
-                     lambda p: f"{LOCAL_URL}/snapshots/{p}" if pd.notna(p) and p else None
-                 )
-            else:
-                 # If snapshot_path is not available, set display_url to None
-                 df['display_url'] = None
+    return df.sort_values(by='timestamp', ascending=False) # Ensure newest is first
 
-            return df.sort_values(by='timestamp', ascending=False) # Ensure newest is first
+# Function to fetch event logs (Updated for new schema)
+def fetch_event_logs():
+    """Fetches the latest events (weapon, overcrowding, etc.) from the Django backend."""
+    try:
+        status_code, data = conditional_get(LOGS_URL)
+        if status_code == 200:
+            return logs_frame(data)
 
         else:
             # Print status code for debugging if the API is returning an error
-            st.error(f"Failed to fetch logs. Django Log API returned status code: {response.status_code}")
+            st.error(f"Failed to fetch logs. Django Log API returned status code: {status_code}")
             return pd.DataFrame()
     except requests.exceptions.ConnectionError:
         # st.error("Cannot connect to Django API for logs.") # Uncomment for deeper debugging
@@ -282,6 +321,48 @@ def fetch_event_logs():
         return pd.DataFrame()
 
 
+def stream_dashboard_updates():
+    """
+    Yields (status_data, log_rows) every time the backend pushes a change over
+    the dashboard WebSocket. Nothing is requested while the system is idle.
+    When the socket drops, the error is reported and the connection retried;
+    the snapshot sent on every (re)connect brings the dashboard back in sync.
+    """
+    status_data, log_rows = None, []
+    while True:
+        try:
+            ws = websocket.create_connection(DASHBOARD_WS_URL, timeout=WS_PING_INTERVAL)
+        except (OSError, websocket.WebSocketException):
+            yield {'status_level': 'ERROR', 'message': 'Cannot connect to the Django live feed. Server may be down.'}, log_rows
+            time.sleep(WS_RECONNECT_DELAY)
+            continue
+
+        try:
+            while True:
+                try:
+                    message = json.loads(ws.recv())
+                except websocket.WebSocketTimeoutException:
+                    ws.ping()  # Quiet period; make sure the connection is still alive
+                    continue
+
+                if message['type'] == 'snapshot':
+                    status_data, log_rows = message['status'], message['logs']
+                elif message['type'] == 'status':
+                    status_data = message['status']
+                elif message['type'] == 'log':
+                    row = message['row']
+                    log_rows = [row] + [r for r in log_rows if r['id'] != row['id']]
+                    log_rows = log_rows[:MAX_LOG_ROWS]
+                else:
+                    continue
+                yield status_data, log_rows
+        except (OSError, ValueError, websocket.WebSocketException):
+            yield {'status_level': 'ERROR', 'message': 'Lost the Django live feed. Reconnecting...'}, log_rows
+            time.sleep(WS_RECONNECT_DELAY)
+        finally:
+            ws.close()
+
+
 # --- Dashboard Layout ---
 
 # Navigation Header
@@ -350,69 +431,84 @@ with col2:
     log_container = st.empty()
 
 
-# --- Main Polling Loop for Dynamic Updates ---
-if st.button("Start/Restart System Status Monitoring"):
-    st.session_state['monitoring_active'] = True
+# --- Rendering ---
 
-if 'monitoring_active' not in st.session_state:
-    st.session_state['monitoring_active'] = False
-
-if st.session_state['monitoring_active']:
-    while True:
-        # --- A. Update System Status Banner (Polling every 2 seconds) ---
-        status_data = fetch_system_status()
+def render_status(status_data):
+    """Draws the system status banner."""
+    with status_placeholder.container():
 
-        with status_placeholder.container():
-
-            if status_data.get('status_level') == 'ALERT':
-                st.markdown(f"""
+        if status_data.get('status_level') == 'ALERT':
+            st.markdown(f"""
 <div style='background-color: #A30000; color: white; padding: 25px; border-radius: 10px; font-size: 24px; font-weight: bold; text-align: center;'>
     🚨 💥 {status_data['message']} 💥 🚨
 </div>
 """, unsafe_allow_html=True)
 
-            elif status_data.get('status_level') in ['OK', 'IDLE']:
-                st.markdown(f"""
+        elif status_data.get('status_level') in ['OK', 'IDLE']:
+            st.markdown(f"""
 <div style='background-color: #2D4059; color: white; padding: 25px; border-radius: 10px; font-size: 20px; font-weight: bold; text-align: center;'>
     ✅ {status_data['message']}
 </div>
 """, unsafe_allow_html=True)
 
-            else: # Error case
-                st.error(f"⚠️ {status_data['message']}")
+        else: # Error case
+            st.error(f"⚠️ {status_data['message']}")
 
-        # --- B. Update Event Logs (Polling every 5 seconds) ---
-        logs_df = fetch_event_logs()
 
-        with log_container.container():
-            if not logs_df.empty:
-                # Check if 'display_url' column exists before using it
-                if 'display_url' in logs_df.columns:
-                    snapshot_url_col = 'display_url'
-                else:
-                    snapshot_url_col = 'snapshot_path' # Fallback if display_url wasn't created
-
-                st.dataframe(
-                    logs_df,
-                    column_config={
-                        snapshot_url_col: st.column_config.LinkColumn(
-                            "Snapshot Link",
-                            display_text="View Snapshot",
-                            help="Click to open the snapshot image" # Help text can be useful
-                        ),
-                        "timestamp": "Timestamp",
-                        "confidence": st.column_config.ProgressColumn("Confidence", format="%.2f", min_value=0, max_value=1),
-                        "label": "Label", # This now comes from event.type.name
-                        "snapshot_path": None, # Hide the raw path if we have display_url
-                        "id": None, # Optionally hide the internal log ID
-                        # Add other columns if needed, e.g., 'area_name' if linked in backend
-                    },
-                    column_order=['timestamp', 'label', 'confidence', snapshot_url_col], # Reorder as preferred
-                    height=600,
-                    hide_index=True
-                )
+def render_logs(logs_df):
+    """Draws the event log table."""
+    with log_container.container():
+        if not logs_df.empty:
+            # Check if 'display_url' column exists before using it
+            if 'display_url' in logs_df.columns:
+                snapshot_url_col = 'display_url'
             else:
-                st.warning("No events logged yet, or API is unavailable.")
+                snapshot_url_col = 'snapshot_path' # Fallback if display_url wasn't created
+
+            st.dataframe(
+                logs_df,
+                column_config={
+                    snapshot_url_col: st.column_config.LinkColumn(
+                        "Snapshot Link",
+                        display_text="View Snapshot",
+                        help="Click to open the snapshot image" # Help text can be useful
+                    ),
+                    "timestamp": "Timestamp",
+                    "confidence": st.column_config.ProgressColumn("Confidence", format="%.2f", min_value=0, max_value=1),
+                    "label": "Label", # This now comes from event.type.name
+                    "snapshot_path": None, # Hide the raw path if we have display_url
+                    "id": None, # Optionally hide the internal log ID
+                    # Add other columns if needed, e.g., 'area_name' if linked in backend
+                },
+                column_order=['timestamp', 'label', 'confidence', snapshot_url_col], # Reorder as preferred
+                height=600,
+                hide_index=True
+            )
+        else:
+            st.warning("No events logged yet, or API is unavailable.")
+
 
-        # Sleep for the shorter of the two update intervals
-        time.sleep(2) # Polls status every 2 seconds, logs effectively every 5 due to loop and sleep
\ No newline at end of file
+
+# --- Live Updates (WebSocket push, HTTP polling fallback) ---
+if st.button("Start/Restart System Status Monitoring"):
+    st.session_state['monitoring_active'] = True
+
+if 'monitoring_active' not in st.session_state:
+    st.session_state['monitoring_active'] = False
+
+if st.session_state['monitoring_active']:
+    if websocket is not None:
+        # --- Push: redraw only when the backend reports a change ---
+        for status_data, log_rows in stream_dashboard_updates():
+            render_status(status_data)
+            render_logs(logs_frame(log_rows))
+    else:
+        while True:
+            # --- A. Update System Status Banner (Polling every 2 seconds) ---
+            render_status(fetch_system_status())
+
+            # --- B. Update Event Logs ---
+            render_logs(fetch_event_logs())
+
+            # Sleep for the shorter of the two update intervals
+            time.sleep(2) # Polls status every 2 seconds, logs effectively every 5 due to loop and sleep
@@ -85,7 +85,7 @@ def send_event(url, data, event_type):
     try:
         response = requests.post(url, json=data, headers=headers)
         
-        if response.status_code in [200, 201]:
+        if response.status_code in [200, 201, 202]:
             print(f"SUCCESS: {event_type} created. Status: {response.status_code}")
             # print(f"Response: {response.json()}")
         else: